@@ -0,0 +1,148 @@
+"""Benchmarks for loading synthetic raw-files and processing them with cellpy.
+
+Each file format and size is benchmarked for CellpyData.from_raw,
+make_step_table, make_summary, save and load. The number of rows, the size of
+the raw-file and the peak memory usage (traced by tracemalloc during an extra
+run) are stored in the extra_info of each benchmark.
+"""
+
+import logging
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+import cellpy
+from cellpy import log
+from cellpy.readers import cellreader
+
+log.setup_logging(default_level=logging.WARNING, testing=True)
+
+
+def _peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _connect_to_sqlite(loader, temp_filename):
+    return sqlite3.connect(temp_filename)
+
+
+@pytest.fixture(scope="module")
+def cellpy_data_factory(raw_file):
+    """Function creating a CellpyData object with the instrument set."""
+    file_format, _, _, kwargs = raw_file
+    monkeypatch = pytest.MonkeyPatch()
+
+    def factory():
+        c = cellreader.CellpyData()
+        c.set_instrument(**kwargs["instrument"])
+        if file_format == "arbin_res":
+            # the synthetic res-file is a SQLite database
+            loader_module = sys.modules[type(c.loader_class).__module__]
+            monkeypatch.setattr(loader_module, "is_posix", False)
+            monkeypatch.setattr(loader_module, "use_subprocess", False)
+            monkeypatch.setattr(
+                loader_module.DataLoader,
+                "_get_connection_or_engine",
+                _connect_to_sqlite,
+            )
+        return c
+
+    yield factory
+    monkeypatch.undo()
+
+
+def _from_raw(c, file_name, kwargs):
+    c.from_raw(file_name, **kwargs["from_raw"])
+    return c
+
+
+@pytest.fixture(scope="module")
+def cellpy_data(raw_file, cellpy_data_factory):
+    _, _, file_name, kwargs = raw_file
+    return _from_raw(cellpy_data_factory(), file_name, kwargs)
+
+
+@pytest.fixture(scope="module")
+def cellpy_file(cellpy_data, tmp_path_factory):
+    file_name = tmp_path_factory.mktemp("cellpy_files") / "synthetic.h5"
+    _make_summary(cellpy_data)
+    cellpy_data.save(file_name)
+    return file_name
+
+
+def _add_extra_info(benchmark, raw_file, func, *args):
+    file_format, rows, file_name, _ = raw_file
+    benchmark.extra_info["file_format"] = file_format
+    benchmark.extra_info["rows"] = rows
+    benchmark.extra_info["file_size"] = file_name.stat().st_size
+    benchmark.extra_info["cellpy_version"] = cellpy.__version__
+    benchmark.extra_info["peak_memory"] = _peak_memory(func, *args)
+
+
+def _make_step_table(c):
+    c.make_step_table()
+
+
+def _make_summary(c):
+    if c.cell.steps is None or c.cell.steps.empty:
+        c.make_step_table()
+    c.make_summary()
+
+
+@pytest.mark.benchmark(group="from_raw", timer=time.time, warmup=False)
+def test_from_raw(benchmark, raw_file, cellpy_data_factory, rounds):
+    _, rows, file_name, kwargs = raw_file
+
+    def setup():
+        return (cellpy_data_factory(), file_name, kwargs), {}
+
+    c = benchmark.pedantic(_from_raw, setup=setup, rounds=rounds, iterations=1)
+    assert len(c.cell.raw) == rows
+    _add_extra_info(benchmark, raw_file, _from_raw, *setup()[0])
+
+
+@pytest.mark.benchmark(group="make_step_table", timer=time.time, warmup=False)
+def test_make_step_table(benchmark, raw_file, cellpy_data, rounds):
+    benchmark.pedantic(_make_step_table, args=(cellpy_data,), rounds=rounds)
+    assert not cellpy_data.cell.steps.empty
+    _add_extra_info(benchmark, raw_file, _make_step_table, cellpy_data)
+
+
+@pytest.mark.benchmark(group="make_summary", timer=time.time, warmup=False)
+def test_make_summary(benchmark, raw_file, cellpy_data, rounds):
+    benchmark.pedantic(_make_summary, args=(cellpy_data,), rounds=rounds)
+    assert not cellpy_data.cell.summary.empty
+    _add_extra_info(benchmark, raw_file, _make_summary, cellpy_data)
+
+
+@pytest.mark.benchmark(group="save", timer=time.time, warmup=False)
+def test_save(benchmark, raw_file, cellpy_data, tmp_path, rounds):
+    _make_summary(cellpy_data)
+    file_name = tmp_path / "synthetic.h5"
+
+    def _save():
+        cellpy_data.save(file_name, overwrite=True)
+
+    benchmark.pedantic(_save, rounds=rounds)
+    assert file_name.is_file()
+    _add_extra_info(benchmark, raw_file, _save)
+
+
+@pytest.mark.benchmark(group="load", timer=time.time, warmup=False)
+def test_load(benchmark, raw_file, cellpy_file, rounds):
+    _, rows, _, _ = raw_file
+
+    def _load():
+        return cellreader.CellpyData().load(cellpy_file)
+
+    c = benchmark.pedantic(_load, rounds=rounds)
+    assert len(c.cell.raw) == rows
+    _add_extra_info(benchmark, raw_file, _load)
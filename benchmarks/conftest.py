@@ -0,0 +1,72 @@
+import pytest
+
+from benchmarks import generators
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("synthetic", "benchmarks using synthetic raw-files")
+    group.addoption(
+        "--synthetic-rows",
+        default="10000",
+        help="comma separated list of the number of rows in the raw-files "
+        "(default: 10000)",
+    )
+    group.addoption(
+        "--synthetic-formats",
+        default=",".join(generators.GENERATORS),
+        help="comma separated list of the file formats (default: all)",
+    )
+    group.addoption(
+        "--synthetic-dir",
+        default=None,
+        help="directory for keeping the generated raw-files between runs "
+        "(default: a temporary directory)",
+    )
+    group.addoption(
+        "--synthetic-rounds",
+        type=int,
+        default=3,
+        help="number of rounds for each benchmark (default: 3)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "raw_file" not in metafunc.fixturenames:
+        return
+    config = metafunc.config
+    rows = [int(n) for n in config.getoption("synthetic_rows").split(",")]
+    file_formats = config.getoption("synthetic_formats").split(",")
+    params = [
+        (file_format, n)
+        for file_format in file_formats
+        for n in rows
+        if not (file_format == "custom_xlsx" and n > generators.MAX_XLSX_ROWS)
+    ]
+    metafunc.parametrize(
+        "raw_file",
+        params,
+        indirect=True,
+        scope="module",
+        ids=[f"{file_format}-{n}" for file_format, n in params],
+    )
+
+
+@pytest.fixture(scope="session")
+def synthetic_dir(request, tmp_path_factory):
+    directory = request.config.getoption("synthetic_dir")
+    if directory is None:
+        return tmp_path_factory.mktemp("synthetic")
+    return directory
+
+
+@pytest.fixture(scope="session")
+def rounds(request):
+    return request.config.getoption("synthetic_rounds")
+
+
+@pytest.fixture(scope="module")
+def raw_file(request, synthetic_dir):
+    """Tuple of the file format, number of rows, file name and loader kwargs."""
+    file_format, rows = request.param
+    file_name, kwargs = generators.generate(file_format, synthetic_dir, rows)
+    return file_format, rows, file_name, kwargs
@@ -0,0 +1,576 @@
+"""Deterministic generators of synthetic raw-files for the loader benchmarks.
+
+All the generators write the same synthetic cycling experiment (galvanostatic
+charge, rest, discharge and rest in each cycle) in the format of one of the
+supported instruments. The files are written chunk-wise (``CHUNK_SIZE`` rows
+at a time) so that also very large files (tens of millions of rows) can be
+made without keeping all the data in memory. The noise is drawn from a random
+generator seeded by the seed and the chunk number, i.e. the same arguments
+always give the same file.
+
+Example:
+    >>> from benchmarks import generators
+    >>> file_name, kwargs = generators.generate("maccor_txt", "data", 10_000)
+    >>> c = cellpy.cellreader.CellpyData()
+    >>> c.set_instrument(**kwargs["instrument"])
+    >>> c.from_raw(file_name, **kwargs["from_raw"])
+"""
+
+import contextlib
+import datetime
+import logging
+import pathlib
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 500_000
+SEED = 42
+POINTS_PER_STEP = 50
+STEPS_PER_CYCLE = 4
+POINTS_PER_CYCLE = POINTS_PER_STEP * STEPS_PER_CYCLE
+INTERVAL = 10.0  # seconds between each data point
+CURRENT = 1.0  # A
+V_MIN = 3.0
+V_MAX = 4.2
+START_DATETIME = datetime.datetime(2022, 1, 1, 8, 0, 0)
+# state of each step in a cycle (charge, rest, discharge, rest):
+STATES = np.array(["C", "R", "D", "R"])
+# the maximum number of rows in a worksheet (minus the header):
+MAX_XLSX_ROWS = 1_048_575
+
+_STEP_CAPACITY = CURRENT * POINTS_PER_STEP * INTERVAL / 3600
+
+
+def synthetic_frame(start: int, stop: int, seed: int = SEED) -> pd.DataFrame:
+    """Create the synthetic data for the rows start to stop.
+
+    Args:
+        start (int): the first row (zero-based).
+        stop (int): the row after the last row.
+        seed (int): seed for the noise (combined with start // CHUNK_SIZE).
+
+    Returns:
+        pandas.DataFrame with the columns data_point, test_time, step_time,
+        datetime, cycle_index, step_index, state, current, voltage,
+        capacity (within the step), charge_capacity, discharge_capacity,
+        charge_energy and discharge_energy (capacities and energies are
+        cumulated within each cycle). Units are s, A, V, Ah and Wh.
+    """
+    rng = np.random.default_rng([seed, start // CHUNK_SIZE])
+    row = np.arange(start, stop)
+    step_number = (row // POINTS_PER_STEP) % STEPS_PER_CYCLE
+    is_charge = step_number == 0
+    is_discharge = step_number == 2
+    step_time = (row % POINTS_PER_STEP + 1) * INTERVAL
+    test_time = (row + 1) * INTERVAL
+    fraction = step_time / (POINTS_PER_STEP * INTERVAL)
+
+    voltage = np.select(
+        [is_charge, step_number == 1, is_discharge],
+        [
+            V_MIN + (V_MAX - V_MIN) * fraction,
+            V_MAX - 0.05,
+            V_MAX - (V_MAX - V_MIN) * fraction,
+        ],
+        V_MIN + 0.05,
+    )
+    voltage = voltage + rng.normal(scale=0.001, size=len(row))
+    current = np.select([is_charge, is_discharge], [CURRENT, -CURRENT], 0.0)
+    capacity = np.where(is_charge | is_discharge, CURRENT * step_time / 3600, 0.0)
+    charge_capacity = np.where(is_charge, capacity, _STEP_CAPACITY)
+    discharge_capacity = np.select(
+        [step_number < 2, is_discharge], [0.0, capacity], _STEP_CAPACITY
+    )
+
+    return pd.DataFrame(
+        {
+            "data_point": row + 1,
+            "test_time": test_time,
+            "step_time": step_time,
+            "datetime": pd.Timestamp(START_DATETIME)
+            + pd.to_timedelta(test_time, unit="s"),
+            "cycle_index": row // POINTS_PER_CYCLE + 1,
+            "step_index": step_number + 1,
+            "state": STATES[step_number],
+            "current": current,
+            "voltage": voltage,
+            "capacity": capacity,
+            "charge_capacity": charge_capacity,
+            "discharge_capacity": discharge_capacity,
+            "charge_energy": charge_capacity * (V_MIN + V_MAX) / 2,
+            "discharge_energy": discharge_capacity * (V_MIN + V_MAX) / 2,
+        }
+    )
+
+
+def chunks(rows: int, seed: int = SEED):
+    """Iterate over the synthetic data (CHUNK_SIZE rows at a time)."""
+    for start in range(0, rows, CHUNK_SIZE):
+        yield synthetic_frame(start, min(start + CHUNK_SIZE, rows), seed)
+
+
+def _hh_mm_ss(seconds: pd.Series) -> pd.Series:
+    seconds = seconds.astype("int64")
+    hours = (seconds // 3600).astype(str).str.zfill(2)
+    minutes = (seconds % 3600 // 60).astype(str).str.zfill(2)
+    return hours + ":" + minutes + ":" + (seconds % 60).astype(str).str.zfill(2)
+
+
+def _write_csv(file_name, header_lines, frames, **kwargs):
+    with open(file_name, "w", newline="", encoding=kwargs.pop("encoding", None)) as f:
+        f.writelines(f"{line}\n" for line in header_lines)
+        for number, frame in enumerate(frames):
+            frame.to_csv(f, header=number == 0, index=False, **kwargs)
+
+
+def _maccor_frames(rows, seed):
+    for df in chunks(rows, seed):
+        seconds = df["test_time"]
+        step_seconds = df["step_time"]
+        yield pd.DataFrame(
+            {
+                "Rec#": df["data_point"],
+                "Cyc#": df["cycle_index"],
+                "Step": df["step_index"],
+                "TestTime": "  "
+                + (seconds // 86400).astype(int).astype(str)
+                + "d "
+                + _hh_mm_ss(seconds % 86400),
+                "StepTime": "  0d " + _hh_mm_ss(step_seconds),
+                "Amp-hr": df["capacity"].round(5),
+                "Watt-hr": (df["capacity"] * df["voltage"]).round(5),
+                "Amps": df["current"].abs().round(5),
+                "Volts": df["voltage"].round(5),
+                "State": df["state"],
+                "ES": 0,
+                "DPt Time": df["datetime"].dt.strftime("%m/%d/%Y %H:%M:%S"),
+                "ACImp/Ohms": 0.0,
+                "DCIR/Ohms": 0.0,
+            }
+        )
+
+
+def maccor_txt(file_name, rows, seed=SEED):
+    """Write a Maccor (model "one") tab-separated txt-file."""
+    header_lines = [
+        f"Today's Date:\t{START_DATETIME:%d %B %Y}\tDate of Test:\t"
+        f"{START_DATETIME:%d %B %Y, %I:%M:%S %p}",
+        "    Filename:\tsynthetic\tTester Channel:\t1",
+        "Procedure:\tsynthetic.000\tDescription:",
+    ]
+    _write_csv(
+        file_name,
+        header_lines,
+        _maccor_frames(rows, seed),
+        sep="\t",
+        encoding="ISO-8859-1",
+    )
+
+
+def _neware_frames(rows, seed):
+    step_types = {"C": "CC Chg", "D": "CC DChg", "R": "Rest"}
+    for df in chunks(rows, seed):
+        zeros = np.zeros(len(df))
+        yield pd.DataFrame(
+            {
+                "DataPoint": df["data_point"],
+                "Cycle Index": df["cycle_index"],
+                "Step Index": (df["cycle_index"] - 1) * STEPS_PER_CYCLE
+                + df["step_index"],
+                "Step Type": df["state"].map(step_types),
+                "Time": _hh_mm_ss(df["step_time"]),
+                "Cumulative Time": _hh_mm_ss(df["test_time"]),
+                "Current(A)": df["current"].round(8),
+                "Voltage(V)": df["voltage"].round(4),
+                "Capacity(Ah)": df["capacity"].round(8),
+                "Spec. Cap.(mAh/g)": zeros,
+                "Chg. Cap.(Ah)": np.where(df["state"] == "C", df["capacity"], 0.0),
+                "Chg. Spec. Cap.(mAh/g)": zeros,
+                "DChg. Cap.(Ah)": np.where(df["state"] == "D", df["capacity"], 0.0),
+                "DChg. Spec. Cap.(mAh/g)": zeros,
+                "Energy(Wh)": (df["capacity"] * df["voltage"]).round(8),
+                "Spec. Energy(mWh/g)": zeros,
+                "Chg. Energy(Wh)": zeros,
+                "Chg. Spec. Energy(mWh/g)": zeros,
+                "DChg. Energy(Wh)": zeros,
+                "DChg. Spec. Energy(mWh/g)": zeros,
+                "Date": df["datetime"].dt.strftime("%Y-%m-%d %H:%M:%S"),
+                "Power(W)": (df["current"] * df["voltage"]).round(8),
+                "dQ/dV(mAh/V)": zeros,
+                "dQm/dV(mAh/V.g)": zeros,
+                "Contact resistance(mO)": 0,
+                "Module start-stop switch": "Close",
+            }
+        )
+
+
+def neware_csv(file_name, rows, seed=SEED):
+    """Write a Neware (model "UIO") csv-file."""
+    _write_csv(file_name, [], _neware_frames(rows, seed))
+
+
+def _pec_frames(rows, seed):
+    start = START_DATETIME.strftime("%m/%d/%Y %H:%M:%S")
+    for df in chunks(rows, seed):
+        is_charge = df["state"] == "C"
+        is_discharge = df["state"] == "D"
+        zeros = np.zeros(len(df))
+        yield pd.DataFrame(
+            {
+                "Test": 1,
+                "Cell": 1,
+                "Rack": "SYN0001",
+                "Shelf": "001",
+                "Position": 1,
+                "Cell ID": "",
+                "Step": (df["cycle_index"] - 1) * STEPS_PER_CYCLE + df["step_index"],
+                "Cycle": df["cycle_index"],
+                "Total Time (Seconds)": df["test_time"],
+                "Load On Time (Seconds)": df["test_time"],
+                "Step Time (Seconds)": df["step_time"],
+                "Cycle Charge Time (Seconds)": np.where(is_charge, df["step_time"], 0),
+                "Cycle Discharge Time (Seconds)": np.where(
+                    is_discharge, df["step_time"], 0
+                ),
+                "Real Time": df["datetime"].dt.strftime("%m/%d/%Y %H:%M:%S"),
+                "Position Start Time": start,
+                "Voltage (mV)": (1000 * df["voltage"]).round(4),
+                "Current (mA)": (1000 * df["current"]).round(1),
+                "Charge Capacity (mAh)": (1000 * df["charge_capacity"]).round(3),
+                "Discharge Capacity (mAh)": (1000 * df["discharge_capacity"]).round(3),
+                "Charge Capacity (mWh)": (1000 * df["charge_energy"]).round(3),
+                "Discharge Capacity (mWh)": (1000 * df["discharge_energy"]).round(3),
+                "ReasonCode": 30,
+                "50% DoD (mV)": zeros,
+                "PeakPower 1 (W)": zeros,
+                "PeakPower 2 (W)": zeros,
+                "Open Circuit Voltage 1 (V)": zeros,
+                "Open Circuit Voltage 2 (V)": zeros,
+                "Internal Resistance 1 (mOhm)": zeros,
+                "Internal Resistance 2 (mOhm)": zeros,
+                "Ambient temperature (°C)": 25.0,
+                "Cell surface temperature (°C)": 25.0,
+            }
+        )
+
+
+def pec_csv(file_name, rows, seed=SEED):
+    """Write a PEC csv-file."""
+    header_lines = [
+        f"Request Year:,{START_DATETIME.year}",
+        "Test:,1",
+        "Test Description:,",
+        "TestRegime Name:,synthetic",
+        "Number Of Cells:,1",
+        f"Start Time:,{START_DATETIME:%m/%d/%Y %H:%M:%S}",
+        "End Time:,1/1/0001 0:00",
+        "#RESULTS CHECK",
+        "ReqYear,Test,CellNr,Type,Value,Reason,",
+        f"{START_DATETIME.year},1,1,1,3000,3,",
+        "#END RESULTS CHECK",
+    ]
+    _write_csv(file_name, header_lines, _pec_frames(rows, seed))
+
+
+CUSTOM_INSTRUMENT_FILE = """---
+formatters:
+    file_format: {file_format}
+    sep: ";"
+    skiprows: 0
+    header: 0
+    encoding: utf-8
+    decimal: .
+    thousands:
+    table_name: synthetic
+
+post_processors:
+    split_capacity: false
+    split_current: false
+    set_index: true
+    rename_headers: true
+    set_cycle_number_not_zero: false
+    convert_date_time_to_datetime: true
+
+states:
+    column_name: State
+    charge_keys:
+        - C
+    discharge_keys:
+        - D
+    rest_keys:
+        - R
+
+unit_labels:
+    time: s
+    current: A
+    voltage: V
+    capacity: Ah
+
+raw_units:
+    current: A
+    charge: Ah
+    mass: g
+
+normal_headers_renaming_dict:
+    data_point_txt: Record
+    test_time_txt: TestTime/s
+    step_time_txt: StepTime/s
+    datetime_txt: DateTime
+    cycle_index_txt: Cycle
+    step_index_txt: Step
+    current_txt: Current/A
+    voltage_txt: Voltage/V
+    charge_capacity_txt: ChargeCapacity/Ah
+    discharge_capacity_txt: DischargeCapacity/Ah
+"""
+
+
+def _custom_frames(rows, seed):
+    for df in chunks(rows, seed):
+        yield pd.DataFrame(
+            {
+                "Record": df["data_point"],
+                "TestTime/s": df["test_time"],
+                "StepTime/s": df["step_time"],
+                "DateTime": df["datetime"].dt.strftime("%Y-%m-%d %H:%M:%S"),
+                "Cycle": df["cycle_index"],
+                "Step": df["step_index"],
+                "State": df["state"],
+                "Current/A": df["current"],
+                "Voltage/V": df["voltage"].round(6),
+                "ChargeCapacity/Ah": df["charge_capacity"].round(8),
+                "DischargeCapacity/Ah": df["discharge_capacity"].round(8),
+            }
+        )
+
+
+def _custom_instrument_file(file_name, file_format):
+    instrument_file = pathlib.Path(file_name).with_suffix(".yml")
+    instrument_file.write_text(CUSTOM_INSTRUMENT_FILE.format(file_format=file_format))
+
+
+def custom_csv(file_name, rows, seed=SEED):
+    """Write a csv-file and the instrument file (yml) for the custom loader."""
+    _write_csv(file_name, [], _custom_frames(rows, seed), sep=";")
+    _custom_instrument_file(file_name, "csv")
+
+
+def custom_xlsx(file_name, rows, seed=SEED):
+    """Write a xlsx-file and the instrument file (yml) for the custom loader."""
+    if rows > MAX_XLSX_ROWS:
+        raise ValueError(f"xlsx-files can not have more than {MAX_XLSX_ROWS} rows")
+    df = pd.concat(_custom_frames(rows, seed))
+    df.to_excel(file_name, sheet_name="synthetic", index=False, engine="openpyxl")
+    _custom_instrument_file(file_name, "xlsx")
+
+
+def arbin_res(file_name, rows, seed=SEED):
+    """Write a SQLite stand-in for an Arbin res-file (an MS Access database).
+
+    The tables and columns are the ones used by the arbin_res loader. The file can
+    only be read through a sqlite3 connection (see ``bench_loaders.py``) since
+    the loader otherwise uses mdbtools or an ODBC driver.
+    """
+    file_name = pathlib.Path(file_name)
+    if file_name.exists():
+        file_name.unlink()
+    global_df = pd.DataFrame(
+        {
+            "Test_ID": [1],
+            "Test_Name": ["synthetic"],
+            "Channel_Index": [1],
+            "Channel_Number": [1],
+            "Channel_Type": [1],
+            "Creator": ["cellpy"],
+            "Comments": [""],
+            "Item_ID": ["synthetic"],
+            "Schedule_File_Name": ["synthetic.sdx"],
+            "Start_DateTime": [_to_ole(pd.Series([pd.Timestamp(START_DATETIME)]))[0]],
+            "Applications_Path": [""],
+            "DAQ_Index": [1],
+            "Log_Aux_Data_Flag": [0],
+            "Log_Event_Data_Flag": [0],
+        }
+    )
+    aux_global_df = pd.DataFrame(
+        columns=["Channel_Index", "Auxiliary_Index", "Data_Type", "Nickname", "Unit"]
+    )
+    aux_df = pd.DataFrame(
+        columns=["Test_ID", "Data_Point", "Auxiliary_Index", "Data_Type", "X", "dX_dt"]
+    )
+    with contextlib.closing(sqlite3.connect(file_name)) as conn:
+        global_df.to_sql("Global_Table", conn, index=False)
+        aux_global_df.to_sql("Aux_Global_Data_Table", conn, index=False)
+        aux_df.to_sql("Auxiliary_Table", conn, index=False)
+        for df in chunks(rows, seed):
+            normal_df = pd.DataFrame(
+                {
+                    "Test_ID": 1,
+                    "Data_Point": df["data_point"],
+                    "Test_Time": df["test_time"],
+                    "Step_Time": df["step_time"],
+                    "DateTime": _to_ole(df["datetime"]),
+                    "Step_Index": df["step_index"],
+                    "Cycle_Index": df["cycle_index"],
+                    "Is_FC_Data": 0,
+                    "Current": df["current"],
+                    "Voltage": df["voltage"],
+                    "Charge_Capacity": df["charge_capacity"],
+                    "Discharge_Capacity": df["discharge_capacity"],
+                    "Charge_Energy": df["charge_energy"],
+                    "Discharge_Energy": df["discharge_energy"],
+                    "dV/dt": 0.0,
+                    "Internal_Resistance": 0.0,
+                    "AC_Impedance": 0.0,
+                    "ACI_Phase_Angle": 0.0,
+                }
+            )
+            normal_df.to_sql(
+                "Channel_Normal_Table", conn, index=False, if_exists="append"
+            )
+            is_last = (df["data_point"] % POINTS_PER_CYCLE == 0) | (
+                df["data_point"] == rows
+            )
+            cycle_ends = normal_df.loc[is_last]
+            statistic_df = pd.DataFrame(
+                {
+                    "Test_ID": 1,
+                    "Data_Point": cycle_ends["Data_Point"],
+                    "Vmax_On_Cycle": V_MAX,
+                    "Charge_Time": POINTS_PER_STEP * INTERVAL,
+                    "Discharge_Time": POINTS_PER_STEP * INTERVAL,
+                }
+            )
+            statistic_df.to_sql(
+                "Channel_Statistic_Table", conn, index=False, if_exists="append"
+            )
+
+
+def _to_ole(datetimes: pd.Series) -> np.ndarray:
+    # days since 1899-12-30 (as used by Excel and MS Access)
+    return ((datetimes - pd.Timestamp(1899, 12, 30)) / pd.Timedelta(days=1)).values
+
+
+# column types in the data module (see biologic_file_format.bl_dtypes):
+_MPR_COLUMNS = [1, 2, 31, 131, 4, 6, 8, 467]
+_MPR_DTYPE = np.dtype(
+    [
+        ("flags", "u1"),
+        ("flags2", "<u2"),
+        ("time", "<f8"),
+        ("Ewe", "<f4"),
+        ("I", "<f4"),
+        ("QChargeDischarge", "<f8"),
+    ]
+)
+_MPR_DATA_HEADER_LENGTH = 405
+_MPR_LOG_LENGTH = 1300
+_MPR_LOG_START_POSITION = 585
+
+
+def _mpr_module(short_name: bytes, long_name: bytes, length: int, version: int):
+    from cellpy.readers.instruments.loader_specific_modules.biologic_file_format import (
+        hdr_dtype,
+    )
+
+    hdr = np.zeros(1, dtype=hdr_dtype)
+    hdr["shortname"] = short_name.ljust(10)
+    hdr["longname"] = long_name.ljust(25)
+    hdr["length"] = length
+    hdr["version"] = version
+    hdr["date"] = START_DATETIME.strftime("%m.%d.%y").encode()
+    return b"MODULE" + hdr.tobytes()
+
+
+def biologics_mpr(file_name, rows, seed=SEED):
+    """Write a BioLogic mpr-file (settings, data (version 2) and log modules)."""
+    from cellpy.readers.instruments.loader_specific_modules.biologic_file_format import (
+        mpr_label,
+    )
+
+    data_header = np.zeros(_MPR_DATA_HEADER_LENGTH, dtype="u1")
+    data_header[:4] = np.frombuffer(np.uint32(rows).tobytes(), dtype="u1")
+    data_header[4] = len(_MPR_COLUMNS)
+    columns = np.array(_MPR_COLUMNS, dtype="<u2").tobytes()
+    data_header[5 : 5 + len(columns)] = np.frombuffer(columns, dtype="u1")
+
+    log_data = np.zeros(_MPR_LOG_LENGTH, dtype="u1")
+    start = _to_ole(pd.Series([pd.Timestamp(START_DATETIME)])).astype("<f8")
+    position = _MPR_LOG_START_POSITION
+    log_data[position : position + 8] = np.frombuffer(start.tobytes(), dtype="u1")
+
+    with open(file_name, "wb") as f:
+        f.write(mpr_label)
+        f.write(_mpr_module(b"VMP Set", b"VMP settings", 0, 0))
+        data_length = _MPR_DATA_HEADER_LENGTH + rows * _MPR_DTYPE.itemsize
+        f.write(_mpr_module(b"VMP data", b"VMP data", data_length, 2))
+        f.write(data_header.tobytes())
+        for df in chunks(rows, seed):
+            is_charge = (df["state"] == "C").values
+            new_cycle = (df["data_point"] % POINTS_PER_CYCLE == 1).values
+            new_cycle &= df["data_point"].values > 1
+            data = np.zeros(len(df), dtype=_MPR_DTYPE)
+            # mode (bit 1-2), ox/red (bit 3) and Ns changes (bit 6):
+            data["flags"] = 1 + 4 * is_charge + 32 * new_cycle
+            data["flags2"] = df["step_index"] - 1
+            data["time"] = df["test_time"] - INTERVAL
+            data["Ewe"] = df["voltage"]
+            data["I"] = 1000 * df["current"]
+            data["QChargeDischarge"] = 1000 * np.where(
+                is_charge, -df["capacity"], df["capacity"]
+            )
+            f.write(data.tobytes())
+        f.write(_mpr_module(b"VMP LOG", b"VMP LOG", _MPR_LOG_LENGTH, 0))
+        f.write(log_data.tobytes())
+
+
+# generator, extension, instrument (for CellpyData.set_instrument) and from_raw kwargs:
+GENERATORS = {
+    "arbin_res": (arbin_res, "res", {"instrument": "arbin_res"}, {}),
+    "maccor_txt": (
+        maccor_txt,
+        "txt",
+        {"instrument": "maccor_txt", "model": "one"},
+        {"sep": "\t"},
+    ),
+    "neware_csv": (neware_csv, "csv", {"instrument": "neware_txt", "model": "UIO"}, {}),
+    "pec_csv": (pec_csv, "csv", {"instrument": "pec_csv"}, {}),
+    "custom_csv": (custom_csv, "csv", {"instrument": "custom"}, {}),
+    "custom_xlsx": (custom_xlsx, "xlsx", {"instrument": "custom"}, {}),
+    "biologics_mpr": (biologics_mpr, "mpr", {"instrument": "biologics_mpr"}, {}),
+}
+
+
+def generate(file_format: str, directory, rows: int, seed: int = SEED):
+    """Write a synthetic raw-file (if it has not been made already).
+
+    Args:
+        file_format (str): one of the keys in GENERATORS.
+        directory (str or pathlib.Path): where to put the file.
+        rows (int): number of data points.
+        seed (int): seed for the noise.
+
+    Returns:
+        file name (pathlib.Path) and the kwargs for loading it (dictionary with the
+        keys "instrument" (for CellpyData.set_instrument) and "from_raw").
+    """
+    generator, extension, instrument_kwargs, from_raw_kwargs = GENERATORS[file_format]
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    file_name = directory / f"{file_format}_{rows}_{seed}.{extension}"
+    # marks that the file is complete (the generation could have been interrupted):
+    done_file = file_name.with_name(f"{file_name.name}.done")
+    if not done_file.is_file():
+        logging.info(f"generating {file_name} ({rows} rows)")
+        generator(file_name, rows, seed)
+        done_file.touch()
+
+    instrument_kwargs = dict(instrument_kwargs)
+    if instrument_kwargs["instrument"] == "custom":
+        instrument_kwargs["instrument_file"] = file_name.with_suffix(".yml")
+    return file_name, {
+        "instrument": instrument_kwargs,
+        "from_raw": dict(from_raw_kwargs),
+    }
@@ -107,6 +107,14 @@ class ReaderClass(CellPyConfig):
     capacity_interpolation_step: float = 2.0
     use_cellpy_stat_file: bool = False
     auto_dirs: bool = True  # search in prm-file for res and hdf5 dirs in loadcell
+    step_table_engine: str = "numpy"  # "numpy" or "pandas" (groupby-agg)
+    compact_dtypes: bool = False  # downcast index columns of raw after loading
+    compact_float_tolerance: Union[
+        float, None
+    ] = None  # store floats in raw as float32 if within this (relative) tolerance
+    raw_cache: bool = False  # cache the data parsed from the raw-files (needs pyarrow)
+    raw_cache_dir: Union[Path, str, None] = None  # defaults to ~/.cellpy_raw_cache
+    raw_cache_max_size: int = 2_000_000_000  # bytes (least recently used removed first)
 
 
 @dataclass
@@ -262,6 +270,7 @@ _odbc = "pyodbc"
 _search_for_odbc_driver = True
 _allow_multi_test_file = False
 _use_filename_cache = True
+_reload_instrument_modules = False  # re-import loaders (and configurations) each time
 _sub_process_path = Path(__file__) / "../../../bin/mdbtools-win/mdb-export"
 _sub_process_path = _sub_process_path.resolve()
 _sort_if_subprocess = True
@@ -279,6 +288,12 @@ _cellpyfile_summary_format = "table"
 _cellpyfile_stepdata_format = "table"
 _cellpyfile_infotable_format = "fixed"
 _cellpyfile_fidtable_format = "fixed"
+_cellpyfile_index_optlevel = 9  # PyTables index for data_point and cycle_index (raw)
+_cellpyfile_index_kind = "full"
+_cellpyfile_backend = "hdf5"  # "hdf5" or "parquet" (used if no extension is given)
+_cellpyfile_parquet_extension = "cpq"
+_cellpyfile_parquet_compression = "zstd"
+_cellpyfile_parquet_row_group_size = 100_000  # min rows (split between cycles)
 
 # templates
 # _standard_template_uri = "https://github.com/jepegit/cellpy_cookies.git"  # v.1.0
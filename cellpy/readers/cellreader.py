@@ -12,12 +12,15 @@ Example:
 """
 
 import collections
+import concurrent.futures
 import copy
 import csv
+import inspect
 import itertools
 import logging
 import numbers
 import os
+import shutil
 import sys
 import time
 import warnings
@@ -64,6 +67,7 @@ from cellpy.parameters.internal_settings import (
     CellpyUnits,
 )
 
+from cellpy.readers import parquet_files, raw_cache
 from cellpy.readers.core import (
     Cell,
     FileID,
@@ -73,6 +77,12 @@ from cellpy.readers.core import (
     xldate_as_datetime,
     generate_default_factory,
     Q,
+    RawDataProxy,
+    merge_ranges,
+    hdf5_where_from_ranges,
+    compact_dtypes,
+    memory_report,
+    humanize_bytes,
 )
 
 HEADERS_NORMAL = get_headers_normal()  # TODO @jepe refactor this (not needed)
@@ -219,6 +229,7 @@ class CellpyData:
         else:
             self.tester = tester
         self.loader = None  # this will be set in the function set_instrument
+        self._instrument_args = (None, None)  # (instrument, kwargs) set_instrument
         self.logger = logging.getLogger(__name__)
         logging.debug("created CellpyData instance")
         self.name = None
@@ -412,6 +423,7 @@ class CellpyData:
         r.loc[cycle_mask, hdr_d_cap] = r.loc[cycle_mask, hdr_d_cap] - d_cap
         r.loc[cycle_mask, hdr_c_energy] = r.loc[cycle_mask, hdr_c_energy] - c_energy
         r.loc[cycle_mask, hdr_d_energy] = r.loc[cycle_mask, hdr_d_energy] - d_energy
+        self.cell.reset_segment_index()
 
     def split(self, cycle=None):
         """Split experiment (CellpyData object) into two sub-experiments. if cycle
@@ -535,6 +547,7 @@ class CellpyData:
     def _set_instrument(self, instrument, **kwargs):
         logging.debug(f"Setting new instrument: {instrument}")
         self.loader_class = self.instrument_factory.create(instrument, **kwargs)
+        self._instrument_args = (instrument, kwargs)
         self.raw_limits = self.loader_class.get_raw_limits()
         # ----- create the loader ------------------------
         self.loader = self.loader_class.loader
@@ -1000,8 +1013,14 @@ class CellpyData:
         selector=None,
         **kwargs,
     ):
+        """Load the cellpy-file and append new data from the raw-file (if any).
 
-        logging.info("Started cellpy.cellreader.loadcell")
+        Works as loadcell, but instead of re-loading the raw-file when it has
+        changed, only the new data points are loaded and the step table and
+        summary are updated incrementally (see dev_update).
+        """
+
+        logging.info("Started cellpy.cellreader.dev_update_loadcell")
 
         if cellpy_file is None or force_raw:
             similar = None
@@ -1010,7 +1029,7 @@ class CellpyData:
 
         logging.debug("checked if the files were similar")
 
-        if similar is None:
+        if not similar:
             # forcing to load only raw_files
             self.from_raw(raw_files, **kwargs)
             if self.status_datasets:
@@ -1035,66 +1054,96 @@ class CellpyData:
 
         if all(similar.values()):
             logging.info("Everything is up to date")
-            return
-
-        start_file = True
-        for i, f in enumerate(raw_files):
-            f = Path(f)
-            if not similar[f.name] and start_file:
-                try:
-                    last_data_point = self.cell.raw_data_files[i].last_data_point
-                except IndexError:
-                    last_data_point = 0
-
-                self.dev_update_from_raw(
-                    file_names=f, data_points=[last_data_point, None]
-                )
-                self.cell = self.dev_update_merge()
-
-            elif not similar[f.name]:
-                try:
-                    last_data_point = self.cell.raw_data_files[i].last_data_point
-                except IndexError:
-                    last_data_point = 0
-
-                self.dev_update_from_raw(
-                    file_names=f, data_points=[last_data_point, None]
-                )
-                self.merge()
+            return self
 
-            start_file = False
+        if not self._is_listtype(raw_files):
+            raw_files = [raw_files]
+
+        if len(raw_files) != 1 or len(self.cell.raw_data_files) != 1:
+            logging.info("Can only update cells made from one raw-file")
+            logging.info("-> loading the raw-file(s) instead")
+            return self.dev_update_loadcell(
+                raw_files,
+                mass=mass,
+                summary_on_raw=summary_on_raw,
+                summary_ir=summary_ir,
+                summary_ocv=summary_ocv,
+                summary_end_v=summary_end_v,
+                force_raw=True,
+                use_cellpy_stat_file=use_cellpy_stat_file,
+                nom_cap=nom_cap,
+                **kwargs,
+            )
 
-        self.dev_update_make_steps()
-        self.dev_update_make_summary(
+        self.dev_update(
+            raw_files[0],
             all_tests=False,
             find_ocv=summary_ocv,
             find_ir=summary_ir,
             find_end_voltage=summary_end_v,
             use_cellpy_stat_file=use_cellpy_stat_file,
+            nom_cap=nom_cap,
+            **kwargs,
         )
         return self
 
     def dev_update(self, file_names=None, **kwargs):
-        print("NOT FINISHED YET - but close")
+        """Append new data from the raw-file and update the step table and summary.
+
+        Only the data points after the last data point of the raw-file
+        (FileID.last_data_point) are loaded. The step table and the summary
+        are re-calculated from the start of the last (possibly unfinished) cycle
+        and merged with the existing ones. Loaders that stored a read context in
+        the FileID (the text loaders) only parse the bytes appended to the raw-file.
+
+        Args:
+            file_names: the raw-file (defaults to the raw-file the cell was
+                created from).
+            **kwargs: sent to make_summary (find_ir, find_end_voltage,
+                nom_cap, ...) or to the loader.
+
+        Returns:
+            self
+        """
+        summary_kwargs = {
+            k: kwargs.pop(k)
+            for k in inspect.signature(self.make_summary).parameters
+            if k in kwargs
+        }
         if len(self.cell.raw_data_files) != 1:
-            logging.warning("Merged cell. But can only update based on the last file")
-            print(self.cell.raw_data_files)
-            for fid in self.cell.raw_data_files:
-                print(fid)
-        last = self.cell.raw_data_files[0].last_data_point
+            logging.warning("Can only update cells made from one raw-file")
+            return self
+
+        fid = self.cell.raw_data_files[0]
+        if file_names is None:
+            file_names = fid.full_name
+        last_data_point = fid.last_data_point
+        if not last_data_point:
+            last_data_point = self.cell.raw[self.headers_normal.data_point_txt].max()
+        logging.debug(f"updating from data point {last_data_point}")
+
+        if getattr(fid, "read_context", None) is not None:
+            # the loader only needs to parse the data appended to the raw-file
+            kwargs["resume_from"] = fid
 
         self.dev_update_from_raw(
-            file_names=file_names, data_points=[last, None], **kwargs
+            file_names=file_names, data_points=[last_data_point, None], **kwargs
         )
-        print("lets try to merge")
-        self.cell = self.dev_update_merge()
-        print("now it is time to update the step table")
+        self.cells = [self.dev_update_merge()]
+        self.number_of_datasets = len(self.cells)
         self.dev_update_make_steps()
-        print("and finally, lets update the summary")
-        self.dev_update_make_summary()
+        self.dev_update_make_summary(**summary_kwargs)
+        return self
 
     def dev_update_merge(self):
-        print("NOT FINISHED YET - but very close")
+        """Merge the new data (second cell) into the existing data (first cell).
+
+        The data points in the first cell that are also found in the
+        new data are replaced.
+
+        Returns:
+            the merged cell
+        """
         number_of_tests = len(self.cells)
         if number_of_tests != 2:
             logging.warning("Cannot merge if you do not have exactly two cell-objects")
@@ -1103,56 +1152,81 @@ class CellpyData:
 
         if t1.raw.empty:
             logging.debug("OBS! the first dataset is empty")
+            return t2
 
         if t2.raw.empty:
             t1.merged = True
             logging.debug("the second dataset was empty")
             logging.debug(" -> merged contains only first")
             return t1
-        test = t1
 
         cycle_index_header = self.headers_normal.cycle_index_txt
+        data_point_header = self.headers_normal.data_point_txt
 
-        if not t1.raw.empty:
-            t1.raw = t1.raw.iloc[:-1]
-            raw2 = pd.concat([t1.raw, t2.raw], ignore_index=True)
-            test.no_cycles = max(raw2[cycle_index_header])
-            test.raw = raw2
-        else:
-            test.no_cycles = max(t2.raw[cycle_index_header])
-            test = t2
+        first_new_data_point = t2.raw[data_point_header].min()
+        raw1 = t1.raw.loc[t1.raw[data_point_header] < first_new_data_point]
+        t1.raw = pd.concat([raw1, t2.raw])
+        t1.no_cycles = t1.raw[cycle_index_header].max()
+
+        # the file-id of the new data describes the current state of the raw-file
+        t1.raw_data_files = t2.raw_data_files[:1]
+        t1.raw_data_files_length = [len(t1.raw)]
         logging.debug(" -> merged with new dataset")
 
-        return test
+        return t1
 
     def dev_update_make_steps(self, **kwargs):
-        old_steps = self.cell.steps.iloc[:-1]
-        # Note! hard-coding header name (might fail if changing default headers)
-        from_data_point = self.cell.steps.iloc[-1].point_first
+        """Update the step table after new data has been appended.
+
+        Only the steps from the start of the last cycle in the existing step
+        table are re-calculated.
+        """
+        steps = self.cell.steps
+        if not self.cell.has_steps or steps.empty:
+            self.make_step_table(**kwargs)
+            return
+
+        shdr = self.headers_step_table
+        point_first_header = f"{shdr.point}_first"
+        last_cycle = steps[shdr.cycle].max()
+        from_data_point = steps.loc[
+            steps[shdr.cycle] == last_cycle, point_first_header
+        ].min()
+        old_steps = steps.loc[steps[point_first_header] < from_data_point]
         new_steps = self.make_step_table(from_data_point=from_data_point, **kwargs)
+        if "index" in new_steps.columns and "index" in old_steps.columns:
+            # continue the numbering of the old step table
+            new_steps["index"] += len(old_steps)
         merged_steps = pd.concat([old_steps, new_steps]).reset_index(drop=True)
         self.cell.steps = merged_steps
 
     def dev_update_make_summary(self, **kwargs):
-        print("NOT FINISHED YET - but not critical")
-        # Update not implemented yet, running full summary calculations for now.
-        # For later:
-        # old_summary = self.cell.summary.iloc[:-1]
+        """Update the summary after new data has been appended.
+
+        The summary is re-calculated from the last cycle in the existing
+        summary (the cumulated columns are re-calculated for all cycles).
+        """
+        summary = self.cell.summary
+        if summary.empty:
+            self.make_summary(**kwargs)
+            return
+
         cycle_index_header = self.headers_summary.cycle_index
-        from_cycle = self.cell.summary.iloc[-1][cycle_index_header]
+        if summary.index.name == cycle_index_header:
+            from_cycle = summary.index[-1]
+        else:
+            from_cycle = summary.iloc[-1][cycle_index_header]
         self.make_summary(from_cycle=from_cycle, **kwargs)
-        # For later:
-        # (Remark! need to solve how to merge cumulated columns)
-        # new_summary = self.make_summary(from_cycle=from_cycle)
-        # merged_summary = pd.concat([old_summary, new_summary]).reset_index(drop=True)
-        # self.cell.summary = merged_summary
 
     def dev_update_from_raw(self, file_names=None, data_points=None, **kwargs):
-        """This method is under development. Using this to develop updating files
-        with only new data.
+        """Load the new data from the raw-file into a new cell (appended to self.cells).
+
+        Args:
+            file_names: the raw-file.
+            data_points (tuple of ints): load only data from data_point[0] to
+                data_point[1] (use None for infinite).
+            **kwargs: sent to the loader.
         """
-        print("NOT FINISHED YET - but very close")
-        # TODO @jepe: implement changes from original from_raw method introduced after this one was last edited.
         if file_names:
             self.file_names = file_names
 
@@ -1182,14 +1256,19 @@ class CellpyData:
             # remark that the bounds are included (i.e. the first datapoint
             # is 5000.
 
-            logging.debug("added the data set - merging file info")
-
-            # raw_data_file = copy.deepcopy(test[set_number].raw_data_files[0])
-            # file_size = test[set_number].raw_data_files_length[0]
+        if data_points is not None:
+            # not all the loaders support selecting data points
+            d1, d2 = data_points
+            raw = cell[set_number].raw
+            data_point_header = self.headers_normal.data_point_txt
+            selector = np.ones(len(raw), dtype=bool)
+            if d1 is not None:
+                selector &= (raw[data_point_header] >= d1).values
+            if d2 is not None:
+                selector &= (raw[data_point_header] <= d2).values
+            if not selector.all():
+                cell[set_number].raw = raw.loc[selector]
 
-            # test[set_number].raw_data_files.append(raw_data_file)
-            # test[set_number].raw_data_files_length.append(file_size)
-            # return test
         cell[set_number].raw_units = self._set_raw_units()
         self.cells.append(cell[set_number])
 
@@ -1203,6 +1282,8 @@ class CellpyData:
         file_names=None,
         pre_processor_hook=None,
         post_processor_hook=None,
+        parallel=False,
+        max_workers=None,
         **kwargs,
     ):
         """Load a raw data-file.
@@ -1214,6 +1295,14 @@ class CellpyData:
             pre_processor_hook (callable): function that will be applied to the data within the loader.
             post_processor_hook (callable): function that will be applied to the
                 cellpy.Dataset object after initial loading.
+            parallel (bool): parse the raw-files concurrently in a process pool
+                (only used if there are more than one file). The loader is
+                re-created in each process, so changes made to the loader
+                object after set_instrument are not seen by the processes
+                (and the pre_processor_hook must be picklable). Raises
+                UnderDefined if the loader was not set using set_instrument.
+            max_workers (int): max number of processes used when parallel is True
+                (defaults to the number of files or processors).
 
         Keyword Args for merging:
             recalc (bool): set to false if you don't want cellpy to automatically shift cycle number
@@ -1262,68 +1351,45 @@ class CellpyData:
         # so set_number is hard-coded to 0, i.e. actual-test is always test[0]
         set_number = 0
         cells = None
-        counter = 0
         logging.debug("start iterating through file(s)")
         recalc = kwargs.pop("recalc", True)
-        for file_name in self.file_names:
-            logging.debug("loading raw file:")
-            logging.debug(f"{file_name}")
-            new_cells = raw_file_loader(
-                file_name, pre_processor_hook=pre_processor_hook, **kwargs
-            )  # list of tests
+        if parallel and len(self.file_names) > 1:
+            loaded_cells = self._load_raw_files_in_parallel(
+                self.file_names,
+                max_workers=max_workers,
+                pre_processor_hook=pre_processor_hook,
+                **kwargs,
+            )
+        else:
+            loaded_cells = []
+            loader_info = _loader_info(self.loader_class, *self._instrument_args)
+            for file_name in self.file_names:
+                logging.debug("loading raw file:")
+                logging.debug(f"{file_name}")
+                new_cells = raw_cache.load(
+                    raw_file_loader,
+                    file_name,
+                    loader_info=loader_info,
+                    pre_processor_hook=pre_processor_hook,
+                    **kwargs,
+                )  # list of tests
+                loaded_cells.append(new_cells)
+
+        new_cells_first_test = []
+        for file_name, new_cells in zip(self.file_names, loaded_cells):
             if post_processor_hook is not None:
                 # REMARK! this needs to be changed if we stop returning the datasets in a list
                 # (i.e. if we chose to remove option for having more than one test pr instance)
                 new_cells = [post_processor_hook(n) for n in new_cells]
 
             if new_cells:
-                # retrieving the first cell data (e.g. first file)
-                if cells is None:
-                    logging.debug("getting data from first file")
-                    if not new_cells[set_number].has_data:
-                        logging.debug("NO DATA")
-                    else:
-                        cells = new_cells
-
-                # appending cell data file to existing
-                else:
-                    logging.debug("continuing reading files...")
-                    _cells = self._append(
-                        cells[set_number], new_cells[set_number], recalc=recalc
-                    )
-
-                    if not _cells:
-                        logging.warning(f"NO CELLS FOUND: {file_name}")
-                        continue
-
-                    cells[set_number] = _cells
-
-                    # retrieving file info in a for-loop in case of multiple files
-                    # Remark!
-                    #    - the raw_data_files attribute is a list
-                    #    - the raw_data_files_length attribute is a list
-                    # The reason for this choice is not clear anymore, but
-                    # let us keep it like this for now
-                    logging.debug("added the data set - merging file info")
-                    # TODO: include this into prms (and config-file):
-                    max_raw_files_to_merge = 20
-                    # TODO: legacy code - please fix me
-                    for j, raw_data_file in enumerate(
-                        new_cells[set_number].raw_data_files
-                    ):
-                        file_size = new_cells[set_number].raw_data_files_length[j]
-                        cells[set_number].raw_data_files.append(raw_data_file)
-                        cells[set_number].raw_data_files_length.append(file_size)
-                        counter += 1
-                        if counter > max_raw_files_to_merge:
-                            logging.debug("ERROR? Too many files to merge")
-                            raise ValueError(
-                                "Too many files to merge - "
-                                "could be a p2-p3 zip thing"
-                            )
-
+                new_cells_first_test.append(new_cells[set_number])
             else:
-                logging.debug("NOTHING LOADED")
+                logging.debug(f"NOTHING LOADED: {file_name}")
+
+        cell = self._merge_raw_cells(new_cells_first_test, recalc=recalc)
+        if cell is not None:
+            cells = [cell]
 
         logging.debug("finished loading the raw-files")
 
@@ -1342,6 +1408,7 @@ class CellpyData:
                 cells[set_number] = self._sort_data(cells[set_number])
             # REMARK! If you want to allow for more than one cell pr instance, this needs to be replaced (for example using .extend)
             cells[set_number].raw_units = self._set_raw_units()
+            cells[set_number] = self._compact_dtypes(cells[set_number])
             self.cells.append(cells[set_number])
         else:
             logging.warning("No new datasets added!")
@@ -1446,6 +1513,7 @@ class CellpyData:
         return_cls=True,
         accept_old=True,
         selector=None,
+        lazy=False,
     ):
         """Loads a cellpy file.
 
@@ -1455,20 +1523,37 @@ class CellpyData:
             return_cls (bool): Return the class.
             accept_old (bool): Accept loading old cellpy-file versions.
                 Instead of raising WrongFileVersion it only issues a warning.
-            selector (): under development
+            selector (dict): select parts of the data, pushed down to the
+                hdf5 (or parquet) query. Keys: max_cycle (int), min_cycle (int),
+                cycles (tuple (min_cycle, max_cycle) or list of cycle numbers)
+                and columns (list of raw data columns).
+            lazy (bool): read only the summary and the step table. The raw data
+                is left in the file and read when needed (only the cycles needed
+                are read by e.g. get_cap(cycle=...); accessing cell.raw reads all).
 
         Returns:
             cellpy.CellPyData class if return_cls is True
         """
 
         try:
-            logging.debug("loading cellpy-file (hdf5):")
-            logging.debug(cellpy_file)
-
-            with pickle_protocol(PICKLE_PROTOCOL):
-                new_datasets = self._load_hdf5(
-                    cellpy_file, parent_level, accept_old, selector=selector
-                )
+            if parquet_files.is_parquet_cellpy_file(cellpy_file):
+                logging.debug("loading cellpy-file (parquet):")
+                logging.debug(cellpy_file)
+                if lazy:
+                    logging.info("lazy loading is not supported for parquet-files")
+                new_datasets = self._load_parquet(cellpy_file, selector=selector)
+            else:
+                logging.debug("loading cellpy-file (hdf5):")
+                logging.debug(cellpy_file)
+
+                with pickle_protocol(PICKLE_PROTOCOL):
+                    new_datasets = self._load_hdf5(
+                        cellpy_file,
+                        parent_level,
+                        accept_old,
+                        selector=selector,
+                        lazy=lazy,
+                    )
             logging.debug("cellpy-file loaded")
 
         except AttributeError:
@@ -1480,7 +1565,7 @@ class CellpyData:
 
         if new_datasets:
             for dataset in new_datasets:
-                self.cells.append(dataset)
+                self.cells.append(self._compact_dtypes(dataset))
         else:
             # raise LoadError
             logging.warning("Could not load")
@@ -1523,7 +1608,7 @@ class CellpyData:
 
         if new_datasets:
             for dataset in new_datasets:
-                self.cells.append(dataset)
+                self.cells.append(self._compact_dtypes(dataset))
         else:
             # raise LoadError
             logging.warning("Could not load")
@@ -1560,7 +1645,9 @@ class CellpyData:
 
         return cellpy_file_version
 
-    def _load_hdf5(self, filename, parent_level=None, accept_old=False, selector=None):
+    def _load_hdf5(
+        self, filename, parent_level=None, accept_old=False, selector=None, lazy=False
+    ):
         """Load a cellpy-file.
 
         Args:
@@ -1568,7 +1655,9 @@ class CellpyData:
             parent_level (str) (optional): name of the parent level
                 (defaults to "CellpyData"). DeprecationWarning!
             accept_old (bool): accept old file versions.
-            selector (): select specific ranges (under development)
+            selector (dict): select specific ranges (see load).
+            lazy (bool): leave the raw data in the file (only for the current
+                file version).
 
         Returns:
             loaded datasets (DataSet-object)
@@ -1608,6 +1697,8 @@ class CellpyData:
                     f"Loading old file-type. It is recommended that you remake the step table and the "
                     f"summary table."
                 )
+                if lazy:
+                    logging.info("lazy loading is not supported for old file-types")
                 new_data = self._load_old_hdf5(filename, cellpy_file_version)
             else:
                 raise WrongFileVersion(
@@ -1617,14 +1708,16 @@ class CellpyData:
 
         else:
             logging.debug(f"Loading {filename} :: v{cellpy_file_version}")
-            new_data = self._load_hdf5_current_version(filename, selector=selector)
+            new_data = self._load_hdf5_current_version(
+                filename, selector=selector, lazy=lazy
+            )
 
         # self.__check_loaded_data(new_data)
 
         return new_data
 
     def _load_hdf5_current_version(
-        self, filename, meta_dir="/info", parent_level=None, selector=None
+        self, filename, meta_dir="/info", parent_level=None, selector=None, lazy=False
     ):
         if parent_level is None:
             parent_level = prms._cellpyfile_root
@@ -1636,6 +1729,7 @@ class CellpyData:
 
         logging.debug(f"filename: {filename}")
         logging.debug(f"selector: {selector}")
+        selector = self._unpack_selector(selector)
         with pd.HDFStore(filename) as store:
             data, meta_table = self._create_initial_data_set_from_cellpy_file(
                 meta_dir, parent_level, store
@@ -1646,16 +1740,33 @@ class CellpyData:
             self._extract_summary_from_cellpy_file(
                 data, parent_level, store, summary_dir, selector=selector
             )
-            self._extract_raw_from_cellpy_file(
-                data, parent_level, raw_dir, store, selector=selector
-            )
             self._extract_steps_from_cellpy_file(
                 data, parent_level, step_dir, store, selector=selector
             )
+            if lazy:
+                if selector is not None:
+                    raw_filter = self._hdf5_raw_selector_filter(
+                        data, parent_level + raw_dir, store, selector
+                    )
+                else:
+                    raw_filter = self._hdf5_cycle_filter(table="raw")
+            else:
+                self._extract_raw_from_cellpy_file(
+                    data, parent_level, raw_dir, store, selector=selector
+                )
             fid_table, fid_table_selected = self._extract_fids_from_cellpy_file(
                 fid_dir, parent_level, store
             )
 
+        if lazy:
+            logging.debug("lazy loading - leaving the raw data in the file")
+            data.raw_proxy = RawDataProxy(
+                filename,
+                parent_level + raw_dir,
+                steps=data.steps,
+                where=raw_filter,
+            )
+
         self._extract_meta_from_cellpy_file(data, meta_table, filename)
 
         if fid_table_selected:
@@ -1672,6 +1783,54 @@ class CellpyData:
         ]  # but cellpy is ready when that time comes (if it ever happens)
         return new_tests
 
+    def _load_parquet(self, filename, selector=None):
+        """Load a cellpy-file saved using the parquet backend.
+
+        Args:
+            filename (str): Name of the cellpy file (directory).
+            selector (dict): select specific ranges (see load).
+
+        Returns:
+            loaded datasets (DataSet-object)
+        """
+        if not os.path.isdir(filename):
+            logging.info(f"File does not exist: {filename}")
+            raise IOError(f"File does not exist: {filename}")
+
+        selector = self._unpack_selector(selector)
+        tables = parquet_files.read_cellpy_parquet(filename, selector=selector)
+
+        meta_table = tables["meta"]
+        meta_dict = meta_table.to_dict(orient="list")
+        cellpy_file_version = self._extract_from_meta_dictionary(
+            meta_dict, "cellpy_file_version", default_value=0
+        )
+        if cellpy_file_version > CELLPY_FILE_VERSION:
+            raise WrongFileVersion(
+                f"File format too new: {filename} :: version: {cellpy_file_version}"
+                f"Reload from raw or upgrade your cellpy!"
+            )
+        logging.debug(f"Loading {filename} :: v{cellpy_file_version}")
+
+        data = Cell()
+        data.cellpy_file_version = cellpy_file_version
+        self.limit_loaded_cycles = None if selector is None else selector["max_cycle"]
+        data.summary = tables["summary"]
+        data.steps = tables["steps"]
+        data.raw = tables["raw"]
+        self._extract_meta_from_cellpy_file(data, meta_table, filename)
+
+        fid_table = tables["fid"]
+        if not fid_table.empty:
+            (
+                data.raw_data_files,
+                data.raw_data_files_length,
+            ) = self._convert2fid_list(fid_table)
+        else:
+            data.raw_data_files = []
+            data.raw_data_files_length = []
+        return [data]
+
     def _load_hdf5_v6(self, filename, selector=None):
         parent_level = "CellpyData"
         raw_dir = "/raw"
@@ -1949,10 +2108,125 @@ class CellpyData:
                 return f"index <= {int(self.limit_data_points)}"
 
     def _unpack_selector(self, selector):
-        # not implemented yet
-        # should be used for trimming the selector so that it is not necessary to parse it individually
-        # for all the _extract_xxx_from_cellpy_file methods.
-        return selector
+        """Trim the selector so that it is not necessary to parse it individually
+        for all the _extract_xxx_from_cellpy_file methods.
+
+        The selector can contain the keys
+            max_cycle (int): only load up to (and including) this cycle.
+            min_cycle (int): only load from (and including) this cycle.
+            cycles (tuple, list or int): a tuple (min_cycle, max_cycle) selects
+                a range of cycles, a list (or int) selects the given cycles.
+            columns (list): only load these columns of the raw data (the
+                columns needed for identifying the cycles and steps are
+                always loaded).
+
+        Returns:
+            dict with the keys min_cycle, max_cycle, cycles and columns (or None).
+        """
+        if selector is None:
+            return None
+        unknown_keys = set(selector) - {"max_cycle", "min_cycle", "cycles", "columns"}
+        if unknown_keys:
+            logging.warning(f"unknown selector key(s) {unknown_keys} - skipping")
+
+        min_cycle = selector.get("min_cycle", None)
+        max_cycle = selector.get("max_cycle", None)
+        cycles = selector.get("cycles", None)
+        if isinstance(cycles, tuple):
+            if len(cycles) != 2:
+                raise ValueError(
+                    "selector cycles given as tuple must be (min_cycle, max_cycle)"
+                )
+            _min_cycle, _max_cycle = cycles
+            if _min_cycle is not None:
+                min_cycle = max(min_cycle or _min_cycle, _min_cycle)
+            if _max_cycle is not None:
+                max_cycle = min(max_cycle or _max_cycle, _max_cycle)
+            cycles = None
+        elif cycles is not None:
+            if isinstance(cycles, (int, np.integer)):
+                cycles = [cycles]
+            cycles = sorted({int(c) for c in cycles})
+
+        columns = selector.get("columns", None)
+        if columns is not None:
+            required_columns = [
+                self.headers_normal.data_point_txt,
+                self.headers_normal.cycle_index_txt,
+                self.headers_normal.step_index_txt,
+            ]
+            columns = required_columns + [
+                col for col in columns if col not in required_columns
+            ]
+
+        return dict(
+            min_cycle=min_cycle, max_cycle=max_cycle, cycles=cycles, columns=columns
+        )
+
+    def _hdf5_selector_filter(self, selector, column="index"):
+        # where-statements for selecting the cycles given in the (unpacked) selector
+        if selector is None:
+            return []
+        cycle_filter = []
+        if (min_cycle := selector["min_cycle"]) is not None:
+            cycle_filter.append(f"{column} >= {int(min_cycle)}")
+        if (max_cycle := selector["max_cycle"]) is not None:
+            cycle_filter.append(f"{column} <= {int(max_cycle)}")
+        if (cycles := selector["cycles"]) is not None:
+            if cycles:
+                ranges = merge_ranges(
+                    [(c, c) for c in cycles],
+                    max_number_of_ranges=RawDataProxy.max_number_of_ranges,
+                )
+                cycle_filter.append(hdf5_where_from_ranges(column, ranges))
+            else:
+                cycle_filter.append(f"{column} < 0")
+        return cycle_filter
+
+    def _hdf5_raw_selector_filter(self, data, key, store, selector):
+        # where-statements for selecting the raw data (cycles given in the selector)
+        cycle_header = self.headers_normal.cycle_index_txt
+        data_columns = getattr(store.get_storer(key), "data_columns", None) or []
+        if cycle_header in data_columns:
+            return self._hdf5_selector_filter(selector, column=cycle_header)
+
+        # older cellpy-files: using the data point ranges from the step table
+        if all(selector[k] is None for k in ["min_cycle", "max_cycle", "cycles"]):
+            return []
+        steps = data.steps
+        point_first = f"{self.headers_step_table.point}_first"
+        point_last = f"{self.headers_step_table.point}_last"
+        if steps is None or steps.empty or point_first not in steps.columns:
+            return []
+        ranges = steps.groupby(self.headers_step_table.cycle).agg(
+            first=(point_first, "min"), last=(point_last, "max")
+        )
+        ranges = merge_ranges(
+            zip(ranges["first"].values, ranges["last"].values),
+            max_number_of_ranges=RawDataProxy.max_number_of_ranges,
+        )
+        if not ranges:
+            return ["index < 0"]
+        return [hdf5_where_from_ranges("index", ranges)]
+
+    def _filter_cycles_using_selector(self, df, cycle_header, selector):
+        # the where-statements might select a bit too much (e.g. if many ranges)
+        if selector is None or df.empty:
+            return df
+        if cycle_header == "index":
+            cycles = df.index.to_series()
+        else:
+            cycles = df[cycle_header]
+        mask = np.ones(len(df), dtype=bool)
+        if selector["min_cycle"] is not None:
+            mask &= (cycles >= selector["min_cycle"]).values
+        if selector["max_cycle"] is not None:
+            mask &= (cycles <= selector["max_cycle"]).values
+        if selector["cycles"] is not None:
+            mask &= cycles.isin(selector["cycles"]).values
+        if mask.all():
+            return df
+        return df.loc[mask]
 
     def _extract_summary_from_cellpy_file(
         self,
@@ -1964,18 +2238,20 @@ class CellpyData:
         upgrade_from_to: tuple = None,
     ):
         if selector is not None:
-            cycle_filter = []
-            if max_cycle := selector.get("max_cycle", None):
-                # self.overwrite_able = False
-
-                cycle_filter.append(f"index <= {int(max_cycle)}")
-                self.limit_loaded_cycles = max_cycle
+            # self.overwrite_able = False
+            cycle_filter = self._hdf5_selector_filter(selector)
+            self.limit_loaded_cycles = selector["max_cycle"]
         else:
             # getting cycle filter by setting attributes:
             self.limit_loaded_cycles = None
             cycle_filter = self._hdf5_cycle_filter("summary")
 
-        data.summary = store.select(parent_level + summary_dir, where=cycle_filter)
+        data.summary = store.select(
+            parent_level + summary_dir, where=cycle_filter or None
+        )
+        data.summary = self._filter_cycles_using_selector(
+            data.summary, "index", selector
+        )
         if upgrade_from_to is not None:
             old, new = upgrade_from_to
             logging.debug(f"upgrading from {old} to {new}")
@@ -1989,6 +2265,10 @@ class CellpyData:
                 f"You are most likely trying to open a too old cellpy file"
             ) from e
 
+        if pd.isna(max_data_point):
+            logging.info("no cycles selected from the cellpy-file")
+            max_data_point = 0
+
         self.limit_data_points = int(max_data_point)
         logging.debug(f"data-point max limit: {self.limit_data_points}")
 
@@ -2001,11 +2281,20 @@ class CellpyData:
         selector: Union[None, str] = None,
         upgrade_from_to: tuple = None,
     ):
-        # selector is not implemented yet for only raw data
-        # however, selector for max_cycle will still work since
-        # the attribute self.limit_data_points is set while reading the summary
-        cycle_filter = self._hdf5_cycle_filter(table="raw")
-        data.raw = store.select(parent_level + raw_dir, where=cycle_filter)
+        # the steps must be extracted before the raw data when using a selector
+        # for cellpy-files without the cycle index as data column
+        key = parent_level + raw_dir
+        if selector is not None:
+            cycle_filter = self._hdf5_raw_selector_filter(data, key, store, selector)
+            data.raw = store.select(
+                key, where=cycle_filter or None, columns=selector["columns"]
+            )
+            data.raw = self._filter_cycles_using_selector(
+                data.raw, self.headers_normal.cycle_index_txt, selector
+            )
+        else:
+            cycle_filter = self._hdf5_cycle_filter(table="raw")
+            data.raw = store.select(key, where=cycle_filter)
         if upgrade_from_to is not None:
             old, new = upgrade_from_to
             logging.debug(f"upgrading from {old} to {new}")
@@ -2021,7 +2310,19 @@ class CellpyData:
         upgrade_from_to: tuple = None,
     ):
         try:
-            data.steps = store.select(parent_level + step_dir)
+            cycle_header = self.headers_step_table.cycle
+            key = parent_level + step_dir
+            cycle_filter = []
+            if selector is not None:
+                data_columns = getattr(store.get_storer(key), "data_columns", None)
+                if cycle_header in (data_columns or []):
+                    cycle_filter = self._hdf5_selector_filter(
+                        selector, column=cycle_header
+                    )
+            data.steps = store.select(key, where=cycle_filter or None)
+            data.steps = self._filter_cycles_using_selector(
+                data.steps, cycle_header, selector
+            )
             if self.limit_data_points:
                 data.steps = data.steps.loc[
                     data.steps["point_last"] <= self.limit_data_points
@@ -2289,6 +2590,131 @@ class CellpyData:
             self.number_of_datasets = 1
         return self
 
+    def _load_raw_files_in_parallel(self, file_names, max_workers=None, **kwargs):
+        # parses the raw-files in a process pool (the loader is created in each process)
+        instrument, instrument_kwargs = self._instrument_args
+        if instrument is None or self.loader != self.loader_class.loader:
+            # the loader must be possible to re-create from the instrument
+            raise UnderDefined(
+                "loading raw-files in parallel requires a loader set using "
+                "set_instrument"
+            )
+        if max_workers is None:
+            max_workers = min(len(file_names), os.cpu_count() or 1)
+        logging.debug(
+            f"loading {len(file_names)} raw files using {max_workers} processes"
+        )
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(
+                    _load_raw_file,
+                    self.instrument_factory,
+                    instrument,
+                    instrument_kwargs,
+                    file_name,
+                    **kwargs,
+                )
+                for file_name in file_names
+            ]
+            return [future.result() for future in futures]
+
+    def _merge_raw_cells(self, cells, recalc=True):
+        """Merge the cells loaded from several raw-files into one cell.
+
+        Gives the same result as merging the cells one by one using
+        _append, but the offsets (data point, cycle and test time) are
+        found for all the cells first and the raw data is concatenated once.
+
+        Args:
+            cells (list of Cell objects): the cells (one pr. raw-file).
+            recalc (bool): shift the cycle numbers, data points and test time
+                of each cell so that they continue from the previous cell.
+
+        Returns:
+            the merged Cell object (or None if no cells contain data).
+        """
+        # TODO: include this into prms (and config-file):
+        max_raw_files_to_merge = 20
+        data_point_header = self.headers_normal.data_point_txt
+        cycle_index_header = self.headers_normal.cycle_index_txt
+        test_time_header = self.headers_normal.test_time_txt
+
+        cell = None
+        frames = []
+        counter = 0
+        last_data_point = 0
+        last_cycle = 0
+        for new_cell in cells:
+            if cell is None:
+                logging.debug("getting data from first file")
+                if not new_cell.has_data:
+                    logging.debug("NO DATA")
+                    continue
+                cell = new_cell
+                frames.append(cell.raw)
+                if recalc:
+                    last_data_point = max(cell.raw[data_point_header])
+                    last_cycle = max(cell.raw[cycle_index_header])
+                continue
+
+            logging.debug("continuing reading files...")
+            if new_cell.raw.empty:
+                logging.debug("OBS! the second dataset was empty")
+            else:
+                raw = new_cell.raw
+                if recalc:
+                    diff_time = self._start_time_difference(cell, new_cell)
+                    raw[data_point_header] = raw[data_point_header] + last_data_point
+                    raw[cycle_index_header] = raw[cycle_index_header] + last_cycle
+                    raw[test_time_header] = raw[test_time_header] + diff_time
+                    new_cell.reset_segment_index()
+                    last_data_point = max(last_data_point, max(raw[data_point_header]))
+                    last_cycle = max(last_cycle, max(raw[cycle_index_header]))
+                frames.append(raw)
+            cell.merged = True
+
+            # retrieving file info in a for-loop in case of multiple files
+            # Remark!
+            #    - the raw_data_files attribute is a list
+            #    - the raw_data_files_length attribute is a list
+            # The reason for this choice is not clear anymore, but
+            # let us keep it like this for now
+            logging.debug("added the data set - merging file info")
+            for j, raw_data_file in enumerate(new_cell.raw_data_files):
+                file_size = new_cell.raw_data_files_length[j]
+                cell.raw_data_files.append(raw_data_file)
+                cell.raw_data_files_length.append(file_size)
+                counter += 1
+                if counter > max_raw_files_to_merge:
+                    logging.debug("ERROR? Too many files to merge")
+                    raise ValueError(
+                        "Too many files to merge - could be a p2-p3 zip thing"
+                    )
+
+        if len(frames) > 1:
+            logging.debug("performing concat")
+            cell.raw = pd.concat(frames, ignore_index=True)
+            cell.no_cycles = max(cell.raw[cycle_index_header])
+        return cell
+
+    def _start_time_difference(self, t1, t2):
+        # difference in start time between two cells (in seconds)
+        start_time_1 = t1.start_datetime
+        start_time_2 = t2.start_datetime
+
+        if self.tester in ["arbin_res"]:
+            diff_time = xldate_as_datetime(start_time_2) - xldate_as_datetime(
+                start_time_1
+            )
+        else:
+            diff_time = start_time_2 - start_time_1
+        diff_time = diff_time.total_seconds()
+
+        if diff_time < 0:
+            logging.warning("Wow! your new dataset is older than the old!")
+        logging.debug(f"diff time: {diff_time}")
+        return diff_time
+
     def _append(self, t1, t2, merge_summary=False, merge_step_table=False, recalc=True):
         logging.debug(
             f"merging two datasets\n(merge summary = {merge_summary})\n"
@@ -2309,20 +2735,7 @@ class CellpyData:
         cell = t1
         if recalc:
             # finding diff of time
-            start_time_1 = t1.start_datetime
-            start_time_2 = t2.start_datetime
-
-            if self.tester in ["arbin_res"]:
-                diff_time = xldate_as_datetime(start_time_2) - xldate_as_datetime(
-                    start_time_1
-                )
-            else:
-                diff_time = start_time_2 - start_time_1
-            diff_time = diff_time.total_seconds()
-
-            if diff_time < 0:
-                logging.warning("Wow! your new dataset is older than the old!")
-            logging.debug(f"diff time: {diff_time}")
+            diff_time = self._start_time_difference(t1, t2)
 
             sort_key = self.headers_normal.datetime_txt  # DateTime
             # mod data points for set 2
@@ -2346,6 +2759,7 @@ class CellpyData:
             # mod test time for set 2
             test_time_header = self.headers_normal.test_time_txt
             t2.raw[test_time_header] = t2.raw[test_time_header] + diff_time
+            t2.reset_segment_index()
         else:
             logging.debug("not doing recalc")
         # merging
@@ -2682,14 +3096,27 @@ class CellpyData:
         out = dict()
         # logging.debug(f"return a dict")
         # logging.debug(f"dt 4: {time.time() - t0}")
+
+        # collecting the steps for all (cycle, type) combinations in one pass
+        # through the step table (keeping the order of the step table):
+        selected = st.loc[
+            st[shdr.type].isin(steptypes), [shdr.cycle, shdr.type, shdr.step]
+        ]
+        steps_by_cycle_and_type = collections.defaultdict(list)
+        for cycle_no, step_type, step_no in zip(
+            selected[shdr.cycle].values,
+            selected[shdr.type].values,
+            selected[shdr.step].values,
+        ):
+            steps_by_cycle_and_type[(cycle_no, step_type)].append(step_no)
+
         for cycle in cycle_numbers:
             steplist = []
             for s in steptypes:
-                mask_type_and_cycle = (st[shdr.type] == s) & (st[shdr.cycle] == cycle)
-                if not any(mask_type_and_cycle):
+                step = steps_by_cycle_and_type.get((cycle, s))
+                if not step:
                     logging.debug(f"found nothing for cycle {cycle}")
                 else:
-                    step = st[mask_type_and_cycle][shdr.step].tolist()
                     for newstep in step[:trim_taper_steps]:
                         if newstep in steps_to_skip:
                             logging.debug(f"skipping step {newstep}")
@@ -2748,16 +3175,150 @@ class CellpyData:
         logging.debug("_sort_data: no datapoint header to sort by")
 
     def _ustep(self, n):
-        un = []
-        c = 0
-        n = n.diff()
-        for i in n:
-            if i != 0:
-                c += 1
-            un.append(c)
+        # a new u-step starts every time the step number changes
+        # (the first row always starts a new u-step since diff gives nan)
+        un = np.cumsum(n.diff().values != 0)
         logging.debug("created u-steps")
         return un
 
+    @staticmethod
+    def _step_table_agg_pandas(df, by):
+        def first(x):
+            return x.iloc[0]
+
+        def last(x):
+            return x.iloc[-1]
+
+        def delta(x):
+            if x.iloc[0] == 0.0:
+                # starts from a zero value
+                difference = 100.0 * x.iloc[-1]
+            else:
+                difference = (x.iloc[-1] - x.iloc[0]) * 100 / abs(x.iloc[0])
+
+            return difference
+
+        gf = df.groupby(by=by)
+        df_steps = gf.agg(
+            [np.mean, np.std, np.amin, np.amax, first, last, delta]
+        ).rename(columns={"amin": "min", "amax": "max", "mean": "avr"})
+
+        return df_steps.reset_index()
+
+    def _step_table_agg_numpy(self, df, by):
+        """Aggregate the raw data pr. step using segment-wise numpy reductions.
+
+        Gives the same table as `_step_table_agg_pandas`, but finds the step
+        boundaries from change points in the group-by columns instead of
+        calling python functions for each group.
+        """
+        value_cols = [col for col in df.columns if col not in by]
+        numeric = all(
+            pd.api.types.is_numeric_dtype(df[col])
+            and not pd.api.types.is_bool_dtype(df[col])
+            for col in df.columns
+        )
+        if df.empty or not numeric:
+            logging.debug("could not use the numpy engine - using pandas instead")
+            return self._step_table_agg_pandas(df, by)
+
+        # rows with missing keys are dropped (as groupby does)
+        valid = df[by].notna().all(axis=1).values
+        if not valid.all():
+            df = df.loc[valid]
+
+        keys = np.column_stack([df[col].values for col in by])
+        order = None
+        starts = self._segment_starts(keys)
+        if not self._segments_are_sorted(keys[starts]):
+            # the same step occurs in several blocks (or the data is not
+            # sorted) - use a stable sort so that first and last are kept
+            order = np.lexsort(keys.T[::-1])
+            keys = keys[order]
+            starts = self._segment_starts(keys)
+
+        n_rows = len(keys)
+        ends = np.append(starts[1:], n_rows)
+        counts = ends - starts
+        labels = np.repeat(np.arange(len(starts)), counts)
+
+        columns = {}
+        first_rows = starts if order is None else order[starts]
+        for col in by:
+            # going through pd.Index gives the same dtypes as groupby
+            columns[(col, "")] = pd.Index(df[col].values[first_rows])
+
+        for col in value_cols:
+            values = df[col].values
+            if order is not None:
+                values = values[order]
+
+            columns.update(
+                self._segment_statistics(col, values, starts, ends, counts, labels)
+            )
+
+        df_steps = pd.DataFrame(columns)
+        df_steps.columns = pd.MultiIndex.from_tuples(df_steps.columns)
+        return df_steps
+
+    @staticmethod
+    def _segment_starts(keys):
+        changed = (keys[1:] != keys[:-1]).any(axis=1)
+        return np.concatenate([[0], np.flatnonzero(changed) + 1])
+
+    @staticmethod
+    def _segments_are_sorted(segment_keys):
+        if len(segment_keys) < 2:
+            return True
+        difference = np.sign(np.diff(segment_keys, axis=0))
+        first_difference = np.argmax(difference != 0, axis=1)
+        return bool(
+            (difference[np.arange(len(difference)), first_difference] > 0).all()
+        )
+
+    @staticmethod
+    def _segment_statistics(col, values, starts, ends, counts, labels):
+        values_float = values.astype(np.float64, copy=False)
+        is_valid = ~np.isnan(values_float)
+        n_valid = np.add.reduceat(is_valid, starts)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            total = np.add.reduceat(np.where(is_valid, values_float, 0.0), starts)
+            avr = total / n_valid
+
+            deviation = np.where(is_valid, values_float - avr[labels], 0.0)
+            std = np.sqrt(
+                np.add.reduceat(deviation * deviation, starts) / (n_valid - 1)
+            )
+            std[n_valid < 2] = np.nan
+
+            if np.issubdtype(values.dtype, np.integer):
+                v_min = np.minimum.reduceat(values, starts)
+                v_max = np.maximum.reduceat(values, starts)
+            else:
+                v_min = np.fmin.reduceat(values, starts)
+                v_max = np.fmax.reduceat(values, starts)
+
+            v_first = values[starts]
+            v_last = values[ends - 1]
+            first_float = values_float[starts]
+            last_float = values_float[ends - 1]
+            delta = np.where(
+                first_float == 0.0,
+                100.0 * last_float,
+                (last_float - first_float) * 100 / np.abs(first_float),
+            )
+
+        return {
+            (col, "avr"): avr,
+            (col, "std"): std,
+            (col, "min"): v_min,
+            (col, "max"): v_max,
+            (col, "first"): v_first,
+            (col, "last"): v_last,
+            (col, "delta"): delta,
+        }
+
     def make_step_table(
         self,
         step_specifications=None,
@@ -2770,6 +3331,7 @@ class CellpyData:
         dataset_number=None,
         from_data_point=None,
         nom_cap_specifics=None,
+        engine=None,
     ):
 
         """Create a table (v.4) that contains summary information for each step.
@@ -2802,6 +3364,8 @@ class CellpyData:
             dataset_number: defaults to self.dataset_number.
             from_data_point (int): first data point to use.
             nom_cap_specifics (str): "gravimetric", "areal", or "absolute".
+            engine (str): "numpy" (segment-wise reductions) or "pandas"
+                (groupby-agg); defaults to prms.Reader.step_table_engine.
 
         Returns:
             None
@@ -2818,24 +3382,12 @@ class CellpyData:
         if nom_cap_specifics is None:
             nom_cap_specifics = prms.Materials.default_nom_cap_specifics
 
+        if engine is None:
+            engine = prms.Reader.step_table_engine
+
         if profiling:
             print("PROFILING MAKE_STEP_TABLE".center(80, "="))
 
-        def first(x):
-            return x.iloc[0]
-
-        def last(x):
-            return x.iloc[-1]
-
-        def delta(x):
-            if x.iloc[0] == 0.0:
-                # starts from a zero value
-                difference = 100.0 * x.iloc[-1]
-            else:
-                difference = (x.iloc[-1] - x.iloc[0]) * 100 / abs(x.iloc[0])
-
-            return difference
-
         nhdr = self.headers_normal
         shdr = self.headers_step_table
 
@@ -2903,15 +3455,15 @@ class CellpyData:
 
         # TODO: make sure that all columns are numeric
 
-        gf = df.groupby(by=by)
-        df_steps = gf.agg(
-            [np.mean, np.std, np.amin, np.amax, first, last, delta]
-        ).rename(columns={"amin": "min", "amax": "max", "mean": "avr"})
-
-        df_steps = df_steps.reset_index()
+        if engine == "numpy":
+            df_steps = self._step_table_agg_numpy(df, by)
+        elif engine == "pandas":
+            df_steps = self._step_table_agg_pandas(df, by)
+        else:
+            raise ValueError(f"unknown step table engine: {engine}")
 
         if profiling:
-            print(f"*** groupby-agg: {time.time() - time_01} s")
+            print(f"*** groupby-agg ({engine}): {time.time() - time_01} s")
             time_01 = time.time()
 
         # column with C-rates:
@@ -3122,7 +3674,11 @@ class CellpyData:
             # TODO: [#index]
             # if this throws a KeyError: 'test_time_first' it probably
             # means that the df contains a non-nummeric 'test_time' column.
-            df_steps = df_steps.sort_values(by=shdr.test_time + "_first").reset_index()
+            # the first data point is used for breaking ties (e.g. when the
+            # test time is stored with low precision)
+            df_steps = df_steps.sort_values(
+                by=[shdr.test_time + "_first", shdr.point + "_first"]
+            ).reset_index()
 
         if profiling:
             print(f"*** flattening: {time.time() - time_01} s")
@@ -3156,15 +3712,16 @@ class CellpyData:
         # no_cycles=np.amax(test.raw[c_txt])
         # print d.columns
 
-        if not any(test.raw.columns == c_txt):
+        raw, segment_index = test.raw_and_segment_index(cycle)
+        if not any(raw.columns == c_txt):
             logging.info("ERROR - cannot find %s" % c_txt)
             sys.exit(-1)
-        if not any(test.raw.columns == s_txt):
+        if not any(raw.columns == s_txt):
             logging.info("ERROR - cannot find %s" % s_txt)
             sys.exit(-1)
 
         # logging.debug(f"selecting cycle {cycle} step {step}")
-        v = test.raw[(test.raw[c_txt] == cycle) & (test.raw[s_txt] == step)]
+        v = segment_index.select(raw, cycle, step)
 
         if self.is_empty(v):
             logging.debug("empty dataframe")
@@ -3206,45 +3763,54 @@ class CellpyData:
             logging.debug(f"only processing up to cycle {last_cycle}")
             logging.debug(f"you have {len(list_of_cycles)}" f"cycles to process")
         out_data = []
-        c = None
         if not method:
             method = "back-and-forth"
         if shifted:
             method = "back-and-forth"
             shift = 0.0
-            _last = 0.0
         logging.debug(f"number of cycles: {len(list_of_cycles)}")
-        for cycle in list_of_cycles:
-            try:
-                if shifted and c is not None:
-                    shift = _last
-                    # print(f"shifted = {shift}, first={_first}")
-                df = self.get_cap(
-                    cycle, dataset_number=dataset_number, method=method, shift=shift
-                )
-                if df.empty:
-                    logging.debug("NoneType from get_cap")
-                else:
-                    c = df["capacity"]
-                    v = df["voltage"]
 
-                    _last = c.iat[-1]
-                    _first = c.iat[0]
+        # extracting all the cycles in one go:
+        #   shifted: each cycle starts where the previous ended
+        #   not shifted: each cycle starts at shift
+        if method == "forth-and-forth":
+            cap_shift = shift
+        else:
+            cap_shift = 0.0
+        try:
+            df = self.get_cap(
+                list_of_cycles,
+                dataset_number=dataset_number,
+                method=method,
+                shift=cap_shift,
+                inter_cycle_shift=shifted,
+                label_cycle_number=True,
+            )
+        except IndexError as e:
+            logging.info("Could not extract the cycles")
+            logging.debug(e)
+            df = pd.DataFrame()
 
-                    c = c.tolist()
-                    v = v.tolist()
-                    header_x = "cap cycle_no %i" % cycle
-                    header_y = "voltage cycle_no %i" % cycle
-                    c.insert(0, header_x)
-                    v.insert(0, header_y)
-                    out_data.append(c)
-                    out_data.append(v)
-                    # txt = "extracted cycle %i" % cycle
-                    # logging.debug(txt)
-            except IndexError as e:
-                txt = "Could not extract cycle %i" % cycle
-                logging.info(txt)
-                logging.debug(e)
+        if df.empty:
+            logging.debug("NoneType from get_cap")
+        else:
+            if cap_shift != shift:
+                df["capacity"] += shift
+            rows = df.groupby("cycle", sort=False).indices
+            capacity = df["capacity"].values
+            voltage = df["voltage"].values
+            for cycle in list_of_cycles:
+                if cycle not in rows:
+                    logging.debug(f"Could not extract cycle {cycle}")
+                    continue
+                c = capacity[rows[cycle]].tolist()
+                v = voltage[rows[cycle]].tolist()
+                header_x = "cap cycle_no %i" % cycle
+                header_y = "voltage cycle_no %i" % cycle
+                c.insert(0, header_x)
+                v.insert(0, header_y)
+                out_data.append(c)
+                out_data.append(v)
 
         # Saving cycles in one .csv file (x,y,x,y,x,y...)
         # print "saving the file with delimiter '%s' " % (sep)
@@ -3482,7 +4048,7 @@ class CellpyData:
         dataset_number=None,
         force=False,
         overwrite=None,
-        extension="h5",
+        extension=None,
         ensure_step_table=None,
     ):
         """Save the data structure to cellpy-format.
@@ -3495,7 +4061,10 @@ class CellpyData:
                 (not recommended)
             overwrite: (bool) save the new version of the file even if old one
                 exists.
-            extension: (str) filename extension.
+            extension: (str) filename extension (used if the filename does not
+                have one, defaults to h5 or the parquet extension (cpq) depending
+                on prms._cellpyfile_backend). The parquet backend is used for
+                files with the parquet extension.
             ensure_step_table: (bool) make step-table if missing.
 
         Returns: Nothing at all.
@@ -3533,14 +4102,22 @@ class CellpyData:
 
         outfile_all = Path(filename)
         if not outfile_all.suffix:
+            if extension is None:
+                if prms._cellpyfile_backend == "parquet":
+                    extension = prms._cellpyfile_parquet_extension
+                else:
+                    extension = "h5"
             outfile_all = outfile_all.with_suffix(f".{extension}")
 
-        if os.path.isfile(outfile_all):
+        if outfile_all.exists():
             logging.debug("Outfile exists")
             if overwrite:
                 logging.debug("overwrite = True")
                 try:
-                    os.remove(outfile_all)
+                    if outfile_all.is_dir():
+                        shutil.rmtree(outfile_all)
+                    else:
+                        os.remove(outfile_all)
                 except PermissionError as e:
                     logging.critical("Could not over write old file")
                     logging.info(e)
@@ -3560,6 +4137,10 @@ class CellpyData:
         logging.debug("trying to make infotable")
         infotbl, fidtbl = self._create_infotable(dataset_number=dataset_number)
 
+        if parquet_files.is_parquet_cellpy_file(outfile_all):
+            self._save_to_parquet(outfile_all, test, infotbl, fidtbl)
+            return
+
         root = prms._cellpyfile_root
 
         if CELLPY_FILE_VERSION > 4:
@@ -3594,11 +4175,24 @@ class CellpyData:
                 logging.debug(" - lets set Data_Point as index")
 
                 hdr_data_point = self.headers_normal.data_point_txt
+                hdr_cycle_normal = self.headers_normal.cycle_index_txt
+                hdr_cycle_steptable = self.headers_step_table.cycle
 
                 if test.raw.index.name != hdr_data_point:
                     test.raw = test.raw.set_index(hdr_data_point, drop=False)
 
-                store.put(root + raw_dir, test.raw, format=prms._cellpyfile_raw_format)
+                # the cycle index is stored as a data column so that it
+                # can be used in where-statements when loading
+                raw_data_columns = [
+                    col for col in [hdr_cycle_normal] if col in test.raw.columns
+                ]
+                store.put(
+                    root + raw_dir,
+                    test.raw,
+                    format=prms._cellpyfile_raw_format,
+                    data_columns=raw_data_columns,
+                    index=False,
+                )
                 logging.debug(" raw -> hdf5 OK")
 
                 logging.debug("trying to put summary")
@@ -3622,11 +4216,16 @@ class CellpyData:
                 logging.debug(" fid -> hdf5 OK")
 
                 logging.debug("trying to put step")
+                step_data_columns = [
+                    col for col in [hdr_cycle_steptable] if col in test.steps.columns
+                ]
                 try:
                     store.put(
                         root + step_dir,
                         test.steps,
                         format=prms._cellpyfile_stepdata_format,
+                        data_columns=step_data_columns,
+                        index=False,
                     )
                     logging.debug(" step -> hdf5 OK")
                 except TypeError:
@@ -3635,22 +4234,79 @@ class CellpyData:
                         root + step_dir,
                         test.steps,
                         format=prms._cellpyfile_stepdata_format,
+                        data_columns=step_data_columns,
+                        index=False,
                     )
                     logging.debug(" fixed step -> hdf5 OK")
 
-                # creating indexes
-                # hdr_data_point = self.headers_normal.data_point_txt
-                # hdr_cycle_steptable = self.headers_step_table.cycle
-                # hdr_cycle_normal = self.headers_normal.cycle_index_txt
-
-                # store.create_table_index(root + "/raw", columns=[hdr_data_point],
-                #                          optlevel=9, kind='full')
+                # creating indexes (used when selecting parts of the data)
+                logging.debug("trying to create indexes")
+                store.create_table_index(
+                    root + raw_dir,
+                    columns=["index", *raw_data_columns],
+                    optlevel=prms._cellpyfile_index_optlevel,
+                    kind=prms._cellpyfile_index_kind,
+                )
+                store.create_table_index(
+                    root + step_dir,
+                    columns=["index", *step_data_columns],
+                    optlevel=prms._cellpyfile_index_optlevel,
+                    kind=prms._cellpyfile_index_kind,
+                )
+                logging.debug(" indexes -> hdf5 OK")
         finally:
             store.close()
         logging.debug(" all -> hdf5 OK")
         warnings.simplefilter("default", PerformanceWarning)
         # del store
 
+    def _compact_dtypes(self, cell):
+        # opt-in: downcast the raw data columns to save memory
+        if not prms.Reader.compact_dtypes or cell.is_lazy or not cell.has_data:
+            return cell
+        tolerance = prms.Reader.compact_float_tolerance
+        logging.debug(f"compacting dtypes (float tolerance: {tolerance})")
+        memory_before = cell.raw.memory_usage(deep=True).sum()
+        compact_dtypes(cell.raw, float_tolerance=tolerance)
+        memory_after = cell.raw.memory_usage(deep=True).sum()
+        logging.debug(
+            f"raw memory usage: {humanize_bytes(memory_before)} -> "
+            f"{humanize_bytes(memory_after)}"
+        )
+        if prms.Reader.diagnostics:
+            logging.debug(memory_report(cell.raw, "raw"))
+        return cell
+
+    def memory_report(self):
+        """Create a report of the memory used by the raw data, steps and summary.
+
+        Returns:
+            str
+        """
+        cell = self.cell
+        txt = []
+        for name, df in zip(
+            ["raw", "steps", "summary"], [cell.raw, cell.steps, cell.summary]
+        ):
+            if df is not None:
+                txt.append(memory_report(df, name))
+        return "\n".join(txt)
+
+    def _save_to_parquet(self, outfile, test, infotbl, fidtbl):
+        logging.debug("trying to save to parquet")
+        hdr_data_point = self.headers_normal.data_point_txt
+        if test.raw.index.name != hdr_data_point:
+            test.raw = test.raw.set_index(hdr_data_point, drop=False)
+        parquet_files.write_cellpy_parquet(
+            outfile,
+            raw=test.raw,
+            steps=test.steps,
+            summary=test.summary,
+            meta=infotbl,
+            fid=fidtbl,
+        )
+        logging.debug(" all -> parquet OK")
+
     # --------------helper-functions--------------------------------------------
     def _fix_dtype_step_table(self, dataset):
         hst = get_headers_step_table()
@@ -3936,9 +4592,6 @@ class CellpyData:
             self._report_empty_dataset()
             return
 
-        cycle_index_header = self.headers_normal.cycle_index_txt
-        step_index_header = self.headers_normal.step_index_txt
-
         if usteps:
             print("Using sget for usteps is not supported yet.")
             print("I encourage you to work with the DataFrames directly instead.")
@@ -3951,15 +4604,15 @@ class CellpyData:
             )
             return
 
-        test = self.cells[dataset_number].raw
+        cell = self.cells[dataset_number]
 
         if not isinstance(step, (list, tuple)):
             step = [step]
 
-        return test.loc[
-            (test[cycle_index_header] == cycle) & (test[step_index_header].isin(step)),
-            header,
-        ].reset_index(drop=True)
+        raw, segment_index = cell.raw_and_segment_index(cycle, columns=[header])
+        return segment_index.select(raw, cycle, step, columns=header).reset_index(
+            drop=True
+        )
 
     def sget_timestamp(self, cycle, step, dataset_number=None):
         """Returns timestamp for cycle, step.
@@ -4157,6 +4810,10 @@ class CellpyData:
     ):
         """Gets the capacity for the run.
 
+        The curves for all the cycles are extracted, shifted and (unless
+        interpolated) combined in one go. Only the interpolation is done cycle
+        by cycle.
+
         Args:
             cycle (int): cycle number.
             method (string): how the curves are given
@@ -4235,194 +4892,367 @@ class CellpyData:
             else:
                 insert_nan = False
 
-        capacity = None
-        voltage = None
         specific_converter = self.get_converter_to_specific()
-        cycle_df = pd.DataFrame()
 
-        initial = True
-        for current_cycle in cycle:
-            error = False
-            try:
-                cc, cv = self.get_ccap(
-                    current_cycle,
-                    dataset_number,
-                    converter=specific_converter,
-                    **kwargs,
-                )
-                dc, dv = self.get_dcap(
-                    current_cycle,
-                    dataset_number,
-                    converter=specific_converter,
-                    **kwargs,
-                )
+        # extracting the charge and discharge curves for all the cycles in one go:
+        charge_curves = self.get_capacities(
+            cycle,
+            cap_type="charge",
+            dataset_number=dataset_number,
+            converter=specific_converter,
+            **kwargs,
+        )
+        discharge_curves = self.get_capacities(
+            cycle,
+            cap_type="discharge",
+            dataset_number=dataset_number,
+            converter=specific_converter,
+            **kwargs,
+        )
 
-            except NullData as e:
-                error = True
-                logging.debug(e)
+        cycles = []
+        for current_cycle in cycle:
+            if current_cycle in charge_curves and current_cycle in discharge_curves:
+                cycles.append(current_cycle)
+            else:
+                logging.debug(f"no steps found (c:{current_cycle})")
                 if not ignore_errors:
                     logging.debug("breaking out of loop")
                     break
-            if not error:
-                if cc.empty:
-                    logging.debug("get_ccap returns empty cc Series")
-
-                if dc.empty:
-                    logging.debug("get_ccap returns empty dc Series")
-
-                if initial:
-                    prev_end = shift
-                    initial = False
-                if self.cycle_mode == "anode":
-                    first_interpolation_direction = -1
-                    _first_step_c = dc
-                    _first_step_v = dv
-                    last_interpolation_direction = 1
-                    _last_step_c = cc
-                    _last_step_v = cv
-                else:
-                    first_interpolation_direction = 1
-                    _first_step_c = cc
-                    _first_step_v = cv
-                    last_interpolation_direction = -1
-                    _last_step_c = dc
-                    _last_step_v = dv
-
-                if method == "back-and-forth":
-                    # _last = np.amax(_first_step_c)
-                    _last = _first_step_c.iat[-1]
-                    # should change amax to last point
-                    _first = None
-                    _new_first = None
-                    if not inter_cycle_shift:
-                        prev_end = 0.0
-                    if _last_step_c is not None:
-                        _last_step_c = _last - _last_step_c + prev_end
-                    else:
-                        logging.debug("no last charge step found")
-                    if _first_step_c is not None:
-                        _first = _first_step_c.iat[0]
-                        _first_step_c += prev_end
-                        _new_first = _first_step_c.iat[0]
-                    else:
-                        logging.debug("probably empty (_first_step_c is None)")
-                    # logging.debug(f"current shifts used: prev_end = {prev_end}")
-                    # logging.debug(f"shifting start from {_first} to "
-                    #                   f"{_new_first}")
-
-                    # prev_end = np.amin(_last_step_c)
-                    prev_end = _last_step_c.iat[-1]
-                elif method == "forth":
-                    # _last = np.amax(_first_step_c)
-                    _last = _first_step_c.iat[-1]
-                    if _last_step_c is not None:
-                        _last_step_c += _last + prev_end
-                    else:
-                        logging.debug("no last charge step found")
-                    if _first_step_c is not None:
-                        _first_step_c += prev_end
-                    else:
-                        logging.debug("no first charge step found")
 
-                    # prev_end = np.amax(_last_step_c)
-                    if inter_cycle_shift:
-                        prev_end = _last_step_c.iat[-1]
-                    else:
-                        prev_end = 0.0
+        if not cycles:
+            if return_dataframe:
+                return pd.DataFrame()
+            return None, None
 
-                elif method == "forth-and-forth":
-                    if _last_step_c is not None:
-                        _last_step_c += shift
-                    else:
-                        logging.debug("no last charge step found")
-                    if _first_step_c is not None:
-                        _first_step_c += shift
-                    else:
-                        logging.debug("no first charge step found")
-
-                if return_dataframe:
-                    x_col = "voltage"
-                    y_col = "capacity"
-                    if interpolate_along_cap:
-                        x_col, y_col = y_col, x_col
-
-                    try:
-                        _first_df = pd.DataFrame(
-                            {
-                                "voltage": _first_step_v,
-                                "capacity": _first_step_c,
-                            }
-                        )
-                        if interpolated:
-
-                            _first_df = interpolate_y_on_x(
-                                _first_df,
-                                y=y_col,
-                                x=x_col,
-                                dx=dx,
-                                number_of_points=number_of_points,
-                                direction=first_interpolation_direction,
-                            )
-                        if insert_nan:
-                            _nan = pd.DataFrame(
-                                {"capacity": [np.nan], "voltage": [np.nan]}
-                            )
-                            _first_df = pd.concat([_first_df, _nan])
-                        if categorical_column:
-                            _first_df["direction"] = -1
-
-                        _last_df = pd.DataFrame(
-                            {
-                                "voltage": _last_step_v.values,
-                                "capacity": _last_step_c.values,
-                            }
-                        )
-                        if interpolated:
-                            _last_df = interpolate_y_on_x(
-                                _last_df,
-                                y=y_col,
-                                x=x_col,
-                                dx=dx,
-                                number_of_points=number_of_points,
-                                direction=last_interpolation_direction,
-                            )
-                        if insert_nan:
-                            _last_df = pd.concat([_last_df, _nan])
-                        if categorical_column:
-                            _last_df["direction"] = 1
-
-                        if interpolate_along_cap:
-                            if method == "forth":
-                                _first_df = _first_df.loc[::-1].reset_index(drop=True)
-                            elif method == "back-and-forth":
-                                _first_df = _first_df.loc[::-1].reset_index(drop=True)
-                                _last_df = _last_df.loc[::-1].reset_index(drop=True)
-
-                    except AttributeError:
-                        logging.info(f"Could not extract cycle {current_cycle}")
-                    else:
-                        c = pd.concat([_first_df, _last_df], axis=0)
-                        if label_cycle_number:
-                            c.insert(0, "cycle", current_cycle)
-                            # c["cycle"] = current_cycle
-                            # c = c[["cycle", "voltage", "capacity", "direction"]]
-                        if cycle_df.empty:
-                            cycle_df = c
-                        else:
-                            cycle_df = pd.concat([cycle_df, c], axis=0)
+        if self.cycle_mode == "anode":
+            first_curves, last_curves = discharge_curves, charge_curves
+            first_interpolation_direction, last_interpolation_direction = -1, 1
+        else:
+            first_curves, last_curves = charge_curves, discharge_curves
+            first_interpolation_direction, last_interpolation_direction = 1, -1
+
+        # all the cycles in one go (each cycle starts at first_starts / last_starts):
+        first_c = pd.concat([first_curves[c][0] for c in cycles])
+        first_v = pd.concat([first_curves[c][1] for c in cycles])
+        last_c = pd.concat([last_curves[c][0] for c in cycles])
+        last_v = pd.concat([last_curves[c][1] for c in cycles])
+        first_lengths = np.array([len(first_curves[c][0]) for c in cycles])
+        last_lengths = np.array([len(last_curves[c][0]) for c in cycles])
+
+        shifted_first_c, shifted_last_c = self._shift_capacity_curves(
+            first_c.values,
+            first_lengths,
+            last_c.values,
+            last_lengths,
+            method=method,
+            shift=shift,
+            inter_cycle_shift=inter_cycle_shift,
+        )
+        curves = {
+            "first_c": pd.Series(
+                shifted_first_c, index=first_c.index, name=first_c.name
+            ),
+            "first_v": first_v,
+            "last_c": pd.Series(shifted_last_c, index=last_c.index, name=last_c.name),
+            "last_v": last_v,
+        }
 
-                else:
-                    logging.warning("returning non-dataframe")
-                    c = pd.concat([_first_step_c, _last_step_c], axis=0)
-                    v = pd.concat([_first_step_v, _last_step_v], axis=0)
+        if not return_dataframe:
+            logging.warning("returning non-dataframe")
+            positions = _interleaved_positions(np.vstack([first_lengths, last_lengths]))
+            capacities = pd.concat([curves["first_c"], curves["last_c"]])
+            voltages = pd.concat([curves["first_v"], curves["last_v"]])
+            return capacities.iloc[positions], voltages.iloc[positions]
+
+        if not (interpolated or interpolate_along_cap):
+            return self._assemble_capacity_curves(
+                cycles,
+                curves,
+                first_lengths,
+                last_lengths,
+                insert_nan=insert_nan,
+                categorical_column=categorical_column,
+                label_cycle_number=label_cycle_number,
+            )
+
+        # interpolating cycle by cycle:
+        first_ends = np.cumsum(first_lengths)
+        last_ends = np.cumsum(last_lengths)
+        x_col = "voltage"
+        y_col = "capacity"
+        if interpolate_along_cap:
+            x_col, y_col = y_col, x_col
+        _nan = pd.DataFrame({"capacity": [np.nan], "voltage": [np.nan]})
+
+        cycle_dfs = []
+        for i, current_cycle in enumerate(cycles):
+            first = slice(first_ends[i] - first_lengths[i], first_ends[i])
+            last = slice(last_ends[i] - last_lengths[i], last_ends[i])
+            _first_df = pd.DataFrame(
+                {
+                    "voltage": curves["first_v"].iloc[first],
+                    "capacity": curves["first_c"].iloc[first],
+                }
+            )
+            if interpolated:
+                _first_df = interpolate_y_on_x(
+                    _first_df,
+                    y=y_col,
+                    x=x_col,
+                    dx=dx,
+                    number_of_points=number_of_points,
+                    direction=first_interpolation_direction,
+                )
+            if insert_nan:
+                _first_df = pd.concat([_first_df, _nan])
+            if categorical_column:
+                _first_df["direction"] = -1
+
+            _last_df = pd.DataFrame(
+                {
+                    "voltage": curves["last_v"].values[last],
+                    "capacity": curves["last_c"].values[last],
+                }
+            )
+            if interpolated:
+                _last_df = interpolate_y_on_x(
+                    _last_df,
+                    y=y_col,
+                    x=x_col,
+                    dx=dx,
+                    number_of_points=number_of_points,
+                    direction=last_interpolation_direction,
+                )
+            if insert_nan:
+                _last_df = pd.concat([_last_df, _nan])
+            if categorical_column:
+                _last_df["direction"] = 1
+
+            if interpolate_along_cap:
+                if method == "forth":
+                    _first_df = _first_df.loc[::-1].reset_index(drop=True)
+                elif method == "back-and-forth":
+                    _first_df = _first_df.loc[::-1].reset_index(drop=True)
+                    _last_df = _last_df.loc[::-1].reset_index(drop=True)
+
+            c = pd.concat([_first_df, _last_df], axis=0)
+            if label_cycle_number:
+                c.insert(0, "cycle", current_cycle)
+            cycle_dfs.append(c)
+
+        return pd.concat(cycle_dfs, axis=0)
+
+    @staticmethod
+    def _shift_capacity_curves(
+        first_c,
+        first_lengths,
+        last_c,
+        last_lengths,
+        method="back-and-forth",
+        shift=0.0,
+        inter_cycle_shift=True,
+    ):
+        """Shift the capacities of the first and last curves of the cycles (used by get_cap).
 
-                    capacity = pd.concat([capacity, c], axis=0)
-                    voltage = pd.concat([voltage, v], axis=0)
+        Args:
+            first_c (numpy array): capacities of the first curve (e.g. charge) of all
+                the cycles (one cycle after the other).
+            first_lengths (numpy array): number of points in the first curve of each cycle.
+            last_c (numpy array): capacities of the last curve of all the cycles.
+            last_lengths (numpy array): number of points in the last curve of each cycle.
+            method (str): "back-and-forth", "forth" or "forth-and-forth".
+            shift (float): start-value for the first curve.
+            inter_cycle_shift (bool): cumulative shifts between consecutive cycles.
+
+        Returns:
+            shifted first_c and last_c (numpy arrays).
+        """
+        first_ends = first_c[np.cumsum(first_lengths) - 1]
+        last_ends = last_c[np.cumsum(last_lengths) - 1]
+        number_of_cycles = len(first_lengths)
+
+        if method == "back-and-forth":
+            # the last curve goes back from where the first curve ends
+            if inter_cycle_shift:
+                prev_ends = np.cumsum(np.append(shift, first_ends - last_ends))[:-1]
+            else:
+                prev_ends = np.zeros(number_of_cycles)
+            first_c = first_c + np.repeat(prev_ends, first_lengths)
+            last_c = np.repeat(first_ends, last_lengths) - last_c
+            last_c += np.repeat(prev_ends, last_lengths)
+        elif method == "forth":
+            # the last curve continues from where the first curve ends
+            if inter_cycle_shift:
+                prev_ends = np.cumsum(np.append(shift, first_ends + last_ends))[:-1]
+            else:
+                prev_ends = np.zeros(number_of_cycles)
+                prev_ends[0] = shift
+            first_c = first_c + np.repeat(prev_ends, first_lengths)
+            last_c = last_c + np.repeat(first_ends + prev_ends, last_lengths)
+        else:
+            first_c = first_c + shift
+            last_c = last_c + shift
+        return first_c, last_c
+
+    @staticmethod
+    def _assemble_capacity_curves(
+        cycles,
+        curves,
+        first_lengths,
+        last_lengths,
+        insert_nan=False,
+        categorical_column=False,
+        label_cycle_number=False,
+    ):
+        # the (not interpolated) get_cap data frame for all the cycles in one go
+        number_of_cycles = len(cycles)
+        nan = np.full(number_of_cycles, np.nan)
+        ones = np.ones(number_of_cycles, dtype=int)
+        # the index of the last curves restarts at 0 for each cycle
+        last_starts = np.cumsum(last_lengths) - last_lengths
+        last_index = np.arange(last_lengths.sum()) - np.repeat(
+            last_starts, last_lengths
+        )
+        # blocks of rows (first curve, nan, last curve, nan) to take from for each cycle:
+        blocks = [
+            (
+                first_lengths,
+                curves["first_v"].values,
+                curves["first_c"].values,
+                curves["first_v"].index.values,
+                -1,
+            ),
+            (
+                last_lengths,
+                curves["last_v"].values,
+                curves["last_c"].values,
+                last_index,
+                1,
+            ),
+        ]
+        if insert_nan:
+            blocks.insert(1, (ones, nan, nan, np.zeros(number_of_cycles, int), -1))
+            blocks.append((ones, nan, nan, np.zeros(number_of_cycles, int), 1))
+
+        lengths = np.vstack([block[0] for block in blocks])
+        positions = _interleaved_positions(lengths)
+        index = np.concatenate([block[3] for block in blocks])[positions]
+        df = pd.DataFrame(
+            {
+                "voltage": np.concatenate([block[1] for block in blocks])[positions],
+                "capacity": np.concatenate([block[2] for block in blocks])[positions],
+            },
+            index=index,
+        )
+        if categorical_column:
+            df["direction"] = np.concatenate(
+                [np.full(block[0].sum(), block[4]) for block in blocks]
+            )[positions]
+        if label_cycle_number:
+            df.insert(0, "cycle", np.repeat(np.asarray(cycles), lengths.sum(axis=0)))
+        return df
+
+    def get_capacities(
+        self,
+        cycles,
+        cap_type="charge",
+        dataset_number=None,
+        converter=None,
+        mode="gravimetric",
+        trim_taper_steps=None,
+        steps_to_skip=None,
+        steptable=None,
+        usteps=False,
+    ):
+        """Returns capacity and voltage for several cycles (extracted in one pass).
+
+        Args:
+            cycles (list of ints): the cycle numbers.
+            cap_type (str): "charge" or "discharge".
+            dataset_number (int): test number (default first)
+                (usually not used).
+            converter (float): multiplication factor for the capacity
+                (calculated from mode if not given).
+            mode (str): "gravimetric", "areal" or "absolute".
+            trim_taper_steps (integer): number of taper steps to skip (counted
+                from the end, i.e. 1 means skip last step in each cycle).
+            steps_to_skip (list): step numbers that should not be included.
+            steptable (pandas.DataFrame): optional steptable.
+            usteps (bool): not implemented (must be False).
+
+        Returns:
+            dict with cycle numbers as keys and (capacity, voltage) tuples
+            (pandas.Series) as values (cycles without any steps of the
+            selected type are not included). The values are the same as you
+            would get from get_ccap (or get_dcap) for the same cycle.
+        """
 
-        if return_dataframe:
-            return cycle_df
+        if usteps:
+            raise NotImplementedError("ustep == True not allowed!")
+        dataset_number = self._validate_dataset_number(dataset_number)
+        if dataset_number is None:
+            self._report_empty_dataset()
+            return
+        if converter is None:
+            converter = self.get_converter_to_specific(mode=mode)
+
+        if cap_type == "charge_capacity":
+            cap_type = "charge"
+        elif cap_type == "discharge_capacity":
+            cap_type = "discharge"
+
+        if cap_type == "charge":
+            column_txt = self.headers_normal.charge_capacity_txt
         else:
-            return capacity, voltage
+            column_txt = self.headers_normal.discharge_capacity_txt
+        voltage_txt = self.headers_normal.voltage_txt
+
+        cycles = list(cycles)
+        steps = self.get_step_numbers(
+            steptype=cap_type,
+            allctypes=False,
+            cycle_number=cycles,
+            dataset_number=dataset_number,
+            trim_taper_steps=trim_taper_steps,
+            steps_to_skip=steps_to_skip,
+            steptable=steptable,
+        )
+
+        cell = self.cells[dataset_number]
+        raw, segment_index = cell.raw_and_segment_index(
+            cycles, columns=[voltage_txt, column_txt]
+        )
+        found_cycles = []
+        positions = []
+        for cycle in dict.fromkeys(cycles):
+            cycle_steps = steps[cycle]
+            if len(set(cycle_steps)) < len(cycle_steps):
+                raise ValueError(f"You have duplicate step numbers!")
+            cycle_positions = [
+                segment_index.positions(segment_index.segments(cycle, step))
+                for step in sorted(cycle_steps)
+            ]
+            cycle_positions = np.concatenate(cycle_positions)
+            if len(cycle_positions):
+                found_cycles.append(cycle)
+                positions.append(cycle_positions)
+
+        if not found_cycles:
+            return dict()
+
+        # picking out all the rows at once and splitting them into cycles:
+        boundaries = np.cumsum([0] + [len(p) for p in positions])
+        selected = raw.iloc[
+            np.concatenate(positions),
+            raw.columns.get_indexer([voltage_txt, column_txt]),
+        ]
+        voltage = selected[voltage_txt]
+        capacity = selected[column_txt] * converter
+        return {
+            cycle: (capacity.iloc[start:end], voltage.iloc[start:end])
+            for cycle, start, end in zip(found_cycles, boundaries[:-1], boundaries[1:])
+        }
 
     def _get_cap(
         self,
@@ -4542,7 +5372,6 @@ class CellpyData:
             ocv_rlx_id += "_down"
 
         steps = self.cell.steps
-        raw = self.cell.raw
 
         ocv_steps = steps.loc[steps["cycle"].isin(cycles), :]
 
@@ -4558,13 +5387,15 @@ class CellpyData:
         cycle_label = self.headers_normal.cycle_index_txt
         step_label = self.headers_normal.step_index_txt
 
-        selected_df = raw.loc[
-            (
-                raw[cycle_label].isin(ocv_steps.cycle)
-                & raw[step_label].isin(ocv_steps.step)
-            ),
-            [cycle_label, step_label, step_time_label, voltage_label],
-        ]
+        raw, segment_index = self.cell.raw_and_segment_index(
+            ocv_steps.cycle.unique(),
+            columns=[step_time_label, voltage_label],
+        )
+        selected_df = segment_index.select_pairs(
+            raw,
+            list(zip(ocv_steps.cycle, ocv_steps.step)),
+            columns=[cycle_label, step_label, step_time_label, voltage_label],
+        )
 
         if interpolated:
             if dx is None and number_of_points is None:
@@ -4650,9 +5481,14 @@ class CellpyData:
             if dataset_number is None:
                 self._report_empty_dataset()
                 return
-            d = self.cells[dataset_number].raw
-            cycles = d[self.headers_normal.cycle_index_txt].dropna().unique()
-            steptable = self.cells[dataset_number].steps
+            cell = self.cells[dataset_number]
+            if cell.is_lazy and cell.has_steps:
+                # avoid reading the raw data from the cellpy-file
+                cycles = cell.steps[self.headers_step_table.cycle].dropna().unique()
+            else:
+                d = cell.raw
+                cycles = d[self.headers_normal.cycle_index_txt].dropna().unique()
+            steptable = cell.steps
         else:
             logging.debug("steptable is given as input parameter")
             cycles = steptable[self.headers_step_table.cycle].dropna().unique()
@@ -5124,23 +5960,27 @@ class CellpyData:
         y_new = f(points)
         return y_new
 
-    def _select_last(self, raw):
+    def _select_last(self, raw, first_cycle=1):
         # this function gives a set of indexes pointing to the last
         # datapoints for each cycle in the dataset
 
         c_txt = self.headers_normal.cycle_index_txt
         d_txt = self.headers_normal.data_point_txt
-        steps = []
-        unique_steps = raw[c_txt].unique()
-        max_step = max(raw[c_txt])
-        for j in range(int(max_step)):
-            if j + 1 not in unique_steps:
-                logging.debug(f"Warning: Cycle {j + 1} is missing!")
-            else:
-                last_item = max(raw.loc[raw[c_txt] == j + 1, d_txt])
-                steps.append(last_item)
+        cycles = raw[c_txt]
+        expected_cycles = np.arange(max(int(first_cycle), 1), int(cycles.max()) + 1)
+
+        # only cycle numbers first_cycle, ..., max cycle are considered
+        valid = cycles.isin(expected_cycles)
+        last_points = raw.loc[valid, d_txt].groupby(cycles[valid]).max()
+
+        missing_cycles = np.setdiff1d(expected_cycles, last_points.index)
+        if len(missing_cycles):
+            logging.debug(
+                f"Warning: {len(missing_cycles)} cycle(s) missing: "
+                f"{missing_cycles.tolist()}"
+            )
 
-        last_items = raw[d_txt].isin(steps)
+        last_items = raw[d_txt].isin(last_points.values)
         return last_items
 
     # TODO: find out what this is for and probably delete it
@@ -5200,11 +6040,9 @@ class CellpyData:
         """Convenience function that makes a summary of the cycling data."""
 
         # TODO: @jepe - include option for omitting steps
-        # TODO: @jepe  - make it is possible to update only new data by implementing
-        #  from_cycle (only calculate summary from a given cycle number).
-        #  Probably best to keep the old summary and make
-        #  a new one for the rest, then use pandas.concat to merge them.
-        #  Might have to create the cummulative cols etc after merging?
+        # from_cycle: only extract the summary rows from the raw data from the
+        #  given cycle number (the rows for the earlier cycles are taken from the
+        #  existing summary, and the cumulated columns etc. are re-calculated).
 
         # first - check if we need some "instrument-specific" prms
         dataset_number = self._validate_dataset_number(dataset_number)
@@ -5249,6 +6087,7 @@ class CellpyData:
                     normalization_cycles=normalization_cycles,
                     nom_cap=nom_cap,
                     nom_cap_specifics="gravimetric",
+                    from_cycle=from_cycle,
                 )
         else:
             logging.debug("creating summary for only one test")
@@ -5267,6 +6106,7 @@ class CellpyData:
                 normalization_cycles=normalization_cycles,
                 nom_cap=nom_cap,
                 nom_cap_specifics="gravimetric",
+                from_cycle=from_cycle,
             )
         return self
 
@@ -5288,6 +6128,7 @@ class CellpyData:
         nom_cap=None,
         nom_cap_specifics="gravimetric",
         add_daniel_columns=False,  # deprecated
+        from_cycle=None,
         # capacity_modifier = None,
         # test=None
     ):
@@ -5376,9 +6217,30 @@ class CellpyData:
                     cell.nom_cap = nom_cap
                 self.make_step_table(dataset_number=dataset_number)
 
+        columns_to_keep = [
+            self.headers_normal.charge_capacity_txt,
+            self.headers_normal.cycle_index_txt,
+            self.headers_normal.data_point_txt,
+            self.headers_normal.datetime_txt,
+            self.headers_normal.discharge_capacity_txt,
+            self.headers_normal.test_time_txt,
+        ]
+
         summary_df = cell.summary
+        old_summary = None
         if not self.load_only_summary:
             raw = cell.raw
+            if from_cycle is not None and select_columns:
+                old_summary = self._summary_rows_before_cycle(
+                    summary_df,
+                    from_cycle,
+                    [col for col in columns_to_keep if col in raw.columns],
+                )
+            if old_summary is not None:
+                logging.debug(f"updating summary from cycle {from_cycle}")
+                raw = raw.loc[raw[self.headers_normal.cycle_index_txt] >= from_cycle]
+            else:
+                from_cycle = 1
             if use_cellpy_stat_file:
                 try:
                     summary_requirement = raw[self.headers_normal.data_point_txt].isin(
@@ -5386,9 +6248,9 @@ class CellpyData:
                     )
                 except KeyError:
                     logging.info("Error in stat_file (?) - using _select_last")
-                    summary_requirement = self._select_last(raw)
+                    summary_requirement = self._select_last(raw, from_cycle)
             else:
-                summary_requirement = self._select_last(raw)
+                summary_requirement = self._select_last(raw, from_cycle)
             summary = raw[summary_requirement].copy()
         else:
             summary = summary_df
@@ -5404,18 +6266,15 @@ class CellpyData:
 
         if select_columns:
             logging.debug("keeping only selected set of columns")
-            columns_to_keep = [
-                self.headers_normal.charge_capacity_txt,
-                self.headers_normal.cycle_index_txt,
-                self.headers_normal.data_point_txt,
-                self.headers_normal.datetime_txt,
-                self.headers_normal.discharge_capacity_txt,
-                self.headers_normal.test_time_txt,
-            ]
             for cn in column_names:
                 if not columns_to_keep.count(cn):
                     summary.pop(cn)
 
+        if old_summary is not None:
+            summary = pd.concat(
+                [old_summary[summary.columns], summary], ignore_index=True
+            )
+
         cell.summary = summary
 
         if self.cycle_mode == "anode":
@@ -5482,6 +6341,19 @@ class CellpyData:
 
         logging.debug(f"(dt: {(time.time() - time_00):4.2f}s)")
 
+    def _summary_rows_before_cycle(self, summary, from_cycle, required_columns):
+        # the rows in an existing summary that can be re-used when updating
+        # the summary (None if it is not a complete summary made by cellpy)
+        cycle_index_header = self.headers_summary.cycle_index
+        if summary.empty:
+            return None
+        if summary.index.name == cycle_index_header:
+            summary = summary.reset_index()
+        if not all(col in summary.columns for col in required_columns):
+            logging.info("The summary is not complete - making a new one")
+            return None
+        return summary.loc[summary[cycle_index_header] < from_cycle]
+
     def _generate_absolute_summary_columns(
         self, cell, _first_step_txt, _second_step_txt
     ) -> Cell:
@@ -5675,7 +6547,7 @@ class CellpyData:
         # Found a file where it writes IR for cycle n on cycle n+1
         # This only picks out the data on the last IR step before
         summary = cell.summary
-        raw = cell.raw
+        ir_txt = self.headers_normal.internal_resistance_txt
 
         logging.debug("finding ir")
         only_zeros = summary[self.headers_normal.discharge_capacity_txt] * 0.0
@@ -5695,35 +6567,14 @@ class CellpyData:
         else:
             charge_steps = cell.charge_steps
             logging.debug("  already have charge_steps")
-        ir_indexes = []
-        ir_values = []
-        ir_values2 = []
-        for i in summary.index:
-            # selecting the appropriate cycle
-            cycle = summary.iloc[i][self.headers_normal.cycle_index_txt]
-            step = discharge_steps[cycle]
-            if step[0]:
-                ir = raw.loc[
-                    (raw[self.headers_normal.cycle_index_txt] == cycle)
-                    & (cell.raw[self.headers_normal.step_index_txt] == step[0]),
-                    self.headers_normal.internal_resistance_txt,
-                ]
-                # This will not work if there are more than one item in step
-                ir = ir.values[0]
-            else:
-                ir = 0
-            step2 = charge_steps[cycle]
-            if step2[0]:
-
-                ir2 = raw[
-                    (raw[self.headers_normal.cycle_index_txt] == cycle)
-                    & (cell.raw[self.headers_normal.step_index_txt] == step2[0])
-                ][self.headers_normal.internal_resistance_txt].values[0]
-            else:
-                ir2 = 0
-            ir_indexes.append(i)
-            ir_values.append(ir)
-            ir_values2.append(ir2)
+        cycles = summary[self.headers_normal.cycle_index_txt].values
+        # This will not work if there are more than one item in step
+        ir_values = self._first_or_last_step_values(
+            cell, ir_txt, cycles, [discharge_steps[c][0] for c in cycles]
+        )
+        ir_values2 = self._first_or_last_step_values(
+            cell, ir_txt, cycles, [charge_steps[c][0] for c in cycles]
+        )
         ir_frame = only_zeros + ir_values
         ir_frame2 = only_zeros + ir_values2
         summary.insert(0, column=self.headers_summary.ir_discharge, value=ir_frame)
@@ -5731,12 +6582,24 @@ class CellpyData:
         cell.summary = summary
         return cell
 
+    @staticmethod
+    def _first_or_last_step_values(cell, column, cycles, steps, last=False):
+        # picks the first (or last) value of the column within each of the
+        # (cycle, step) pairs using one look-up in the segment index
+        # (step number 0 means that no step was found, giving value 0)
+        first_rows, last_rows = cell.segment_index.boundaries(cycles, steps)
+        rows = last_rows if last else first_rows
+        found = (np.asarray(steps) != 0) & (rows >= 0)
+        values = np.zeros(len(rows))
+        values[found] = cell.raw[column].values[rows[found]]
+        return values
+
     def _end_voltage_to_summary(self, cell):
         # needs to be fixed so that end-voltage also can be extracted
         # from the summary
         ev_t0 = time.time()
-        raw = cell.raw
         summary = cell.summary
+        voltage_txt = self.headers_normal.voltage_txt
 
         logging.debug("finding end-voltage")
         logging.debug(f"dt: {time.time() - ev_t0}")
@@ -5758,38 +6621,22 @@ class CellpyData:
         else:
             charge_steps = cell.charge_steps
             logging.debug("  already have charge_steps")
-        endv_indexes = []
-        endv_values_dc = []
-        endv_values_c = []
-        logging.debug("starting iterating through the index")
-        for i in summary.index:
-            cycle = summary.iloc[i][self.headers_normal.cycle_index_txt]
-            step = discharge_steps[cycle]
-
-            # finding end voltage for discharge
-            if step[-1]:  # selecting last
-                end_voltage_dc = raw[
-                    (raw[self.headers_normal.cycle_index_txt] == cycle)
-                    & (cell.raw[self.headers_normal.step_index_txt] == step[-1])
-                ][self.headers_normal.voltage_txt]
-                # This will not work if there are more than one item in step
-                end_voltage_dc = end_voltage_dc.values[-1]  # selecting
-            else:
-                end_voltage_dc = 0  # could also use numpy.nan
-
-            # finding end voltage for charge
-            step2 = charge_steps[cycle]
-            if step2[-1]:
-                end_voltage_c = raw[
-                    (raw[self.headers_normal.cycle_index_txt] == cycle)
-                    & (cell.raw[self.headers_normal.step_index_txt] == step2[-1])
-                ][self.headers_normal.voltage_txt]
-                end_voltage_c = end_voltage_c.values[-1]
-            else:
-                end_voltage_c = 0
-            endv_indexes.append(i)
-            endv_values_dc.append(end_voltage_dc)
-            endv_values_c.append(end_voltage_c)
+        cycles = summary[self.headers_normal.cycle_index_txt].values
+        # selecting the last point of the last step of each type
+        endv_values_dc = self._first_or_last_step_values(
+            cell,
+            voltage_txt,
+            cycles,
+            [discharge_steps[c][-1] for c in cycles],
+            last=True,
+        )
+        endv_values_c = self._first_or_last_step_values(
+            cell,
+            voltage_txt,
+            cycles,
+            [charge_steps[c][-1] for c in cycles],
+            last=True,
+        )
 
         ir_frame_dc = only_zeros_discharge + endv_values_dc
         ir_frame_c = only_zeros_charge + endv_values_c
@@ -5835,6 +6682,44 @@ class CellpyData:
         return nc
 
 
+def _interleaved_positions(lengths):
+    """Positions for taking the rows cycle by cycle from blocks of concatenated cycles.
+
+    Args:
+        lengths (2D numpy array): number of rows for each block (rows) and
+            cycle (columns).
+
+    Returns:
+        numpy array with the positions (in the blocks concatenated one after the
+        other) in the order block 1 of cycle 1, block 2 of cycle 1, ...,
+        block 1 of cycle 2, etc.
+    """
+    block_starts = np.cumsum(lengths.sum(axis=1)) - lengths.sum(axis=1)
+    starts = block_starts[:, np.newaxis] + np.cumsum(lengths, axis=1) - lengths
+    starts = starts.T.ravel()
+    sizes = lengths.T.ravel()
+    return np.repeat(starts - (np.cumsum(sizes) - sizes), sizes) + np.arange(
+        sizes.sum()
+    )
+
+
+def _load_raw_file(
+    instrument_factory, instrument, instrument_kwargs, file_name, **kwargs
+):
+    """Load a raw-file using a new loader (used when loading in sub-processes)."""
+    loader_class = instrument_factory.create(instrument, **instrument_kwargs)
+    loader_info = _loader_info(loader_class, instrument, instrument_kwargs)
+    return raw_cache.load(
+        loader_class.loader, file_name, loader_info=loader_info, **kwargs
+    )
+
+
+def _loader_info(loader_class, instrument, instrument_kwargs):
+    # describes the loader (used in the key for the raw cache)
+    config_params = getattr(loader_class, "config_params", None)
+    return instrument, instrument_kwargs, config_params
+
+
 def get(
     filename=None,
     mass=None,
@@ -5904,12 +6789,20 @@ def get(
             if not isinstance(filename, (list, tuple)):
                 filename = Path(filename)
 
-                if not filename.is_file():
+                if not (
+                    filename.is_file() or parquet_files.is_parquet_cellpy_file(filename)
+                ):
                     print(f"Could not find {filename}")
                     print("Returning None")
                     return
 
-                if filename.suffix in [".h5", ".hdf5", ".cellpy", ".cpy"]:
+                if filename.suffix in [
+                    ".h5",
+                    ".hdf5",
+                    ".cellpy",
+                    ".cpy",
+                    f".{prms._cellpyfile_parquet_extension}",
+                ]:
                     logging.info(f"Loading cellpy-file: {filename}")
                     if kwargs.pop("post_processor_hook", None) is not None:
                         logging.warning(
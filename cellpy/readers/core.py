@@ -1,15 +1,18 @@
-""" This module contains several of the most important classes used in cellpy.
+"""This module contains several of the most important classes used in cellpy.
 
 It also contains functions that are used by readers and utils. And it has the file-
 version definitions.
 """
+
 import datetime
+import functools
 import importlib
 import logging
 import os
 import pathlib
 import pickle
 import sys
+import threading
 import time
 from typing import Any, Tuple, Dict
 
@@ -18,7 +21,6 @@ import pandas as pd
 import pint
 from scipy import interpolate
 
-from cellpy.exceptions import NullData
 from cellpy.parameters import prms
 from cellpy.parameters.internal_settings import (
     get_headers_normal,
@@ -80,6 +82,8 @@ class FileID:
         last_accessed (datetime): last time of access of the raw-data file.
         last_info_changed (datetime): st_ctime of the raw-data file.
         location (str): Location of the raw-data file.
+        read_context (dict): set by loaders that can continue reading the raw-data
+            file from where they stopped (byte offset, formatters, ...).
 
     """
 
@@ -96,6 +100,7 @@ class FileID:
                 self.last_info_changed = fid_st.st_ctime
                 self.location = os.path.dirname(filename)
                 self.last_data_point = 0  # used later when updating is implemented
+                self.read_context = None
                 make_defaults = False
 
         if make_defaults:
@@ -107,6 +112,7 @@ class FileID:
             self.last_info_changed = None
             self.location = None
             self._last_data_point = 0  # to be used later when updating is implemented
+            self.read_context = None
 
     def __str__(self):
         txt = "\n<fileID>\n"
@@ -173,6 +179,285 @@ class FileID:
         return self.last_modified
 
 
+def _same_array(a, b):
+    """Check if two (numpy) arrays are the same data in memory."""
+    if not isinstance(a, np.ndarray) or not isinstance(b, np.ndarray):
+        return False
+    return (
+        a.__array_interface__["data"] == b.__array_interface__["data"]
+        and a.shape == b.shape
+        and a.strides == b.strides
+        and a.dtype == b.dtype
+    )
+
+
+class SegmentIndex:
+    """Look-up table for the raw data rows belonging to each cycle and step.
+
+    The raw data is split into segments of consecutive rows sharing the same
+    cycle and step number. Selecting the rows for a (cycle, step) is then
+    done by slicing instead of scanning the full table. A (cycle, step)
+    can consist of several segments (e.g. if the raw data is not sorted).
+
+    Args:
+        raw (pandas.DataFrame): the raw data.
+        cycle_col (str): header for the cycle column (defaults to the
+            cellpy cycle_index_txt header).
+        step_col (str): header for the step column (defaults to the
+            cellpy step_index_txt header).
+    """
+
+    def __init__(self, raw, cycle_col=None, step_col=None):
+        cycle_col = cycle_col or HEADERS_NORMAL.cycle_index_txt
+        step_col = step_col or HEADERS_NORMAL.step_index_txt
+
+        self.number_of_rows = len(raw)
+        self.cycle_col = cycle_col
+        self.step_col = step_col
+        cycles = raw[cycle_col].values
+        steps = raw[step_col].values
+        # keeping references to the arrays (so that their memory is not reused)
+        self._columns = (cycles, steps)
+
+        if self.number_of_rows:
+            changed = (cycles[1:] != cycles[:-1]) | (steps[1:] != steps[:-1])
+            self.starts = np.concatenate([[0], np.flatnonzero(changed) + 1])
+        else:
+            self.starts = np.empty(0, dtype=np.int64)
+        self.ends = np.append(self.starts[1:], self.number_of_rows).astype(np.int64)
+        self.cycles = cycles[self.starts]
+        self.steps = steps[self.starts]
+
+        segments = pd.DataFrame({"cycle": self.cycles, "step": self.steps})
+        self._step_lookup = segments.groupby(["cycle", "step"]).indices
+        self._cycle_lookup = segments.groupby("cycle").indices
+        self._step_boundaries = None
+        logging.debug(f"created segment index ({len(self.starts)} segments)")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def is_valid_for(self, raw):
+        """Check (cheaply) that the index still matches the raw data.
+
+        The cycle and step columns must be the same arrays as the index was made
+        from (replacing a column, e.g. ``raw[cycle_col] += 1``, invalidates it).
+        Element-wise in-place writes (e.g. using ``raw.loc``) are not detected.
+        """
+        if len(raw) != self.number_of_rows:
+            return False
+        try:
+            columns = (raw[self.cycle_col].values, raw[self.step_col].values)
+        except KeyError:
+            return False
+        return all(_same_array(new, old) for new, old in zip(columns, self._columns))
+
+    def segments(self, cycle, step=None):
+        """Segment numbers (sorted) for the cycle and step(s).
+
+        Args:
+            cycle: cycle number.
+            step: step number or list of step numbers (all steps if None).
+
+        Returns:
+            numpy array of segment numbers.
+        """
+        if step is None:
+            found = [self._cycle_lookup.get(cycle, [])]
+        else:
+            if not isinstance(step, (list, tuple, np.ndarray, pd.Series)):
+                step = [step]
+            found = [self._step_lookup.get((cycle, s), []) for s in step]
+        return self._join_segments(found)
+
+    def segments_for_pairs(self, pairs):
+        """Segment numbers (sorted) for a list of (cycle, step) pairs."""
+        return self._join_segments([self._step_lookup.get(p, []) for p in pairs])
+
+    @staticmethod
+    def _join_segments(found):
+        found = [np.asarray(f, dtype=np.int64) for f in found if len(f)]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        if len(found) == 1:
+            return found[0]
+        return np.unique(np.concatenate(found))
+
+    def boundaries(self, cycles, steps):
+        """First and last row positions for each (cycle, step) pair.
+
+        Args:
+            cycles: sequence of cycle numbers.
+            steps: sequence of step numbers (same length as cycles).
+
+        Returns:
+            tuple of two numpy arrays (first and last row positions), with
+            -1 for the pairs that are not found in the raw data.
+        """
+        if self._step_boundaries is None:
+            segments = pd.DataFrame(
+                {
+                    "cycle": self.cycles,
+                    "step": self.steps,
+                    "first": self.starts,
+                    "last": self.ends - 1,
+                }
+            )
+            self._step_boundaries = segments.groupby(["cycle", "step"]).agg(
+                {"first": "min", "last": "max"}
+            )
+        wanted = pd.MultiIndex.from_arrays([np.asarray(cycles), np.asarray(steps)])
+        found = self._step_boundaries.reindex(wanted).fillna(-1)
+        return (
+            found["first"].values.astype(np.int64),
+            found["last"].values.astype(np.int64),
+        )
+
+    def positions(self, segments):
+        """Row positions (for use with iloc) for the given segments."""
+        if len(segments) == 0:
+            return np.empty(0, dtype=np.int64)
+        if len(segments) == 1:
+            return np.arange(self.starts[segments[0]], self.ends[segments[0]])
+        return np.concatenate(
+            [np.arange(self.starts[s], self.ends[s]) for s in segments]
+        )
+
+    def _rows(self, segments):
+        # a single segment can be selected as a slice (no copying of index)
+        if len(segments) == 1:
+            return slice(self.starts[segments[0]], self.ends[segments[0]])
+        return self.positions(segments)
+
+    def select(self, raw, cycle, step=None, columns=None):
+        """Select the rows in raw for the cycle and step(s).
+
+        Args:
+            raw (pandas.DataFrame): the raw data the index was created from.
+            cycle: cycle number.
+            step: step number or list of step numbers (all steps if None).
+            columns: column header or list of column headers (all if None).
+
+        Returns:
+            pandas.DataFrame (or pandas.Series if columns is a single header).
+        """
+        return self._select(raw, self.segments(cycle, step), columns)
+
+    def select_pairs(self, raw, pairs, columns=None):
+        """Select the rows in raw for a list of (cycle, step) pairs."""
+        return self._select(raw, self.segments_for_pairs(pairs), columns)
+
+    def _select(self, raw, segments, columns):
+        rows = self._rows(segments)
+        if columns is None:
+            return raw.iloc[rows]
+        if isinstance(columns, str):
+            return raw[columns].iloc[rows]
+        return raw.iloc[rows, raw.columns.get_indexer(columns)]
+
+
+class RawDataProxy:
+    """Raw data that is kept in the cellpy-file and read on demand.
+
+    Used when loading cellpy-files lazily. Only the requested cycles are
+    read from the file (using HDFStore.select with a where-statement). If the
+    cycle index is stored as a data column (cellpy-files saved with indexes),
+    the cycles are selected directly. Else the step table is used for finding
+    the range of data points for each cycle.
+
+    Args:
+        filename (str): the cellpy-file.
+        key (str): the key for the raw data table in the cellpy-file.
+        steps (pandas.DataFrame): the step table (used for finding the data
+            point ranges for each cycle).
+        where (str or list of str): additional where-statement(s) (e.g. limiting
+            the data points).
+    """
+
+    max_number_of_ranges = 20  # read one (larger) range if needing more ranges
+
+    def __init__(self, filename, key, steps=None, where=None):
+        self.filename = filename
+        self.key = key
+        if where is None:
+            where = []
+        elif isinstance(where, str):
+            where = [where]
+        self.where = list(where)
+        with pd.HDFStore(filename, mode="r") as store:
+            storer = store.get_storer(key)
+            self.number_of_rows = storer.nrows
+            data_columns = getattr(storer, "data_columns", None) or []
+        self.cycle_is_data_column = HEADERS_NORMAL.cycle_index_txt in data_columns
+        self._cycle_ranges = None
+        if steps is not None and not steps.empty:
+            shdr = HEADERS_STEP_TABLE
+            try:
+                self._cycle_ranges = steps.groupby(shdr.cycle).agg(
+                    first=(f"{shdr.point}_first", "min"),
+                    last=(f"{shdr.point}_last", "max"),
+                )
+            except KeyError:
+                logging.debug("could not find data point ranges in the step table")
+
+    def __len__(self):
+        return self.number_of_rows
+
+    def __repr__(self):
+        return f"RawDataProxy({self.filename}, {self.key})"
+
+    def load(self, columns=None):
+        """Read all the raw data (optionally only the given columns)."""
+        logging.debug(f"reading raw data from {self.filename}")
+        with pd.HDFStore(self.filename, mode="r") as store:
+            return store.select(self.key, where=self.where or None, columns=columns)
+
+    def select(self, cycles, columns=None):
+        """Read the raw data for the given cycles.
+
+        Args:
+            cycles (int or list of ints): cycle number(s).
+            columns (list of str): the columns to read (all if None).
+
+        Returns:
+            pandas.DataFrame
+        """
+        cycle_col = HEADERS_NORMAL.cycle_index_txt
+        if not isinstance(cycles, (list, tuple, np.ndarray, pd.Series)):
+            cycles = [cycles]
+        if columns is not None and cycle_col not in columns:
+            columns = [cycle_col, *columns]
+
+        where = self.where.copy()
+        if self.cycle_is_data_column:
+            ranges = merge_ranges(
+                [(c, c) for c in cycles], max_number_of_ranges=self.max_number_of_ranges
+            )
+            column = cycle_col
+        else:
+            ranges = self._data_point_ranges(cycles)
+            column = "index"
+        if ranges is not None:
+            if len(ranges) == 0:
+                with pd.HDFStore(self.filename, mode="r") as store:
+                    return store.select(self.key, columns=columns, start=0, stop=0)
+            where.append(hdf5_where_from_ranges(column, ranges))
+        logging.debug(f"selecting raw data where {where}")
+        with pd.HDFStore(self.filename, mode="r") as store:
+            raw = store.select(self.key, where=where or None, columns=columns)
+        return raw.loc[raw[cycle_col].isin(cycles)]
+
+    def _data_point_ranges(self, cycles):
+        # ranges of data points (first, last) covering the cycles (None if unknown)
+        if self._cycle_ranges is None:
+            return None
+        found = self._cycle_ranges.loc[self._cycle_ranges.index.isin(cycles)]
+        return merge_ranges(
+            zip(found["first"].values, found["last"].values),
+            max_number_of_ranges=self.max_number_of_ranges,
+        )
+
+
 class Cell:
     """Object to store data for a test.
 
@@ -194,18 +479,17 @@ class Cell:
         txt += "<p>"
         for p in dir(self):
             if not p.startswith("_"):
-                if p not in ["raw", "summary", "steps", "logger"]:
+                if p not in [
+                    "raw",
+                    "summary",
+                    "steps",
+                    "logger",
+                    "segment_index",
+                    "raw_proxy",
+                ]:
                     value = self.__getattribute__(p)
                     txt += f"<b>{p}</b>: {value}<br>"
         txt += "</p>"
-        try:
-            raw_txt = f"<p><b>raw data-frame (summary)</b><br>{self.raw.describe()._repr_html_()}</p>"
-            raw_txt += f"<p><b>raw data-frame (head)</b><br>{self.raw.head()._repr_html_()}</p>"
-        except AttributeError:
-            raw_txt = "<p><b>raw data-frame </b><br> not found!</p>"
-        except ValueError:
-            raw_txt = "<p><b>raw data-frame </b><br> does not contain any columns!</p>"
-
         try:
             summary_txt = f"<p><b>summary data-frame (summary)</b><br>{self.summary.describe()._repr_html_()}</p>"
             summary_txt += f"<p><b>summary data-frame (head)</b><br>{self.summary.head()._repr_html_()}</p>"
@@ -226,6 +510,21 @@ class Cell:
                 "<p><b>steps data-frame </b><br> does not contain any columns!</p>"
             )
 
+        if self.is_lazy:
+            raw_txt = (
+                "<p><b>raw data-frame </b><br> not read from the cellpy-file yet</p>"
+            )
+        else:
+            try:
+                raw_txt = f"<p><b>raw data-frame (summary)</b><br>{self.raw.describe()._repr_html_()}</p>"
+                raw_txt += f"<p><b>raw data-frame (head)</b><br>{self.raw.head()._repr_html_()}</p>"
+            except AttributeError:
+                raw_txt = "<p><b>raw data-frame </b><br> not found!</p>"
+            except ValueError:
+                raw_txt = (
+                    "<p><b>raw data-frame </b><br> does not contain any columns!</p>"
+                )
+
         return txt + summary_txt + steps_txt + raw_txt
 
     def __init__(self, **kwargs):
@@ -299,6 +598,8 @@ class Cell:
         self.raw_units = get_default_raw_units()
         self.raw_limits = get_default_raw_limits()
 
+        self._segment_index = None
+        self._raw_proxy = None
         self.raw = pd.DataFrame()
         self.summary = pd.DataFrame()
         self.steps = pd.DataFrame()
@@ -396,6 +697,75 @@ class Cell:
 
         return True
 
+    @property
+    def raw(self):
+        if self._raw_proxy is not None:
+            logging.info("reading all the raw data from the cellpy-file")
+            self.raw = self._raw_proxy.load()
+        return self._raw
+
+    @raw.setter
+    def raw(self, value):
+        self._raw = value
+        self._raw_proxy = None
+        self._segment_index = None
+
+    @property
+    def raw_proxy(self):
+        """RawDataProxy for raw data not read from the cellpy-file yet (or None)."""
+        return self._raw_proxy
+
+    @raw_proxy.setter
+    def raw_proxy(self, proxy):
+        self._raw = pd.DataFrame()
+        self._segment_index = None
+        self._raw_proxy = proxy
+
+    @property
+    def is_lazy(self):
+        """True if the raw data is not read from the cellpy-file yet."""
+        return self._raw_proxy is not None
+
+    def raw_and_segment_index(self, cycles=None, columns=None):
+        """Get the raw data needed for the given cycles and its segment index.
+
+        If the raw data is not read from the cellpy-file yet (lazy loading),
+        only the given cycles (and columns) are read. Otherwise, the full
+        raw data is returned.
+
+        Args:
+            cycles (int or list of ints): cycle number(s) (all if None).
+            columns (list of str): columns needed (in addition to the cycle
+                and step columns).
+
+        Returns:
+            tuple of raw data (pandas.DataFrame) and SegmentIndex.
+        """
+        if self._raw_proxy is None or cycles is None:
+            return self.raw, self.segment_index
+        if columns is not None:
+            columns = [
+                HEADERS_NORMAL.cycle_index_txt,
+                HEADERS_NORMAL.step_index_txt,
+                *columns,
+            ]
+            columns = list(dict.fromkeys(columns))
+        raw = self._raw_proxy.select(cycles, columns=columns)
+        return raw, SegmentIndex(raw)
+
+    @property
+    def segment_index(self):
+        """Look-up table from (cycle, step) to rows in raw (created on first access)."""
+        if self._segment_index is None or not self._segment_index.is_valid_for(
+            self._raw
+        ):
+            self._segment_index = SegmentIndex(self._raw)
+        return self._segment_index
+
+    def reset_segment_index(self):
+        """Discard the segment index (needed after element-wise in-place edits of raw)."""
+        self._segment_index = None
+
     @property
     def nom_cap(self):
         return self._nom_cap
@@ -424,6 +794,8 @@ class Cell:
 
     @property
     def has_data(self):
+        if self._raw_proxy is not None:
+            return len(self._raw_proxy) > 0
         try:
             empty = self.raw.empty
         except AttributeError:
@@ -431,11 +803,67 @@ class Cell:
         return not empty
 
 
+def _loader_module_settings() -> str:
+    """The prms that the loader modules copy when they are imported."""
+    return repr(
+        (
+            prms.Instruments,
+            prms.Reader.diagnostics,
+            prms._odbc,
+            prms._search_for_odbc_driver,
+            prms._allow_multi_test_file,
+            prms._sub_process_path,
+        )
+    )
+
+
 class InstrumentFactory:
+    # loader modules are imported only once and shared by all the factories in the
+    # process. They are re-imported if the prms they copy when imported (see
+    # _loader_module_settings) have changed (set prms._reload_instrument_modules
+    # to True or use clear_cache to always re-import them, e.g. when developing a
+    # loader):
+    _loader_modules = {}
+    _lock = threading.RLock()
+
     def __init__(self):
         self._builders = {}
         self._kwargs = {}
 
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Forget the imported loader modules, instruments and configurations."""
+        from cellpy.readers.instruments.configurations import (
+            clear_configuration_cache,
+        )
+
+        with cls._lock:
+            cls._loader_modules.clear()
+        _find_all_instruments.cache_clear()
+        clear_configuration_cache()
+
+    @classmethod
+    def _import_loader_module(cls, module_name: str, module_path):
+        """Import the loader module (or get it from the registry if already imported)."""
+        key = (module_name, str(module_path))
+        settings = _loader_module_settings()
+        with cls._lock:
+            if prms._reload_instrument_modules:
+                cls.clear_cache()
+            imported_settings, loader_module = cls._loader_modules.get(
+                key, (None, None)
+            )
+            if imported_settings != settings:
+                loader_module = None
+            if loader_module is None:
+                logging.debug(f"Importing loader module {module_name} ({module_path})")
+                spec = importlib.util.spec_from_file_location(module_name, module_path)
+                loader_module = importlib.util.module_from_spec(spec)
+                sys.modules[module_name] = loader_module
+                spec.loader.exec_module(loader_module)
+                cls._loader_modules[key] = (settings, loader_module)
+            return loader_module
+
     def register_builder(self, key: str, builder: Tuple[str, Any], **kwargs) -> None:
         """register an instrument loader module.
 
@@ -469,10 +897,7 @@ class InstrumentFactory:
         if not module_name:
             raise ValueError(key)
 
-        spec = importlib.util.spec_from_file_location(module_name, module_path)
-        loader_module = importlib.util.module_from_spec(spec)
-        sys.modules[module_name] = loader_module
-        spec.loader.exec_module(loader_module)
+        loader_module = self._import_loader_module(module_name, module_path)
         cls = getattr(loader_module, instrument_class)
 
         # TODO: get stored kwargs from self.__kwargs and merge them with the supplied kwargs
@@ -516,8 +941,19 @@ def generate_default_factory():
 
 
 def find_all_instruments() -> Dict[str, Tuple[str, str]]:
-    """finds all the supported instruments"""
+    """finds all the supported instruments
+
+    The instruments folder is only searched the first time (see
+    InstrumentFactory.clear_cache).
+    """
+
+    if prms._reload_instrument_modules:
+        _find_all_instruments.cache_clear()
+    return dict(_find_all_instruments())
 
+
+@functools.lru_cache(maxsize=None)
+def _find_all_instruments() -> Dict[str, Tuple[str, str]]:
     import cellpy.readers.instruments as hard_coded_instruments_site
 
     instruments_found = {}
@@ -580,6 +1016,36 @@ def identify_last_data_point(data):
     return data
 
 
+def merge_ranges(ranges, max_number_of_ranges=None):
+    """Merge overlapping and adjacent (first, last) ranges of integers.
+
+    Args:
+        ranges (iterable of tuples): the (first, last) ranges (inclusive).
+        max_number_of_ranges (int): return one range spanning all the ranges
+            if more ranges than this are needed.
+
+    Returns:
+        sorted list of [first, last] ranges.
+    """
+    merged = []
+    for first, last in sorted((int(f), int(l)) for f, l in ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    if max_number_of_ranges is not None and len(merged) > max_number_of_ranges:
+        merged = [[merged[0][0], max(r[1] for r in merged)]]
+    return merged
+
+
+def hdf5_where_from_ranges(column, ranges):
+    """Create a where-statement (for HDFStore.select) selecting the ranges."""
+    return " | ".join(
+        f"({column} >= {int(first)} & {column} <= {int(last)})"
+        for first, last in ranges
+    )
+
+
 def check64bit(current_system="python"):
     """checks if you are on a 64 bit platform"""
     if current_system == "python":
@@ -627,6 +1093,81 @@ def humanize_bytes(b, precision=1):
     return "%.*f %s" % (precision, b // factor, suffix)
 
 
+def memory_report(df, name="data"):
+    """Create a report of the memory used by the columns in a data frame.
+
+    Args:
+        df (pandas.DataFrame): the data frame (e.g. cell.raw).
+        name (str): name of the data frame (used in the header).
+
+    Returns:
+        str
+    """
+    mem_usage = df.memory_usage(deep=True)
+    dtypes = df.dtypes
+    txt = f"memory usage for {name}:"
+    for col, b in mem_usage.items():
+        dtype = df.index.dtype if col == "Index" else dtypes[col]
+        txt += f"\n  {col:<30} {str(dtype):<16} {humanize_bytes(b)}"
+    txt += f"\ntotal: {humanize_bytes(mem_usage.sum())}"
+    return txt
+
+
+def compact_dtypes(df, int_columns=None, float_tolerance=None):
+    """Downcast the columns of a data frame to save memory.
+
+    The integer columns are converted to the smallest integer type that can
+    hold twice their current max value (leaving room for merging files).
+    Float columns are only converted (to float32) if a float_tolerance is given
+    and the values deviate less than the tolerance (relative) from the
+    original values. The data frame is modified in place.
+
+    Args:
+        df (pandas.DataFrame): the data frame (e.g. cell.raw).
+        int_columns (list of str): the integer columns to downcast (defaults to
+            data point, cycle index and step index).
+        float_tolerance (float): max relative deviation allowed when converting
+            float64 columns to float32 (no conversion if None).
+
+    Returns:
+        the data frame.
+    """
+    if int_columns is None:
+        int_columns = [
+            HEADERS_NORMAL.data_point_txt,
+            HEADERS_NORMAL.cycle_index_txt,
+            HEADERS_NORMAL.step_index_txt,
+        ]
+
+    for col in int_columns:
+        if col not in df.columns or df[col].empty:
+            continue
+        values = df[col].to_numpy()
+        if values.dtype.kind == "f":
+            if np.isnan(values).any() or not np.all(np.mod(values, 1) == 0):
+                continue
+        elif values.dtype.kind not in "iu":
+            continue
+        largest = 2 * max(abs(int(values.min())), abs(int(values.max())))
+        for dtype in [np.int16, np.int32, np.int64]:
+            if largest <= np.iinfo(dtype).max:
+                break
+        if values.dtype != dtype:
+            df[col] = values.astype(dtype)
+
+    if float_tolerance is not None:
+        for col in df.select_dtypes(include="float64").columns:
+            values = df[col].to_numpy()
+            compact_values = values.astype(np.float32)
+            if np.allclose(
+                compact_values, values, rtol=float_tolerance, atol=0, equal_nan=True
+            ):
+                df[col] = compact_values
+            else:
+                logging.debug(f"{col}: keeping float64 (outside tolerance)")
+    return df
+
+
 def xldate_as_datetime(xldate, datemode=0, option="to_datetime"):
     """Converts a xls date stamp to a more sensible format.
 
@@ -711,31 +1252,29 @@ def collect_capacity_curves(
     if max_cycle_number is None:
         max_cycle_number = max(cycles)
 
+    selected_cycles = []
     for cycle in cycles:
         if cycle > max_cycle_number:
             break
-        try:
-            if direction == "charge":
-                q, v = data.get_ccap(
-                    cycle,
-                    trim_taper_steps=trim_taper_steps,
-                    steps_to_skip=steps_to_skip,
-                    steptable=steptable,
-                )
-            else:
-                q, v = data.get_dcap(
-                    cycle,
-                    trim_taper_steps=trim_taper_steps,
-                    steps_to_skip=steps_to_skip,
-                    steptable=steptable,
-                )
+        selected_cycles.append(cycle)
+
+    # extracting the curves for all the cycles in one pass:
+    curves = data.get_capacities(
+        selected_cycles,
+        cap_type="charge" if direction == "charge" else "discharge",
+        trim_taper_steps=trim_taper_steps,
+        steps_to_skip=steps_to_skip,
+        steptable=steptable,
+    )
 
-        except NullData as e:
-            logging.warning(e)
+    for cycle in selected_cycles:
+        if cycle not in curves:
+            logging.warning(f"no steps found (c:{cycle} type:{direction})")
             d = pd.DataFrame()
             d.name = cycle
             charge_list.append(d)
         else:
+            q, v = curves[cycle]
             d = pd.DataFrame({"q": q, "v": v})
             # d.name = f"{cycle}"
             d.name = cycle
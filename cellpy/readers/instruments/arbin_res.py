@@ -3,6 +3,7 @@ import logging
 import os
 import platform
 import shutil
+import subprocess
 import sys
 import tempfile
 import time
@@ -18,10 +19,12 @@ from cellpy.readers.core import (
     Cell,
     FileID,
     check64bit,
+    compact_dtypes,
     humanize_bytes,
     xldate_as_datetime,
 )
 from cellpy.readers.instruments.base import MINIMUM_SELECTION, BaseLoader
+from cellpy.readers.instruments.processors import pre_processors
 
 # TODO: use InstrumentSettings (dataclass) from internal_settings instead of HeaderDict.
 
@@ -121,6 +124,10 @@ TABLE_NAMES = {
     "aux": "Auxiliary_Table",
 }
 
+# Number of rows read at a time when streaming the normal table from mdb-export
+# (used if prms.Instruments.Arbin.chunk_size is not set)
+MDB_EXPORT_CHUNK_SIZE = 100_000
+
 summary_headers_renaming_dict = {
     "test_id_txt": "Test_ID",
     "data_point_txt": "Data_Point",
@@ -963,7 +970,6 @@ class DataLoader(BaseLoader):
 
         table_name_global = TABLE_NAMES["global"]
         table_name_stats = TABLE_NAMES["statistic"]
-        table_name_normal = TABLE_NAMES["normal"]
         table_name_aux_global = TABLE_NAMES["aux_global"]
         table_name_aux = TABLE_NAMES["aux"]
 
@@ -980,24 +986,8 @@ class DataLoader(BaseLoader):
         if DEBUG_MODE:
             time_0 = time.time()
 
-        (
-            tmp_name_global,
-            tmp_name_raw,
-            tmp_name_stats,
-            tmp_name_aux_global,
-            tmp_name_aux,
-        ) = self._create_tmp_files(
-            table_name_global,
-            table_name_normal,
-            table_name_stats,
-            table_name_aux_global,
-            table_name_aux,
-            temp_dir,
-            temp_filename,
-        )
-
-        # use pandas to load in the data
-        global_data_df = pd.read_csv(tmp_name_global)
+        # use pandas to load in the data (streamed from mdb-export)
+        global_data_df = self._read_mdb_table(temp_filename, table_name_global)
         tests = global_data_df[self.arbin_headers_normal.test_id_txt]
         number_of_sets = len(tests)
         self.logger.debug("number of datasets: %i" % number_of_sets)
@@ -1018,23 +1008,14 @@ class DataLoader(BaseLoader):
 
             self.logger.debug("reading raw-data")
 
-            (
-                length_of_test,
-                normal_df,
-                summary_df,
-                aux_global_data_df,
-                aux_df,
-            ) = self._load_from_tmp_files(
-                data,
-                tmp_name_global,
-                tmp_name_raw,
-                tmp_name_stats,
-                tmp_name_aux_global,
-                tmp_name_aux,
-                temp_filename,
-                bad_steps,
-                data_points,
+            length_of_test, normal_df = self._load_posix_res_normal_table(
+                temp_filename, data.test_ID, bad_steps, data_points
             )
+            summary_df = self._read_mdb_table(temp_filename, table_name_stats)
+            aux_global_data_df = self._read_mdb_table(
+                temp_filename, table_name_aux_global
+            )
+            aux_df = self._read_mdb_table(temp_filename, table_name_aux)
 
             # --------- read auxiliary data (aux-data) ---------------------
             normal_df = self._load_posix_res_auxiliary_table(
@@ -1076,7 +1057,7 @@ class DataLoader(BaseLoader):
         """Loads data from arbin .res files.
 
         Args:
-            file_name (str): path to .res file.
+            file_name (str): path to .res file (or .res.gz, .res.zst or .res.zip).
             bad_steps (list of tuples): (c, s) tuples of steps s (in cycle c)
                 to skip loading.
             dataset_number (int): the data set number to select if you are dealing
@@ -1113,9 +1094,17 @@ class DataLoader(BaseLoader):
             print(error_message)
             return None
 
-        temp_dir = tempfile.gettempdir()
-        temp_filename = os.path.join(temp_dir, os.path.basename(file_name))
-        shutil.copy2(file_name, temp_dir)
+        # using a unique tmp-dir so that several processes can load res-files
+        # at the same time
+        temp_dir = tempfile.mkdtemp(prefix="cellpy_res_")
+        temp_filename = os.path.join(
+            temp_dir, pre_processors.decompressed_name(file_name).name
+        )
+        if pre_processors.compression_of(file_name) is not None:
+            # mdbtools and the odbc drivers need the res-file on disk
+            pre_processors.decompress(file_name, temp_filename)
+        else:
+            shutil.copy2(file_name, temp_dir)
         self.logger.debug("tmp file: %s" % temp_filename)
 
         use_mdbtools = False
@@ -1124,123 +1113,90 @@ class DataLoader(BaseLoader):
         if is_posix:
             use_mdbtools = True
 
-        if use_mdbtools:
-            new_tests = self._loader_posix(
-                file_name,
-                temp_filename,
-                temp_dir,
-                *args,
-                bad_steps=bad_steps,
-                dataset_number=dataset_number,
-                data_points=data_points,
-                **kwargs,
-            )
-        else:
-            new_tests = self._loader_win(
-                file_name,
-                temp_filename,
-                *args,
-                bad_steps=bad_steps,
-                dataset_number=dataset_number,
-                data_points=data_points,
-                **kwargs,
-            )
+        try:
+            if use_mdbtools:
+                new_tests = self._loader_posix(
+                    file_name,
+                    temp_filename,
+                    temp_dir,
+                    *args,
+                    bad_steps=bad_steps,
+                    dataset_number=dataset_number,
+                    data_points=data_points,
+                    **kwargs,
+                )
+            else:
+                new_tests = self._loader_win(
+                    file_name,
+                    temp_filename,
+                    *args,
+                    bad_steps=bad_steps,
+                    dataset_number=dataset_number,
+                    data_points=data_points,
+                    **kwargs,
+                )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
         new_tests = self._inspect(new_tests)
 
         return new_tests
 
-    def _create_tmp_files(
-        self,
-        table_name_global,
-        table_name_normal,
-        table_name_stats,
-        table_name_aux_global,
-        table_name_aux,
-        temp_dir,
-        temp_filename,
-    ):
-        import subprocess
-
-        # creating tmp-filenames
-        temp_csv_filename_global = os.path.join(temp_dir, "global_tmp.csv")
-        temp_csv_filename_normal = os.path.join(temp_dir, "normal_tmp.csv")
-        temp_csv_filename_stats = os.path.join(temp_dir, "stats_tmp.csv")
-        temp_csv_filename_aux_global = os.path.join(temp_dir, "aux_global_tmp.csv")
-        temp_csv_filename_aux = os.path.join(temp_dir, "aux_tmp.csv")
-        # making the cmds
-        mdb_prms = [
-            (table_name_global, temp_csv_filename_global),
-            (table_name_normal, temp_csv_filename_normal),
-            (table_name_stats, temp_csv_filename_stats),
-            (table_name_aux_global, temp_csv_filename_aux_global),
-            (table_name_aux, temp_csv_filename_aux),
-        ]
-        # executing cmds
-        for table_name, tmp_file in mdb_prms:
-            with open(tmp_file, "w") as f:
-                try:
-                    subprocess.call([sub_process_path, temp_filename, table_name], stdout=f)
-                    self.logger.debug(f"ran mdb-export {str(f)} {table_name}")
-                except FileNotFoundError as e:
-                    logging.critical(f"Could not run {sub_process_path} on {temp_filename}")
-                    logging.critical(f"Possible work-around: install mdbtools")
-                    raise e
-        return (
-            temp_csv_filename_global,
-            temp_csv_filename_normal,
-            temp_csv_filename_stats,
-            temp_csv_filename_aux_global,
-            temp_csv_filename_aux,
-        )
-
-    def _load_from_tmp_files(
-        self,
-        data,
-        temp_csv_filename_global,
-        temp_csv_filename_normal,
-        temp_csv_filename_stats,
-        temp_csv_filename_aux_global,
-        temp_csv_filename_aux,
-        temp_filename,
-        bad_steps,
-        data_points,
-    ):
-
-        """
-        if bad_steps is not None:
-            if not isinstance(bad_steps, (list, tuple)):
-                bad_steps = [bad_steps]
-            for bad_cycle, bad_step in bad_steps:
-                self.logger.debug(f"bad_step def: [c={bad_cycle}, s={bad_step}]")
-                sql_4 += "AND NOT (%s=%i " % (
-                    self.headers_normal.cycle_index_txt,
-                    bad_cycle,
-                )
-                sql_4 += "AND %s=%i) " % (self.headers_normal.step_index_txt, bad_step)
+    def _start_mdb_export(self, temp_filename, table_name):
+        try:
+            process = subprocess.Popen(
+                [sub_process_path, temp_filename, table_name], stdout=subprocess.PIPE
+            )
+        except FileNotFoundError as e:
+            logging.critical(f"Could not run {sub_process_path} on {temp_filename}")
+            logging.critical(f"Possible work-around: install mdbtools")
+            raise e
+        self.logger.debug(f"running mdb-export {temp_filename} {table_name}")
+        return process
 
+    @staticmethod
+    def _stop_mdb_export(process):
+        process.stdout.close()
+        if process.poll() is None:
+            # stopped reading before mdb-export finished
+            process.kill()
+        process.wait()
+
+    def _read_mdb_table(self, temp_filename, table_name):
+        """Read a table from the res-file by parsing the output of mdb-export."""
+        process = self._start_mdb_export(temp_filename, table_name)
+        try:
+            return pd.read_csv(process.stdout)
+        except pd.errors.EmptyDataError:
+            self.logger.debug(f"mdb-export did not return anything for {table_name}")
+            return pd.DataFrame()
+        finally:
+            self._stop_mdb_export(process)
+
+    def _iter_mdb_table(self, temp_filename, table_name, chunk_size, **kwargs):
+        """Iterate through a table from the res-file in chunks (pandas.DataFrame).
+
+        The output of mdb-export is parsed while it is produced, so that
+        the complete table never has to be stored (neither as csv nor in memory).
+        Additional keyword arguments are sent to pandas.read_csv.
         """
-        # should include a more efficient to load the csv (maybe a loop where
-        #   we load only chuncks and only keep the parts that fullfill the
-        #   filters (e.g. bad_steps, data_points,...)
-        normal_df = pd.read_csv(temp_csv_filename_normal)
+        process = self._start_mdb_export(temp_filename, table_name)
+        try:
+            with pd.read_csv(process.stdout, chunksize=chunk_size, **kwargs) as reader:
+                yield from reader
+        except pd.errors.EmptyDataError:
+            self.logger.debug(f"mdb-export did not return anything for {table_name}")
+        finally:
+            self._stop_mdb_export(process)
+
+    def _filter_normal_table(self, normal_df, test_ID, bad_steps, data_points):
         # filter on test ID
         normal_df = normal_df[
-            normal_df[self.arbin_headers_normal.test_id_txt] == data.test_ID
+            normal_df[self.arbin_headers_normal.test_id_txt] == test_ID
         ]
-        # sort on data point
-        if prms._sort_if_subprocess:
-            normal_df = normal_df.sort_values(self.arbin_headers_normal.data_point_txt)
 
         if bad_steps is not None:
-            logging.debug("removing bad steps")
-            if not isinstance(bad_steps, (list, tuple)):
-                bad_steps = [bad_steps]
-            if not isinstance(bad_steps[0], (list, tuple)):
-                bad_steps = [bad_steps]
             for bad_cycle, bad_step in bad_steps:
-                self.logger.debug(f"bad_step def: [c={bad_cycle}, s={bad_step}]")
-
                 selector = (
                     normal_df[self.arbin_headers_normal.cycle_index_txt] == bad_cycle
                 ) & (normal_df[self.arbin_headers_normal.step_index_txt] == bad_step)
@@ -1248,7 +1204,6 @@ class DataLoader(BaseLoader):
                 normal_df = normal_df.loc[~selector, :]
 
         if prms.Reader.limit_loaded_cycles:
-            logging.debug("Not yet tested for aux data")
             if len(prms.Reader.limit_loaded_cycles) > 1:
                 c1, c2 = prms.Reader.limit_loaded_cycles
                 selector = (
@@ -1262,8 +1217,6 @@ class DataLoader(BaseLoader):
             normal_df = normal_df.loc[selector, :]
 
         if data_points is not None:
-            logging.debug("selecting data-point range")
-            logging.debug("Not yet tested for aux data")
             d1, d2 = data_points
 
             if d1 is not None:
@@ -1274,26 +1227,58 @@ class DataLoader(BaseLoader):
                 selector = normal_df[self.arbin_headers_normal.data_point_txt] <= d2
                 normal_df = normal_df.loc[selector, :]
 
+        return normal_df
+
+    def _load_posix_res_normal_table(
+        self, temp_filename, test_ID, bad_steps, data_points
+    ):
+        self.logger.debug("starting loading raw-data (streaming from mdb-export)")
+        self.logger.debug(f"test-ID: {test_ID}")
+        self.logger.debug(f"bad steps:  {bad_steps}")
+
+        table_name_normal = TABLE_NAMES["normal"]
+
+        if bad_steps is not None:
+            logging.debug("removing bad steps")
+            if not isinstance(bad_steps, (list, tuple)):
+                bad_steps = [bad_steps]
+            if not isinstance(bad_steps[0], (list, tuple)):
+                bad_steps = [bad_steps]
+            for bad_cycle, bad_step in bad_steps:
+                self.logger.debug(f"bad_step def: [c={bad_cycle}, s={bad_step}]")
+
+        if prms.Reader.limit_loaded_cycles or data_points is not None:
+            logging.debug("Not yet tested for aux data")
+
+        usecols = None
+        if prms.Reader.select_minimal:  # SETTING
+            columns = [*MINIMUM_SELECTION, self.arbin_headers_normal.test_id_txt]
+
+            def usecols(col):
+                return col in columns
+
+        chunk_size = prms.Instruments.Arbin.chunk_size or MDB_EXPORT_CHUNK_SIZE
+        self.logger.debug(f"chunk-size: {chunk_size}")
+
+        chunks = []
+        for chunk in self._iter_mdb_table(
+            temp_filename, table_name_normal, chunk_size, usecols=usecols
+        ):
+            chunk = self._filter_normal_table(chunk, test_ID, bad_steps, data_points)
+            chunks.append(self._compact_chunk(chunk))
+
+        if chunks:
+            normal_df = pd.concat(chunks)
+        else:
+            normal_df = pd.DataFrame(columns=self.arbin_headers_normal.values())
+
+        # sort on data point
+        if prms._sort_if_subprocess:
+            normal_df = normal_df.sort_values(self.arbin_headers_normal.data_point_txt)
+
         length_of_test = normal_df.shape[0]
-        summary_df = pd.read_csv(temp_csv_filename_stats)
-        aux_global_df = pd.read_csv(temp_csv_filename_aux_global)
-        aux_df = pd.read_csv(temp_csv_filename_aux)
-
-        # clean up
-        for f in [
-            temp_filename,
-            temp_csv_filename_stats,
-            temp_csv_filename_normal,
-            temp_csv_filename_global,
-            temp_csv_filename_aux_global,
-            temp_csv_filename_aux,
-        ]:
-            if os.path.isfile(f):
-                try:
-                    os.remove(f)
-                except WindowsError as e:
-                    self.logger.warning(f"could not remove tmp-file\n{f} {e}")
-        return length_of_test, normal_df, summary_df, aux_global_df, aux_df
+        self.logger.debug(f"loaded to normal_df (length =  {length_of_test})")
+        return length_of_test, normal_df
 
     def _init_data(self, file_name, global_data_df, test_no):
         data = Cell()
@@ -1409,50 +1394,56 @@ class DataLoader(BaseLoader):
             normal_df_reader = pd.read_sql_query(
                 sql, conn, chunksize=prms.Instruments.Arbin.chunk_size
             )
-            normal_df = None
-            chunk_number = 0
             self.logger.debug("created pandas sql reader")
             self.logger.debug("iterating chunk-wise")
-            for i, chunk in enumerate(normal_df_reader):
-                self.logger.debug(f"iteration number {i}")
-                if prms.Instruments.Arbin.max_chunks:
-                    self.logger.debug(
-                        f"max number of chunks mode "
-                        f"({prms.Instruments.Arbin.max_chunks})"
-                    )
-                    if chunk_number < prms.Instruments.Arbin.max_chunks:
-                        normal_df = pd.concat([normal_df, chunk], ignore_index=True)
+            chunks = []
+            max_chunks = prms.Instruments.Arbin.max_chunks
+            try:
+                for i, chunk in enumerate(normal_df_reader):
+                    self.logger.debug(f"iteration number {i}")
+                    if max_chunks and i >= max_chunks:
                         self.logger.debug(
-                            f"chunk {i} of {prms.Instruments.Arbin.max_chunks}"
+                            f"max number of chunks reached ({max_chunks})"
                         )
-                    else:
                         break
-                else:
-                    try:
-                        normal_df = pd.concat([normal_df, chunk], ignore_index=True)
-                        self.logger.debug("concatenated new chunk")
-                    except MemoryError:
-                        self.logger.error(
-                            " - Could not read complete file (MemoryError)."
-                        )
-                        self.logger.error(
-                            f"Last successfully loaded chunk " f"number: {chunk_number}"
-                        )
-                        self.logger.error(
-                            f"Chunk size: {prms.Instruments.Arbin.chunk_size}"
-                        )
-                        break
-                chunk_number += 1
-            length_of_test = normal_df.shape[0]
-            self.logger.debug(f"finished iterating (#rows: {length_of_test})")
+                    chunks.append(self._compact_chunk(chunk))
+            except MemoryError:
+                self.logger.error(" - Could not read complete file (MemoryError).")
+                self.logger.error(
+                    f"Last successfully loaded chunk number: {len(chunks)}"
+                )
+                self.logger.error(f"Chunk size: {prms.Instruments.Arbin.chunk_size}")
 
-        self.logger.debug(f"loaded to normal_df (length =  {length_of_test})")
-        self.logger.debug(f"Headers:\n{normal_df.columns}")
+            # concatenating only once (not for each new chunk) to keep the time linear
+            # and the memory usage at max the chunks + the complete table
+            normal_df = None
+            length_of_test = 0
+            if chunks:
+                normal_df = pd.concat(chunks, ignore_index=True)
+                length_of_test = normal_df.shape[0]
+            self.logger.debug(f"finished iterating (#rows: {length_of_test})")
 
         if normal_df is None:
             normal_df = pd.DataFrame(columns=self.arbin_headers_normal.values())
+        self.logger.debug(f"loaded to normal_df (length =  {length_of_test})")
+        self.logger.debug(f"Headers:\n{normal_df.columns}")
         return length_of_test, normal_df
 
+    def _compact_chunk(self, chunk):
+        # downcasting the chunks (if requested) before concatenating them
+        if not prms.Reader.compact_dtypes:
+            return chunk
+        int_columns = [
+            self.arbin_headers_normal.data_point_txt,
+            self.arbin_headers_normal.cycle_index_txt,
+            self.arbin_headers_normal.step_index_txt,
+        ]
+        return compact_dtypes(
+            chunk,
+            int_columns=int_columns,
+            float_tolerance=prms.Reader.compact_float_tolerance,
+        )
+
 
 def check_loader_aux():
     from pathlib import Path
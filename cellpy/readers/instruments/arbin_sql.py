@@ -1,17 +1,18 @@
 """arbin MS SQL Server data"""
 import datetime
+import functools
 import logging
 import os
 import platform
 import shutil
 import sys
 import tempfile
+import threading
 import time
 import warnings
 
 import numpy as np
 import pandas as pd
-import pyodbc
 from dateutil.parser import parse
 
 from cellpy import prms
@@ -25,6 +26,12 @@ from cellpy.readers.core import (
 )
 from cellpy.readers.instruments.base import BaseLoader
 
+try:
+    import pyodbc
+except ImportError:
+    warnings.warn("COULD NOT LOAD PYODBC!", ImportWarning)
+    pyodbc = None
+
 # TODO: @muhammad - get more meta data from the SQL db
 # TODO: @jepe - update the batch functionality (including filefinder)
 # TODO: @muhammad - make routine for "setting up the SQL Server" so that it is accessible and document it
@@ -37,6 +44,7 @@ SQL_SERVER = prms.Instruments.Arbin["SQL_server"]
 SQL_UID = prms.Instruments.Arbin["SQL_UID"]
 SQL_PWD = prms.Instruments.Arbin["SQL_PWD"]
 SQL_DRIVER = prms.Instruments.Arbin["SQL_Driver"]
+SQL_CHUNK_SIZE = 100_000  # number of rows fetched at a time from the server
 
 
 # Names of the tables in the SQL Server db that is used by cellpy
@@ -50,6 +58,30 @@ TABLE_NAMES = {
     "aux": "Auxiliary_Table",
 }
 
+# Names of the tables in the Arbin SQL Server db (formatted with the database name
+# found in the test list). Can be overridden by giving table_names to the DataLoader.
+SQL_TABLE_NAMES = {
+    "test_list": "ArbinPro8MasterInfo.dbo.TestList_Table",
+    "normal": "{database_name}.dbo.IV_Basic_Table",
+    "statistic": "{database_name}.dbo.StatisticData_Table",
+}
+
+# Columns selected if prms.Reader.select_minimal is True
+SQL_MINIMUM_SELECTION = [
+    "Test_ID",
+    "Channel_ID",
+    "Date_Time",
+    "Data_Point",
+    "Test_Time",
+    "Step_Time",
+    "Cycle_ID",
+    "Step_ID",
+    "Current",
+    "Voltage",
+    "Charge_Capacity",
+    "Discharge_Capacity",
+]
+
 # Contains several headers not encountered yet in the Arbin SQL Server tables
 summary_headers_renaming_dict = {
     "test_id_txt": "Test_ID",
@@ -124,13 +156,87 @@ def from_arbin_to_datetime(n):
     return time_in_str
 
 
+def from_arbin_to_datetimes(values: pd.Series) -> pd.Series:
+    """Vectorized version of from_arbin_to_datetime (for a whole column)."""
+    if values.empty:
+        return pd.Series([], index=values.index, dtype=object)
+    ticks = values.to_numpy(dtype=np.int64)  # in units of 0.1 us
+    seconds = ticks // 10_000_000
+    # rounding to microseconds through a float timestamp (as fromtimestamp does):
+    timestamps = seconds.astype(np.float64) + (ticks % 10_000_000) / 1e7
+    microseconds = np.round((timestamps - seconds) * 1e6).astype(np.int64)
+
+    # local time (offsets looked up once for each quarter of an hour):
+    quarters, quarter_index = np.unique(seconds // 900, return_inverse=True)
+    utc_offsets = np.array(
+        [time.localtime(quarter * 900).tm_gmtoff for quarter in quarters.tolist()],
+        dtype=np.int64,
+    )
+    local_times = (
+        (seconds + utc_offsets[quarter_index]) * 1_000_000 + microseconds
+    ).astype("datetime64[us]")
+
+    # "yyyy-mm-ddTHH:MM:SS.ffffff" -> "yy-mm-dd HH:MM:SS:ffffff"
+    iso_chars = np.datetime_as_string(local_times, unit="us").view("U1")
+    iso_chars = iso_chars.reshape(len(local_times), -1)
+    chars = iso_chars[:, [*range(2, 10), 10, *range(11, 19), 19, *range(20, 26)]]
+    chars[:, 8] = " "
+    chars[:, 17] = ":"
+    return pd.Series(chars.copy().view("U24").ravel(), index=values.index)
+
+
+class _ConnectionPool:
+    """Open connections to the SQL server, shared by all the loaders (pr. thread)."""
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, connect):
+        key = (key, threading.get_ident())
+        with self._lock:
+            if key not in self._connections:
+                logging.debug(f"connecting ({key})")
+                self._connections[key] = connect()
+            return self._connections[key]
+
+    def discard(self, key):
+        key = (key, threading.get_ident())
+        with self._lock:
+            connection = self._connections.pop(key, None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.debug(f"could not close connection: {e}")
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                logging.debug(f"could not close connection: {e}")
+
+
+connection_pool = _ConnectionPool()
+
+
 class DataLoader(BaseLoader):
     """Class for loading arbin-data from MS SQL server."""
 
     instrument_name = "arbin_sql"
 
     def __init__(self, *args, **kwargs):
-        """initiates the ArbinSQLLoader class"""
+        """initiates the ArbinSQLLoader class
+
+        Keyword Args:
+            connect (callable): function returning a (DB-API) connection to the
+                database (defaults to pyodbc.connect using the SQL settings in prms).
+            table_names (dict): names of the tables (overrides SQL_TABLE_NAMES).
+        """
         self.arbin_headers_normal = (
             get_headers_normal()
         )  # the column headers defined by Arbin
@@ -142,6 +248,12 @@ class DataLoader(BaseLoader):
         self.arbin_headers_aux = self.get_headers_aux()
         self.current_chunk = 0  # use this to set chunks to load
         self.server = SQL_SERVER
+        self.connection_string = (
+            f"Driver={{{SQL_DRIVER}}};"
+            + f"Server={self.server};Trusted_Connection=yes;"
+        )
+        self._connect = kwargs.pop("connect", None)
+        self.table_names = {**SQL_TABLE_NAMES, **kwargs.pop("table_names", {})}
 
     @staticmethod
     def get_headers_normal():
@@ -242,14 +354,41 @@ class DataLoader(BaseLoader):
         Loads data from arbin SQL server db.
 
         Args:
-            name (str): name of the test
+            name (str or list of str): name of the test (or tests, all loaded using the
+                same queries).
+            data_points (tuple of ints): load only data from data_point[0] to
+                data_point[1] (use None for infinite).
+            chunk_size (int): number of rows fetched at a time from the server.
 
         Returns:
-            new_tests (list of data objects)
+            new_tests (list of data objects, one for each test found)
         """
         new_tests = []
+        names = [name] if isinstance(name, str) else list(name)
+        data_points = kwargs.pop("data_points", None)
+        chunk_size = kwargs.pop("chunk_size", None)
+
+        data_df, stat_df = self._query_sql(
+            names, data_points=data_points, chunk_size=chunk_size
+        )
+        if len(names) > 1:
+            datas_df = dict(tuple(data_df.groupby("Test_Name", sort=False)))
+            stats_df = dict(tuple(stat_df.groupby("Test_Name", sort=False)))
+        else:
+            datas_df = {names[0]: data_df}
+            stats_df = {names[0]: stat_df}
+
+        for test_name in names:
+            data_df = datas_df.get(test_name)
+            if data_df is None or data_df.empty:
+                logging.info(f"no data found for {test_name}")
+                continue
+            stat_df = stats_df.get(test_name, pd.DataFrame())
+            new_tests.append(self._create_cell(test_name, data_df, stat_df))
+
+        return new_tests
 
-        data_df, stat_df = self._query_sql(name)
+    def _create_cell(self, name, data_df, stat_df):
         aux_data_df = None  # Needs to be implemented
         meta_data = None  # Should be implemented
 
@@ -283,9 +422,7 @@ class DataLoader(BaseLoader):
         data.summary = stat_df
         data = self._post_process(data)
         data = self.identify_last_data_point(data)
-        new_tests.append(data)
-
-        return new_tests
+        return data
 
     def _post_process(self, data, **kwargs):
         # TODO: move this to parent
@@ -331,12 +468,12 @@ class DataLoader(BaseLoader):
             h_datetime = self.cellpy_headers_normal.datetime_txt
             logging.debug("converting to datetime format")
 
-            data.raw[h_datetime] = data.raw[h_datetime].apply(from_arbin_to_datetime)
+            data.raw[h_datetime] = from_arbin_to_datetimes(data.raw[h_datetime])
 
             h_datetime = h_datetime
             if h_datetime in data.summary:
-                data.summary[h_datetime] = data.summary[h_datetime].apply(
-                    from_arbin_to_datetime
+                data.summary[h_datetime] = from_arbin_to_datetimes(
+                    data.summary[h_datetime]
                 )
 
         if set_index:
@@ -350,64 +487,120 @@ class DataLoader(BaseLoader):
 
         return data
 
-    def _query_sql(self, name):
-        # TODO: refactor and include optional SQL arguments
-        name_str = f"('{name}', '')"
-        con_str = (
-            f"Driver={{{SQL_DRIVER}}};" + f"Server={SQL_SERVER};Trusted_Connection=yes;"
-        )
+    def _get_connection(self):
+        if self._connect is not None:
+            connect = self._connect
+        elif pyodbc is not None:
+            connect = functools.partial(pyodbc.connect, self.connection_string)
+        else:
+            raise ImportError("pyodbc is needed for connecting to the SQL server")
+        return connection_pool.get((self._connect, self.connection_string), connect)
+
+    def _query_sql(self, names, data_points=None, chunk_size=None):
+        """Query the data and statistics for the test(s) from the server.
+
+        All the tests are looked up in the test list using one (parameterized) query,
+        and the data are queried once for each database (filtered on the server
+        and fetched in chunks).
+        """
+        if isinstance(names, str):
+            names = [names]
+        names = list(names)
+        chunk_size = chunk_size or prms.Instruments.Arbin.chunk_size or SQL_CHUNK_SIZE
 
-        # TODO: use variable for the name of the main db (ArbinPro8....)
         # TODO: consider making a function that searches for correct ArbinPro version
         master_q = (
-            "SELECT Database_Name, Test_Name FROM "
-            "ArbinPro8MasterInfo.dbo.TestList_Table WHERE "
-            f"ArbinPro8MasterInfo.dbo.TestList_Table.Test_Name IN {name_str}"
+            "SELECT Database_Name, Test_ID, Test_Name "
+            f"FROM {self.table_names['test_list']} "
+            f"WHERE Test_Name IN ({', '.join(['?'] * len(names))})"
         )
 
-        conn = pyodbc.connect(con_str)
-        sql_query = pd.read_sql_query(master_q, conn)
-
-        datas_df = []
-        stats_df = []
-
-        for index, row in sql_query.iterrows():
-            # TODO: use variables - see above
-            # TODO: consider to use f-strings
-            data_query = (
-                "SELECT "
-                + str(row["Database_Name"])
-                + ".dbo.IV_Basic_Table.*, ArbinPro8MasterInfo.dbo.TestList_Table.Test_Name "
-                "FROM " + str(row["Database_Name"]) + ".dbo.IV_Basic_Table "
-                "JOIN ArbinPro8MasterInfo.dbo.TestList_Table "
-                "ON "
-                + str(row["Database_Name"])
-                + ".dbo.IV_Basic_Table.Test_ID = ArbinPro8MasterInfo.dbo.TestList_Table.Test_ID "
-                "WHERE ArbinPro8MasterInfo.dbo.TestList_Table.Test_Name IN "
-                + str(name_str)
-            )
-
-            stat_query = (
-                "SELECT "
-                + str(row["Database_Name"])
-                + ".dbo.StatisticData_Table.*, ArbinPro8MasterInfo.dbo.TestList_Table.Test_Name "
-                "FROM " + str(row["Database_Name"]) + ".dbo.StatisticData_Table "
-                "JOIN ArbinPro8MasterInfo.dbo.TestList_Table "
-                "ON "
-                + str(row["Database_Name"])
-                + ".dbo.StatisticData_Table.Test_ID = ArbinPro8MasterInfo.dbo.TestList_Table.Test_ID "
-                "WHERE ArbinPro8MasterInfo.dbo.TestList_Table.Test_Name IN "
-                + str(name_str)
+        conn = self._get_connection()
+        try:
+            tests = pd.read_sql_query(master_q, conn, params=names)
+            datas_df = []
+            stats_df = []
+            for database_name, database_tests in tests.groupby(
+                "Database_Name", sort=False
+            ):
+                test_names = dict(
+                    zip(database_tests["Test_ID"], database_tests["Test_Name"])
+                )
+                for table, frames, filtered in [
+                    ("normal", datas_df, True),
+                    ("statistic", stats_df, False),
+                ]:
+                    table_name = self.table_names[table].format(
+                        database_name=database_name
+                    )
+                    df = self._query_table(
+                        conn,
+                        table_name,
+                        list(test_names),
+                        data_points=data_points if filtered else None,
+                        limit_cycles=filtered,
+                        select_minimal=filtered and prms.Reader.select_minimal,
+                        chunk_size=chunk_size,
+                    )
+                    df["Test_Name"] = df["Test_ID"].map(test_names)
+                    frames.append(df)
+        except Exception:
+            connection_pool.discard((self._connect, self.connection_string))
+            raise
+
+        if not datas_df:
+            logging.info(f"could not find any of the tests {names}")
+            return pd.DataFrame(columns=["Test_Name"]), pd.DataFrame(
+                columns=["Test_Name"]
             )
 
-            datas_df.append(pd.read_sql_query(data_query, conn))
-            stats_df.append(pd.read_sql_query(stat_query, conn))
-
-        data_df = pd.concat(datas_df, axis=0)
-        stat_df = pd.concat(stats_df, axis=0)
-
+        data_df = pd.concat(datas_df, axis=0, ignore_index=True)
+        stat_df = pd.concat(stats_df, axis=0, ignore_index=True)
         return data_df, stat_df
 
+    def _query_table(
+        self,
+        conn,
+        table_name,
+        test_ids,
+        data_points=None,
+        limit_cycles=False,
+        select_minimal=False,
+        chunk_size=None,
+    ):
+        test_id_hdr = normal_headers_renaming_dict["test_id_txt"]
+        cycle_index_hdr = normal_headers_renaming_dict["cycle_index_txt"]
+        data_point_hdr = normal_headers_renaming_dict["data_point_txt"]
+
+        columns_txt = ", ".join(SQL_MINIMUM_SELECTION) if select_minimal else "*"
+        test_ids = [int(test_id) for test_id in test_ids]
+        conditions = [f"{test_id_hdr} IN ({', '.join(['?'] * len(test_ids))})"]
+        params = test_ids
+
+        if limit_cycles and prms.Reader.limit_loaded_cycles:
+            if len(prms.Reader.limit_loaded_cycles) > 1:
+                c1, c2 = prms.Reader.limit_loaded_cycles
+                conditions.append(f"{cycle_index_hdr} > ? AND {cycle_index_hdr} < ?")
+                params += [int(c1), int(c2)]
+            else:
+                conditions.append(f"{cycle_index_hdr} = ?")
+                params.append(int(prms.Reader.limit_loaded_cycles[0]))
+
+        if data_points is not None:
+            d1, d2 = data_points
+            if d1 is not None:
+                conditions.append(f"{data_point_hdr} >= ?")
+                params.append(int(d1))
+            if d2 is not None:
+                conditions.append(f"{data_point_hdr} <= ?")
+                params.append(int(d2))
+
+        where_txt = " AND ".join(conditions)
+        query = f"SELECT {columns_txt} FROM {table_name} WHERE {where_txt}"
+        logging.debug(f"query: {query} (params: {params})")
+        chunks = pd.read_sql_query(query, conn, params=params, chunksize=chunk_size)
+        return pd.concat(chunks, axis=0, ignore_index=True)
+
 
 def check_sql_loader(server: str = None, tests: list = None):
     test_name = tuple(tests) + ("",)  # neat trick :-)
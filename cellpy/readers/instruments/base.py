@@ -6,16 +6,22 @@ Remember also to register it in cellpy.cellreader.
 """
 
 import abc
+import contextlib
+import importlib
+import io
 import logging
+import os
 import pathlib
 import shutil
 import tempfile
 from abc import ABC
 from typing import List, Union
 
+import numpy as np
 import pandas as pd
 
 import cellpy.readers.core as core
+from cellpy import prms
 from cellpy.parameters.internal_settings import headers_normal
 from cellpy.readers.instruments.configurations import (
     ModelParameters,
@@ -40,6 +46,12 @@ MINIMUM_SELECTION = [
     "Internal_Resistance",
 ]
 
+pyarrow_available = importlib.util.find_spec("pyarrow") is not None
+
+# number of bytes before the offset used for checking that the file has only been
+# appended to when resuming reading (see AutoLoader._resumable_read_context):
+READ_CONTEXT_CHECK_LENGTH = 4096
+
 
 # TODO: move this to another module (e.g. inside processors):
 def find_delimiter_and_start(
@@ -63,7 +75,7 @@ def find_delimiter_and_start(
     logging.debug(f"checking internals of the file {file_name}")
 
     empty_lines = 0
-    with open(file_name, "r") as fin:
+    with pre_processors.open_text(file_name) as fin:
         lines = []
         for j in range(checking_length_whole):
             line = fin.readline()
@@ -321,6 +333,10 @@ class AutoLoader(BaseLoader):
 
         self.name = None
         self._file_path = None
+        self._line_filters = []
+        self._file_columns = None
+        self._read_context = None
+        self._size_limit = None
 
         self.parse_formatter_parameters(**kwargs)
 
@@ -342,6 +358,12 @@ class AutoLoader(BaseLoader):
 
         self.include_aux = kwargs.pop("include_aux", False)
         self.keep_all_columns = kwargs.pop("keep_all_columns", False)
+        self.engine = kwargs.pop(
+            "engine", self.config_params.formatters.get("engine", None)
+        )
+        self.chunk_size = kwargs.pop(
+            "chunk_size", self.config_params.formatters.get("chunk_size", None)
+        )
         self.cellpy_headers_normal = (
             headers_normal  # the column headers defined by cellpy
         )
@@ -406,24 +428,383 @@ class AutoLoader(BaseLoader):
             f"missing method in sub-class of TxtLoader: get_headers_aux"
         )
 
+    def _columns_to_parse(self, name, **kwargs) -> Union[list, None]:
+        """Find the columns to parse from the file (None means all).
+
+        The columns are selected from the ``columns_to_keep`` of the configuration
+        (in addition to the columns needed by ``cellpy``, e.g. the state column).
+        """
+        if self.keep_all_columns or self.include_aux:
+            return None
+        columns_to_keep = self.config_params.columns_to_keep
+        if not columns_to_keep:
+            return None
+        wanted = set(columns_to_keep)
+        renaming_dict = self.config_params.normal_headers_renaming_dict
+        for header in prms._minimum_columns_to_keep_for_raw_if_exists:
+            if header in renaming_dict:
+                wanted.add(renaming_dict[header])
+        state_column = self.config_params.states.get("column_name", None)
+        if state_column is not None:
+            wanted.add(state_column)
+
+        with self._open_csv_file(name) as csv_file:
+            file_columns = pd.read_csv(csv_file, nrows=0, **kwargs).columns
+        self._file_columns = list(file_columns)
+        usecols = [col for col in file_columns if col in wanted]
+        logging.debug(f"parsing {len(usecols)} of {len(file_columns)} columns")
+        return usecols
+
+    def _csv_engine(self):
+        if self.engine != "pyarrow":
+            return self.engine
+        if not pyarrow_available:
+            logging.debug("pyarrow not available - using the c engine")
+            return None
+        if (
+            self.chunk_size
+            or self.thousands is not None
+            or self.decimal not in (None, ".")
+            or self.sep is None
+            or len(self.sep) != 1
+            or not isinstance(self.skiprows, (int, type(None)))
+            or not isinstance(self.header, (int, type(None)))
+            or self._line_filters
+        ):
+            logging.debug(
+                "formatters or line filters not supported by pyarrow - using the c engine"
+            )
+            return None
+        return "pyarrow"
+
+    def _open_csv_file(self, name):
+        # the file (or the line-filtered stream of it) to give to the csv parser
+        # (limited to the first self._size_limit bytes if given, decompressed
+        # while reading if the file is compressed)
+        if self._line_filters:
+            return pre_processors.open_filtered(
+                name, self._line_filters, encoding=self.encoding, size=self._size_limit
+            )
+        if self._size_limit is not None:
+            return pre_processors.open_head(name, self._size_limit)
+        if pre_processors.compression_of(name) is not None:
+            return pre_processors.open_decompressed(name)
+        return contextlib.nullcontext(name)
+
+    def _read_csv_with_pyarrow(self, name, usecols, dtype) -> pd.DataFrame:
+        # using pyarrow.csv directly since pandas (<2.0) does not pass on
+        # skiprows and encoding to the pyarrow engine
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        logging.debug(f"parsing with pyarrow.csv.read_csv: {name}")
+        read_options = pa_csv.ReadOptions(
+            skip_rows=(self.skiprows or 0) + (self.header or 0),
+            autogenerate_column_names=self.header is None,
+            encoding=self.encoding or "utf8",
+        )
+        parse_options = pa_csv.ParseOptions(delimiter=self.sep)
+        convert_options = pa_csv.ConvertOptions(
+            include_columns=usecols or [],
+            column_types={
+                col: pa.from_numpy_dtype(np.dtype(col_type))
+                for col, col_type in dtype.items()
+            },
+        )
+        with self._open_csv_file(name) as csv_file:
+            table = pa_csv.read_csv(
+                csv_file,
+                read_options=read_options,
+                parse_options=parse_options,
+                convert_options=convert_options,
+            )
+        # mangle duplicate column names the same way as pandas ("name.1", ...)
+        column_names = []
+        duplicates = {}
+        for col in table.column_names:
+            if col in duplicates:
+                duplicates[col] += 1
+                col = f"{col}.{duplicates[col]}"
+            else:
+                duplicates[col] = 0
+            column_names.append(col)
+        return table.rename_columns(column_names).to_pandas()
+
+    def _read_csv(self, name) -> pd.DataFrame:
+        """Parse a csv-like file using the formatters.
+
+        Only the needed columns are parsed (see ``_columns_to_parse``) and the
+        ``dtypes`` of the configuration are applied. Setting ``chunk_size`` parses
+        the file in chunks (compacted if ``prms.Reader.compact_dtypes`` is True),
+        and setting ``engine`` to "pyarrow" uses the (multi-threaded) pyarrow parser.
+
+        The byte offset of the end of the last parsed line is kept (in the read
+        context) so that the lines appended later can be parsed separately (see
+        ``_read_appended_csv``). A partially written last line is not parsed.
+        """
+        self._file_columns = None
+        self._read_context = self._create_read_context(name)
+        if self._read_context is not None:
+            # not parsing what is appended to the file while parsing it:
+            self._size_limit = self._read_context.pop("size")
+        try:
+            return self._read_csv_file(name)
+        finally:
+            self._size_limit = None
+
+    def _read_csv_file(self, name) -> pd.DataFrame:
+        csv_kwargs = dict(
+            sep=self.sep,
+            skiprows=self.skiprows,
+            header=self.header,
+            encoding=self.encoding,
+            decimal=self.decimal,
+            thousands=self.thousands,
+        )
+        usecols = self._columns_to_parse(name, **csv_kwargs)
+        dtype = {
+            col: col_type
+            for col, col_type in self.config_params.dtypes.items()
+            if usecols is None or col in usecols
+        }
+        data_df = self._parse_csv(name, csv_kwargs, usecols, dtype)
+        if self._read_context is not None:
+            self._read_context.update(
+                columns=self._file_columns or list(data_df.columns),
+                usecols=usecols,
+                dtype=dtype,
+            )
+        return data_df
+
+    def _parse_csv(self, name, csv_kwargs, usecols, dtype) -> pd.DataFrame:
+        if self._csv_engine() == "pyarrow":
+            return self._read_csv_with_pyarrow(name, usecols, dtype)
+
+        csv_kwargs = dict(csv_kwargs, usecols=usecols, dtype=dtype or None)
+        if not self.chunk_size:
+            with self._open_csv_file(name) as csv_file:
+                return pd.read_csv(csv_file, **csv_kwargs)
+
+        logging.debug(f"parsing in chunks of {self.chunk_size} rows")
+        renaming_dict = self.config_params.normal_headers_renaming_dict
+        int_columns = [
+            renaming_dict[header]
+            for header in ["data_point_txt", "cycle_index_txt", "step_index_txt"]
+            if header in renaming_dict
+        ]
+        chunks = []
+        with self._open_csv_file(name) as csv_file, pd.read_csv(
+            csv_file, chunksize=self.chunk_size, **csv_kwargs
+        ) as reader:
+            for chunk in reader:
+                if prms.Reader.compact_dtypes:
+                    chunk = core.compact_dtypes(
+                        chunk,
+                        int_columns=int_columns,
+                        float_tolerance=prms.Reader.compact_float_tolerance,
+                    )
+                chunks.append(chunk)
+        return pd.concat(chunks, ignore_index=True)
+
+    def _formatters(self) -> tuple:
+        line_filters = [line_filter.__name__ for line_filter in self._line_filters]
+        return (
+            self.sep,
+            self.decimal,
+            self.thousands,
+            self.encoding,
+            self.model,
+            line_filters,
+        )
+
+    def _create_read_context(self, name) -> Union[dict, None]:
+        if pathlib.Path(name) != self.name:
+            logging.debug("no read context (pre-processors created a new file)")
+            return None
+        if pre_processors.compression_of(name) is not None:
+            logging.debug("no read context (compressed file)")
+            return None
+        file_size = os.path.getsize(name)
+        with open(name, "rb") as f:
+            f.seek(max(0, file_size - 64 * 1024))
+            end_of_file = f.read(file_size - f.tell())
+        end_of_last_line = end_of_file.rfind(b"\n") + 1
+        if not end_of_last_line:
+            return None
+        offset = file_size - len(end_of_file) + end_of_last_line
+        check = end_of_file[:end_of_last_line]
+
+        unconfirmed_rows = 0
+        size = file_size
+        last_line = end_of_file[end_of_last_line:]
+        if last_line.strip():
+            if self._is_complete_line(last_line, check):
+                # the last line is parsed again next time (it might not be finished)
+                unconfirmed_rows = 1
+            else:
+                logging.debug("skipping the unfinished last line")
+                size = offset
+
+        return {
+            "name": str(self.name.resolve()),
+            "size": size,
+            "offset": offset,
+            "check": check[-READ_CONTEXT_CHECK_LENGTH:],
+            "formatters": self._formatters(),
+            "unconfirmed_rows": unconfirmed_rows,
+            "tail": None,
+        }
+
+    def _is_complete_line(self, line: bytes, previous_lines: bytes) -> bool:
+        # a partially written line will (most likely) have fewer fields than the
+        # line before it
+        if not isinstance(self.sep, str) or len(self.sep) != 1:
+            return True
+        previous_line = previous_lines.rstrip(b"\r\n").rsplit(b"\n", 1)[-1]
+        try:
+            line = line.decode(self.encoding or "utf-8")
+            previous_line = previous_line.decode(self.encoding or "utf-8")
+        except UnicodeDecodeError:
+            return False
+        return line.count(self.sep) >= previous_line.count(self.sep)
+
+    def _resumable_read_context(self, fid) -> Union[dict, None]:
+        """Return the read context of the FileID if reading can continue from it."""
+        read_context = getattr(fid, "read_context", None)
+        if not read_context or read_context.get("tail") is None:
+            return None
+        if read_context["name"] != str(self.name.resolve()):
+            return None
+        if self._file_path != self.name:
+            logging.debug("cannot resume reading (pre-processors created a new file)")
+            return None
+        if read_context["formatters"] != self._formatters():
+            logging.debug("cannot resume reading (formatters changed)")
+            return None
+        offset = read_context["offset"]
+        check = read_context["check"]
+        with open(self.name, "rb") as f:
+            f.seek(offset - len(check))
+            if f.read(len(check)) != check:
+                logging.debug("cannot resume reading (file not only appended to)")
+                return None
+        return read_context
+
+    def _read_appended_csv(self, read_context) -> pd.DataFrame:
+        """Parse the lines appended to the file since the read context was made.
+
+        A last line without line ending (e.g. partially written) is included if
+        it can be parsed, but it is parsed again next time.
+
+        Returns:
+            the rows of the last cycle of the previous read (the tail) followed
+            by the new rows.
+        """
+        offset = read_context["offset"]
+        with open(self.name, "rb") as f:
+            f.seek(offset)
+            appended = f.read()
+        end_of_last_line = appended.rfind(b"\n") + 1
+        complete, partial = appended[:end_of_last_line], appended[end_of_last_line:]
+        logging.debug(f"parsing {len(appended)} bytes from byte {offset}")
+
+        new_rows = [read_context["tail"]]
+        if complete.strip():
+            new_rows.append(self._parse_appended_lines(complete, read_context))
+        unconfirmed_rows = 0
+        previous_lines = read_context["check"] + complete
+        if partial.strip() and self._is_complete_line(partial, previous_lines):
+            try:
+                partial_rows = self._parse_appended_lines(partial, read_context)
+            except (ValueError, UnicodeDecodeError) as e:
+                logging.debug(f"skipping the unfinished last line ({e})")
+            else:
+                new_rows.append(partial_rows)
+                unconfirmed_rows = len(partial_rows)
+
+        self._read_context = dict(
+            read_context,
+            offset=offset + len(complete),
+            check=(read_context["check"] + complete)[-READ_CONTEXT_CHECK_LENGTH:],
+            unconfirmed_rows=unconfirmed_rows,
+        )
+        return pd.concat(new_rows, ignore_index=True)
+
+    def _parse_appended_lines(self, lines, read_context) -> pd.DataFrame:
+        lines = io.StringIO(lines.decode(self.encoding or "utf-8"))
+        for line_filter in self._line_filters:
+            lines = line_filter(lines)
+        return pd.read_csv(
+            pre_processors.FilteredLines(lines),
+            sep=self.sep,
+            header=None,
+            names=read_context["columns"],
+            usecols=read_context["usecols"],
+            dtype=read_context["dtype"] or None,
+            decimal=self.decimal,
+            thousands=self.thousands,
+        )
+
+    def _set_read_context_tail(self, data_df):
+        # keeping the (raw) rows of the last cycle, since the post-processors
+        # need the whole cycle when more data are added to it:
+        cycle_col = self.config_params.normal_headers_renaming_dict.get(
+            "cycle_index_txt", None
+        )
+        if cycle_col not in data_df.columns:
+            self._read_context = None
+            return
+        number_of_confirmed_rows = len(data_df) - self._read_context["unconfirmed_rows"]
+        confirmed = data_df.iloc[:number_of_confirmed_rows]
+        if confirmed.empty:
+            self._read_context["tail"] = confirmed.copy()
+            return
+        cycles = confirmed[cycle_col].to_numpy()
+        in_last_cycle = cycles == cycles[-1]
+        start = 0
+        if not in_last_cycle.all():
+            start = len(cycles) - np.argmin(in_last_cycle[::-1])
+        self._read_context["tail"] = confirmed.iloc[start:].copy()
+
     def _pre_process(self):
-        # create a copy of the file and set file_path attribute
+        processor_names = [
+            processor_name
+            for processor_name in self.pre_processors
+            if self.pre_processors[processor_name]
+        ]
+        for processor_name in processor_names:
+            if not hasattr(pre_processors, processor_name):
+                raise NotImplementedError(
+                    f"{processor_name} is not currently supported - aborting!"
+                )
+        if not processor_names:
+            return
+
+        # run the pre-processors as a single streaming pass when parsing the file
+        # (if all of them have line filters):
+        if all(name in pre_processors.LINE_FILTERS for name in processor_names):
+            logging.critical(
+                f"running pre-processors as line filters: {processor_names}"
+            )
+            self._line_filters = [
+                pre_processors.LINE_FILTERS[name] for name in processor_names
+            ]
+            return
+
+        # fallback: create a (decompressed) copy of the file and set file_path attribute
         temp_dir = pathlib.Path(tempfile.gettempdir())
-        temp_filename = temp_dir / self.name.name
-        shutil.copy2(self.name, temp_dir)
+        temp_filename = temp_dir / pre_processors.decompressed_name(self.name).name
+        if pre_processors.compression_of(self.name) is not None:
+            pre_processors.decompress(self.name, temp_filename)
+        else:
+            shutil.copy2(self.name, temp_dir)
         logging.debug(f"tmp file: {temp_filename}")
         self._file_path = temp_filename
 
-        for processor_name in self.pre_processors:
-            if self.pre_processors[processor_name]:
-                if hasattr(pre_processors, processor_name):
-                    logging.critical(f"running pre-processor: {processor_name}")
-                    processor = getattr(pre_processors, processor_name)
-                    self._file_path = processor(self._file_path)
-                else:
-                    raise NotImplementedError(
-                        f"{processor_name} is not currently supported - aborting!"
-                    )
+        for processor_name in processor_names:
+            logging.critical(f"running pre-processor: {processor_name}")
+            processor = getattr(pre_processors, processor_name)
+            self._file_path = processor(self._file_path)
 
     def loader(self, name: Union[str, pathlib.Path], **kwargs: str) -> List[core.Cell]:
         """returns a Cell object with loaded data.
@@ -431,23 +812,38 @@ class AutoLoader(BaseLoader):
         Loads data from Maccor txt file (csv-ish).
 
         Args:
-            name (str, pathlib.Path): name of the file.
+            name (str, pathlib.Path): name of the file (compressed files, i.e. .gz, .zst
+                or .zip, are decompressed while parsing).
             kwargs (dict): key-word arguments from raw_loader.
 
+        Keyword Args:
+            resume_from (core.FileID): FileID from a previous load of the (growing) file.
+                If the file has only been appended to, only the new lines are parsed and
+                the returned data starts with the last cycle of the previous load.
+
         Returns:
             new_tests (list of data objects)
         """
         self._file_path = pathlib.Path(name)
         self.name = pathlib.Path(name)
         pre_processor_hook = kwargs.pop("pre_processor_hook", None)
+        resume_from = kwargs.pop("resume_from", None)
         new_tests = []
+        self._line_filters = []
+        self._read_context = None
 
         if self.pre_processors:
             self._pre_process()
 
         self.parse_loader_parameters(**kwargs)
 
-        data_df = self.query_file(self._file_path)
+        read_context = self._resumable_read_context(resume_from)
+        if read_context is not None:
+            data_df = self._read_appended_csv(read_context)
+        else:
+            data_df = self.query_file(self._file_path)
+        if self._read_context is not None:
+            self._set_read_context_tail(data_df)
 
         if pre_processor_hook is not None:
             logging.debug("running pre-processing-hook")
@@ -469,6 +865,7 @@ class AutoLoader(BaseLoader):
 
         # Generating a FileID project:
         fid = core.FileID(name)
+        fid.read_context = self._read_context
         data.raw_data_files.append(fid)
 
         data.raw = data_df
@@ -559,9 +956,14 @@ class TxtLoader(AutoLoader, ABC):
             Remark that the configuration settings for the sub-model must include a list of column header names
             that should be kept if keep_all_columns is False (default).
 
+        engine (str): set to "pyarrow" to parse the file with the (multi-threaded) pyarrow engine.
+        chunk_size (int): parse the file in chunks with this number of rows (for very large files).
+
     Module - loader **kwargs:
         sep (str): the delimiter (also works as a switch to turn on/off automatic detection of delimiter and
             start of data (skiprows)).
+        engine (str): the engine used by pandas.read_csv (e.g. "pyarrow").
+        chunk_size (int): parse the file in chunks with this number of rows.
 
     """
 
@@ -573,6 +975,12 @@ class TxtLoader(AutoLoader, ABC):
         sep = kwargs.get("sep", None)
         if sep is not None:
             self.sep = sep
+        engine = kwargs.get("engine", None)
+        if engine is not None:
+            self.engine = engine
+        chunk_size = kwargs.get("chunk_size", None)
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
         if self.sep is None:
 
             self._auto_formatter()
@@ -636,13 +1044,5 @@ class TxtLoader(AutoLoader, ABC):
         logging.critical(
             f"{self.sep=}, {self.skiprows=}, {self.header=}, {self.encoding=}, {self.decimal=}"
         )
-        data_df = pd.read_csv(
-            name,
-            sep=self.sep,
-            skiprows=self.skiprows,
-            header=self.header,
-            encoding=self.encoding,
-            decimal=self.decimal,
-            thousands=self.thousands,
-        )
+        data_df = self._read_csv(name)
         return data_df
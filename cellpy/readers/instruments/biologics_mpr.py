@@ -2,6 +2,7 @@
 # This is based on the work by Chris Kerr
 # (https://github.com/chatcannon/galvani/blob/master/galvani/BioLogic.py)
 import datetime
+import mmap
 import shutil
 import tempfile
 import time
@@ -58,18 +59,51 @@ MINIMUM_SELECTION = [
 ]
 
 
-def _read_modules(fileobj):
-    module_magic = fileobj.read(len(b"MODULE"))
-    hdr_bytes = fileobj.read(hdr_dtype.itemsize)
-    hdr = np.fromstring(
-        hdr_bytes, dtype=hdr_dtype, count=1
-    )  # TODO: change to frombuffer
-    hdr_dict = dict(((n, hdr[n][0]) for n in hdr_dtype.names))
-    hdr_dict["offset"] = fileobj.tell()
-    hdr_dict["data"] = fileobj.read(hdr_dict["length"])
-    fileobj.seek(hdr_dict["offset"] + hdr_dict["length"], SEEK_SET)
-    hdr_dict["end"] = fileobj.tell()
-    return hdr_dict
+def _read_module_headers(buffer):
+    """Locate the modules in the file (only the module headers are read).
+
+    Args:
+        buffer: the content of the mpr-file (e.g. a mmap.mmap object).
+
+    Returns:
+        list of dictionaries with the header values and the position of the
+        module data (offset and end).
+    """
+    modules = []
+    position = len(mpr_label)
+    while position < len(buffer):
+        position += len(b"MODULE")
+        hdr_bytes = buffer[position : position + hdr_dtype.itemsize]
+        hdr = np.frombuffer(hdr_bytes, dtype=hdr_dtype, count=1)
+        hdr_dict = dict(((n, hdr[n][0]) for n in hdr_dtype.names))
+        hdr_dict["offset"] = position + hdr_dtype.itemsize
+        hdr_dict["end"] = hdr_dict["offset"] + int(hdr_dict["length"])
+        modules.append(hdr_dict)
+        position = hdr_dict["end"]
+    return modules
+
+
+def _find_module(modules, name, first=True):
+    found = None
+    for m in modules:
+        if m["shortname"].strip().decode() == name:
+            found = m
+            if first:
+                break
+    return found
+
+
+def _frame_from_buffer(buffer, dtype, count, offset):
+    """Create a DataFrame from binary data without intermediate copies.
+
+    The structured array is a view into the buffer, and each column is
+    copied directly from the buffer into the DataFrame.
+    """
+    bulk_data = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    df = pd.DataFrame(index=pd.RangeIndex(count))
+    for name in dtype.names:
+        df[name] = bulk_data[name]
+    return df
 
 
 class DataLoader(BaseLoader):
@@ -201,12 +235,6 @@ class DataLoader(BaseLoader):
         txt = "Filesize: %i (%s)" % (filesize, hfilesize)
         self.logger.debug(txt)
 
-        # creating temporary file and connection
-        temp_dir = tempfile.gettempdir()
-        temp_filename = os.path.join(temp_dir, os.path.basename(file_name))
-        shutil.copy2(file_name, temp_dir)
-
-        self.logger.debug("tmp file: %s" % temp_filename)
         self.logger.debug("HERE WE LOAD THE DATA")
 
         data = Cell()
@@ -234,7 +262,7 @@ class DataLoader(BaseLoader):
         self.mpr_log = None
         self.mpr_settings = None
 
-        self._load_mpr_data(temp_filename, bad_steps)
+        self._load_mpr_data(file_name, bad_steps)
         length_of_test = self.mpr_data.shape[0]
         self.logger.debug(f"length of test: {length_of_test}")
 
@@ -254,8 +282,6 @@ class DataLoader(BaseLoader):
 
         data.raw_data_files_length.append(length_of_test)
         new_tests.append(data)
-
-        self._clean_up(temp_filename)
         return new_tests
 
     def _parse_mpr_log_data(self):
@@ -301,115 +327,94 @@ class DataLoader(BaseLoader):
         if bad_steps is not None:
             warnings.warn("Exluding bad steps is not implemented")
 
-        stats_info = os.stat(filename)
-        mpr_modules = []
-
-        mpr_log = None
-        mpr_data = None
-        mpr_settings = None
-
-        file_obj = open(filename, mode="rb")
-        label = file_obj.read(len(mpr_label))
-        self.logger.debug(f"label: {label}")
-        counter = 0
-        while True:
-            counter += 1
-            new_module = _read_modules(file_obj)
-            position = int(new_module["end"])
-            mpr_modules.append(new_module)
-            if position >= stats_info.st_size:
-                txt = "-reached end of file"
-                if position == stats_info.st_size:
-                    txt += " --exactly at end of file"
-                self.logger.info(txt)
-                break
-
-        file_obj.close()
+        # the file is memory-mapped and only the needed modules are read
+        with open(filename, mode="rb") as file_obj, mmap.mmap(
+            file_obj.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buffer:
+            label = buffer[: len(mpr_label)]
+            self.logger.debug(f"label: {label}")
+            mpr_modules = _read_module_headers(buffer)
+            self.logger.debug(f"number of modules: {len(mpr_modules)}")
+
+            # ------------- set -----------------------------------
+            settings_mod = _find_module(mpr_modules, "VMP Set")
+            if settings_mod is None:
+                raise IOError("No settings-module found!")
+            settings_mod["data"] = buffer[settings_mod["offset"] : settings_mod["end"]]
+
+            self._parse_mpr_settings_data(settings_mod)
+
+            # ------------- data -----------------------------------
+            data_module = _find_module(mpr_modules, "VMP data", first=False)
+            if data_module is None:
+                raise IOError("No data module!")
+
+            data_version = data_module["version"]
+            data_offset = data_module["offset"]
+            data_headers = buffer[data_offset : data_offset + 405]
+            n_data_points = np.frombuffer(data_headers[:4], dtype="<u4")[0]
+            n_columns = np.frombuffer(data_headers[4:5], dtype="u1")[0]
+            logging.debug(f"data (points, cols): {n_data_points}, {n_columns}")
+
+            if data_version == 0:
+                logging.debug("data version 0")
+                column_types = np.frombuffer(
+                    data_headers[5:], dtype="u1", count=n_columns
+                )
+                remaining_headers = data_headers[5 + n_columns : 100]
+                main_data_offset = data_offset + 100
 
-        # ------------- set -----------------------------------
-        settings_mod = None
-        for m in mpr_modules:
-            if m["shortname"].strip().decode() == "VMP Set":
-                settings_mod = m
-                break
-        if settings_mod is None:
-            raise IOError("No settings-module found!")
-
-        self._parse_mpr_settings_data(settings_mod)
-
-        # ------------- data -----------------------------------
-        data_module = None
-        for m in mpr_modules:
-            if m["shortname"].strip().decode() == "VMP data":
-                data_module = m
-        if data_module is None:
-            raise IOError("No data module!")
-
-        data_version = data_module["version"]
-        n_data_points = np.fromstring(data_module["data"][:4], dtype="<u4")[0]
-        n_columns = np.fromstring(data_module["data"][4:5], dtype="u1")[0]
-        logging.debug(f"data (points, cols): {n_data_points}, {n_columns}")
-
-        if data_version == 0:
-            logging.debug("data version 0")
-            column_types = np.fromstring(
-                data_module["data"][5:], dtype="u1", count=n_columns
-            )
+            elif data_version == 2:
+                logging.debug("data version 2")
+                column_types = np.frombuffer(
+                    data_headers[5:], dtype="<u2", count=n_columns
+                )
+                remaining_headers = data_headers[5 + 2 * n_columns : 405]
+                main_data_offset = data_offset + 405
 
-            remaining_headers = data_module["data"][5 + n_columns : 100]
-            main_data = data_module["data"][100:]
+            else:
+                raise IOError("Unrecognised version for data module: %d" % data_version)
 
-        elif data_version == 2:
-            logging.debug("data version 2")
-            column_types = np.fromstring(
-                data_module["data"][5:], dtype="<u2", count=n_columns
-            )
-            main_data = data_module["data"][405:]
-            remaining_headers = data_module["data"][5 + 2 * n_columns : 405]
+            whats_left = remaining_headers.strip(b"\x00").decode("utf8")
+            if whats_left:
+                self.logger.debug("UPS! you have some columns left")
+                self.logger.debug(whats_left)
 
-        else:
-            raise IOError("Unrecognised version for data module: %d" % data_version)
+            dtype_dict = OrderedDict()
+            flags_dict = OrderedDict()
 
-        whats_left = remaining_headers.strip(b"\x00").decode("utf8")
-        if whats_left:
-            self.logger.debug("UPS! you have some columns left")
-            self.logger.debug(whats_left)
+            for col in column_types:
+                if col in bl_flags.keys():
+                    flags_dict[bl_flags[col][0]] = bl_flags[col][1]
 
-        dtype_dict = OrderedDict()
-        flags_dict = OrderedDict()
+                dtype_dict[bl_dtypes[col][1]] = bl_dtypes[col][0]
 
-        for col in column_types:
-            if col in bl_flags.keys():
-                flags_dict[bl_flags[col][0]] = bl_flags[col][1]
+            self.dtype_dict = dtype_dict
+            self.flags_dict = flags_dict
 
-            dtype_dict[bl_dtypes[col][1]] = bl_dtypes[col][0]
+            dtype = np.dtype(list(dtype_dict.items()))
 
-        self.dtype_dict = dtype_dict
-        self.flags_dict = flags_dict
+            p = dtype.itemsize
+            main_data_length = data_module["end"] - main_data_offset
+            if not p == (main_data_length / n_data_points):
+                self.logger.info(
+                    "WARNING! You have defined %i bytes, "
+                    "but it seems it should be %i"
+                    % (p, main_data_length / n_data_points)
+                )
+            mpr_data = _frame_from_buffer(
+                buffer, dtype, main_data_length // p, main_data_offset
+            )
 
-        dtype = np.dtype(list(dtype_dict.items()))
+            self.logger.debug(mpr_data.columns)
+            self.logger.debug(mpr_data.head())
 
-        p = dtype.itemsize
-        if not p == (len(main_data) / n_data_points):
-            self.logger.info(
-                "WARNING! You have defined %i bytes, "
-                "but it seems it should be %i" % (p, len(main_data) / n_data_points)
-            )
-        bulk = main_data
-        bulk_data = np.fromstring(bulk, dtype=dtype)
-        mpr_data = pd.DataFrame(bulk_data)
-
-        self.logger.debug(mpr_data.columns)
-        self.logger.debug(mpr_data.head())
-
-        # ------------- log  -----------------------------------
-        log_module = None
-        for m in mpr_modules:
-            if m["shortname"].strip().decode() == "VMP LOG":
-                log_module = m
-        if log_module is None:
-            txt = "error - no log module"
-            raise IOError(txt)
+            # ------------- log  -----------------------------------
+            log_module = _find_module(mpr_modules, "VMP LOG", first=False)
+            if log_module is None:
+                txt = "error - no log module"
+                raise IOError(txt)
+            log_module["data"] = buffer[log_module["offset"] : log_module["end"]]
 
         tm = time.strptime(log_module["date"].decode(), "%m.%d.%y")
         enddate = datetime.date(tm.tm_year, tm.tm_mon, tm.tm_mday)
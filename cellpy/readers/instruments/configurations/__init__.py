@@ -1,4 +1,7 @@
 """ Very simple implementation of a plugin-like infrastructure"""
+import copy
+import sys
+import threading
 from dataclasses import dataclass, field
 from importlib import import_module
 from pathlib import Path
@@ -25,6 +28,7 @@ OPTIONAL_DICTIONARY_ATTRIBUTE_NAMES = [
     "raw_limits",
     "states",
     "unit_labels",
+    "dtypes",
 ]
 OPTIONAL_LIST_ATTRIBUTE_NAMES = [
     "columns_to_keep",
@@ -59,6 +63,8 @@ class ModelParameters:
     normal_headers_renaming_dict: dict = field(default_factory=dict)
     not_implemented_in_cellpy_yet_renaming_dict: dict = field(default_factory=dict)
     columns_to_keep: list = field(default_factory=list)
+    # explicit dtypes (raw column name: dtype) used when parsing the raw file:
+    dtypes: dict = field(default_factory=dict)
     states: dict = field(default_factory=dict)
     raw_units: dict = field(default_factory=dict)
     raw_limits: dict = field(default_factory=dict)
@@ -70,16 +76,47 @@ class ModelParameters:
     prefixes: dict = field(default_factory=dict)
 
 
+# parsed configurations (the loaders get copies, since they are allowed to modify them):
+_configuration_cache = {}
+_configuration_cache_lock = threading.Lock()
+
+
+def clear_configuration_cache() -> None:
+    """Forget the parsed configurations (and the imported configuration modules)."""
+    with _configuration_cache_lock:
+        for key in _configuration_cache:
+            if key[0] == "module":
+                sys.modules.pop(key[1], None)
+        _configuration_cache.clear()
+
+
+def _cached_configuration(key, parse) -> ModelParameters:
+    with _configuration_cache_lock:
+        if key not in _configuration_cache:
+            _configuration_cache[key] = parse()
+        return copy.deepcopy(_configuration_cache[key])
+
+
 def register_local_configuration_from_yaml_file(instrument) -> ModelParameters:
     """register a module (.yml file) and return it.
 
     This function will dynamically import the given module from the
     cellpy.readers.instruments.configurations module and return it.
 
+    The parsed file is cached (and re-parsed only if the file is modified).
+
     Returns: ModelParameters
 
     """
 
+    stat = Path(instrument).stat()
+    key = ("yaml", str(Path(instrument).resolve()), stat.st_mtime_ns, stat.st_size)
+    return _cached_configuration(
+        key, lambda: _parse_local_configuration_from_yaml_file(instrument)
+    )
+
+
+def _parse_local_configuration_from_yaml_file(instrument) -> ModelParameters:
     yml = yaml.YAML()
     with open(instrument, "r") as ff:
         settings = yml.load(ff.read())
@@ -113,6 +150,7 @@ def register_local_configuration_from_yaml_file(instrument) -> ModelParameters:
             "not_implemented_in_cellpy_yet_renaming_dict"
         ],
         columns_to_keep=optional_list_attributes["columns_to_keep"],
+        dtypes=optional_dictionary_attributes["dtypes"],
         states=optional_dictionary_attributes["states"],
         raw_units=optional_dictionary_attributes["raw_units"],
         raw_limits=raw_limits,
@@ -135,15 +173,22 @@ def register_configuration_from_module(
     This function will dynamically import the given module from the
     cellpy.readers.instruments.configurations module and return it.
 
+    The parsed module is cached (unless the module itself is given as ``_m``).
+
     Returns: ModelParameters
     """
 
-    if _m is None:
-        if _module_path is None:
-            _m = import_module(f"{HARD_CODED_MODULE_PATH}.{module}")
-        else:
-            _m = import_module(f"{_module_path}.{module}")
+    if _m is not None:
+        return _parse_configuration_module(name, _m)
+
+    module_name = f"{_module_path or HARD_CODED_MODULE_PATH}.{module}"
+    return _cached_configuration(
+        ("module", module_name, name),
+        lambda: _parse_configuration_module(name, import_module(module_name)),
+    )
+
 
+def _parse_configuration_module(name, _m) -> ModelParameters:
     optional_dictionary_attributes = {
         key: getattr(_m, key, dict()) for key in OPTIONAL_DICTIONARY_ATTRIBUTE_NAMES
     }
@@ -171,6 +216,7 @@ def register_configuration_from_module(
             "not_implemented_in_cellpy_yet_renaming_dict"
         ],
         columns_to_keep=optional_list_attributes["columns_to_keep"],
+        dtypes=optional_dictionary_attributes["dtypes"],
         states=optional_dictionary_attributes["states"],
         raw_units=optional_dictionary_attributes["raw_units"],
         raw_limits=raw_limits,
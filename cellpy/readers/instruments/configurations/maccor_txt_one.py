@@ -82,6 +82,14 @@ columns_to_keep = [
     "DCIR/Ohms",
 ]
 
+# explicit dtypes used when parsing (the remaining columns are inferred):
+dtypes = {
+    "Amp-hr": "float64",
+    "Watt-hr": "float64",
+    "Amps": "float64",
+    "Volts": "float64",
+}
+
 states = {
     "column_name": "State",
     "charge_keys": ["C"],
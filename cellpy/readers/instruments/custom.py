@@ -141,15 +141,7 @@ class DataLoader(AutoLoader, ABC):
             logging.critical(
                 f"{self.sep=}, {self.skiprows=}, {self.header=}, {self.encoding=}, {self.decimal=}"
             )
-            data_df = pd.read_csv(
-                name,
-                sep=self.sep,
-                skiprows=self.skiprows,
-                header=self.header,
-                encoding=self.encoding,
-                decimal=self.decimal,
-                thousands=self.thousands,
-            )
+            data_df = self._read_csv(name)
         elif self.file_format == "xls":
             logging.debug(
                 f"parsing with pandas.read_excel using xlrd (old format): {name}"
@@ -12,6 +12,8 @@ from cellpy.parameters.internal_settings import get_headers_normal
 from cellpy.readers.core import Cell, FileID, humanize_bytes
 from cellpy.readers.instruments.base import BaseLoader
 
+TIMESTAMP_PATTERN = r"\d+:\d{2}:\d{2}(\.\d+)?"
+
 pec_headers_normal = dict()
 
 pec_headers_normal["step_index_txt"] = "Step"
@@ -106,7 +108,7 @@ class DataLoader(BaseLoader):
         # Mapping units to their conversion values
         logging.debug("retrieve pec units")
         units = {
-            "(Hours in hh:mm:ss.xxx)": self.timestamp_to_seconds,
+            "(Hours in hh:mm:ss.xxx)": self.timestamps_to_seconds,
             "(Decimal Hours)": 3600,
             "(Minutes)": 60,
             "(Seconds)": 1,
@@ -359,28 +361,16 @@ class DataLoader(BaseLoader):
         _w = pec_units["energy"] / raw_units["energy"]
 
         # Check if time is given in a units proportional to seconds or in a hh:mm:ss.xxx format
-        # Convert all hh:mm:ss.xxx formats to seconds using self.timestamp_to_seconds()
-        relevant_times = ["total_time", "step_time"]
-        for x in relevant_times:
+        # Convert all hh:mm:ss.xxx formats to seconds using self.timestamps_to_seconds()
+        relevant_times = {
+            "total_time": self.headers_normal.test_time_txt,
+            "step_time": self.headers_normal.step_time_txt,
+        }
+        for x, hdr in relevant_times.items():
             if isinstance(pec_times[x], (int, float)):
-                if x == relevant_times[0]:
-                    _tt = pec_times["total_time"] / raw_units["time"]
-                    self.pec_data[self.headers_normal.test_time_txt] *= _tt
-                elif x == relevant_times[1]:
-                    _st = pec_times["step_time"] / raw_units["time"]
-                    self.pec_data[self.headers_normal.step_time_txt] *= _st
+                self.pec_data[hdr] *= pec_times[x] / raw_units["time"]
             elif callable(pec_times[x]):
-                # EDIT jepe 18.06.2020: change to .apply(func) instead of for-loop
-                # (now the column is of float64 type and behaves properly)
-                if x == relevant_times[0]:
-                    # col = self.pec_data[self.headers_normal.test_time_txt]
-                    hdr = self.headers_normal.test_time_txt
-                elif x == relevant_times[1]:
-                    # col = self.pec_data[self.headers_normal.step_time_txt]
-                    hdr = self.headers_normal.test_time_txt
-                self.pec_data[hdr] = self.pec_data[hdr].apply(pec_times[x])
-                # for i in range(len(col)):
-                #     col[i] = pec_times[x](col[i])
+                self.pec_data[hdr] = pec_times[x](self.pec_data[hdr])
 
         v_txt = self.headers_normal.voltage_txt
         i_txt = self.headers_normal.current_txt
@@ -417,6 +407,21 @@ class DataLoader(BaseLoader):
 
         return skiprows
 
+    @staticmethod
+    def timestamps_to_seconds(timestamps: pd.Series) -> pd.Series:
+        """Changes hh:mm:ss.xxx time format to seconds (vectorized, hours can exceed 24).
+
+        Raises:
+            ValueError: if any of the timestamps is not in the hh:mm:ss.xxx format.
+        """
+        valid = timestamps.astype(str).str.fullmatch(TIMESTAMP_PATTERN)
+        if not valid.all():
+            bad_timestamp = timestamps[~valid].iloc[0]
+            raise ValueError(
+                f"could not parse timestamp (hh:mm:ss.xxx): {bad_timestamp}"
+            )
+        return pd.to_timedelta(timestamps).dt.total_seconds()
+
     @staticmethod
     def timestamp_to_seconds(timestamp):  # Changes hh:mm:s.xxx time format to seconds
         total_secs = 0
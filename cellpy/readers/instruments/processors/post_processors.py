@@ -210,22 +210,54 @@ def cumulate_capacity_within_cycle(data: Cell, config_params: ModelParameters) -
     # state_column = config_params.states["column_name"]
     # is_charge = config_params.states["charge_keys"]
     # is_discharge = config_params.states["discharge_keys"]
-    cycles = data.raw.groupby("cycle_index")
-    cumulated = []
+    cycle_hdr = "cycle_index"
+    step_hdr = "step_index"
     charge_hdr = "charge_capacity"
     discharge_hdr = "discharge_capacity"
 
-    for i, (cycle_number, cycle) in enumerate(cycles):
-        steps = cycle.groupby("step_index")
-        last_charge = 0.0
-        last_discharge = 0.0
-        for step_number, step in steps:
-            step[charge_hdr] = step[charge_hdr] + last_charge
-            step[discharge_hdr] = step[discharge_hdr] + last_discharge
-            last_charge = step.at[step.index[-1], charge_hdr]
-            last_discharge = step.at[step.index[-1], discharge_hdr]
-            cumulated.append(step)
-    data.raw = pd.concat(cumulated)
+    raw = data.raw
+    # rows are ordered by cycle and step (and rows without cycle or step are removed)
+    # as when grouping by cycle and step:
+    has_cycle_and_step = (raw[cycle_hdr].notna() & raw[step_hdr].notna()).to_numpy()
+    if not has_cycle_and_step.all():
+        raw = raw.take(np.flatnonzero(has_cycle_and_step))
+    cycles = raw[cycle_hdr].to_numpy()
+    steps = raw[step_hdr].to_numpy()
+    ordered = (cycles[1:] > cycles[:-1]) | (
+        (cycles[1:] == cycles[:-1]) & (steps[1:] >= steps[:-1])
+    )
+    if not ordered.all():
+        raw = raw.sort_values([cycle_hdr, step_hdr], kind="stable")
+        cycles = raw[cycle_hdr].to_numpy()
+        steps = raw[step_hdr].to_numpy()
+    if raw.empty:
+        data.raw = raw
+        return data
+
+    new_cycle = np.r_[True, cycles[1:] != cycles[:-1]]
+    new_step = new_cycle | np.r_[True, steps[1:] != steps[:-1]]
+    step_number = np.cumsum(new_step) - 1
+    step_last_row = np.r_[np.flatnonzero(new_step)[1:] - 1, len(raw) - 1]
+    step_cycle = np.cumsum(new_cycle)[new_step]
+
+    for hdr in [charge_hdr, discharge_hdr]:
+        values = raw[hdr].to_numpy()
+        # the end value of each step is added to the values of the following
+        # steps within the same cycle (a shifted cumsum for each cycle):
+        step_end = pd.Series(values[step_last_row], dtype=np.float64)
+        end_is_nan = step_end.isna()
+        offset = step_end.fillna(0.0).groupby(step_cycle).cumsum()
+        offset = offset.groupby(step_cycle).shift(1, fill_value=0.0)
+        previous_nan = (
+            end_is_nan.groupby(step_cycle)
+            .cumsum()
+            .groupby(step_cycle)
+            .shift(1, fill_value=0)
+        )
+        offset[previous_nan > 0] = np.nan
+        raw[hdr] = values + offset.to_numpy()[step_number]
+
+    data.raw = raw
     return data
 
 
@@ -301,8 +333,6 @@ def _state_splitter(
     """
     if base_col_name is None:
         base_col_name = headers_normal.charge_capacity_txt
-    cycle_index_hdr = headers_normal.cycle_index_txt
-    data_point = headers_normal.data_point_txt
 
     if to_numeric:
         raw[base_col_name] = pd.to_numeric(raw[base_col_name], errors="coerce")
@@ -314,65 +344,108 @@ def _state_splitter(
             "discharge_keys": ["D"],
             "rest_keys": ["R"],
         }
-    state_column = states["column_name"]
-    charge_keys = states["charge_keys"]
-    rest_keys = states["rest_keys"]
-    discharge_keys = states["discharge_keys"]
 
-    raw[temp_col_name_charge] = 0
-    if temp_col_name_charge != temp_col_name_discharge:
-        raw[temp_col_name_discharge] = 0
+    # the same temporary column for charge and discharge means that they
+    # are split into the same new column:
+    splits = [(states["charge_keys"], n_charge, temp_col_name_charge)]
+    splits.append((states["discharge_keys"], n_discharge, temp_col_name_discharge))
+    new_col_names = {temp_col_name_charge: new_col_name_charge}
+    new_col_names.setdefault(temp_col_name_discharge, new_col_name_discharge)
+
+    try:
+        new_columns = _split_states(raw, base_col_name, states, splits, propagate)
+    except KeyError as e:
+        logging.debug(f"could not split states vectorized ({e}) - using cycle by cycle")
+        new_columns = _split_states_per_cycle(
+            raw, base_col_name, states, splits, propagate
+        )
+
+    for temp_col_name, new_col_name in new_col_names.items():
+        raw[new_col_name] = new_columns[temp_col_name]
+    return raw
+
 
+def _split_states(raw, base_col_name, states, splits, propagate) -> dict:
+    # state masks are calculated once, and the last value within each cycle is
+    # propagated using a lookup by cycle (grouped) instead of one mask per cycle.
+    cycle_index_hdr = headers_normal.cycle_index_txt
+    data_point = headers_normal.data_point_txt
+
+    cycles = raw[cycle_index_hdr]
+    in_cycle = cycles.notna().to_numpy()
+    values = raw[base_col_name].to_numpy(dtype=np.float64)
+    has_value = ~np.isnan(values)
+    data_points = raw[data_point].to_numpy(dtype=np.float64)
+    state = raw[states["column_name"]]
+
+    new_columns = {temp_col_name: np.zeros(len(raw)) for _, _, temp_col_name in splits}
+    # keeping integers as integers (as pandas does when updating an integer column),
+    # i.e. unless a non-integer (or nan) is written to the column:
+    integer_columns = {temp_col_name: True for _, _, temp_col_name in splits}
+    for keys, n, temp_col_name in splits:
+        new_values = new_columns[temp_col_name]
+        selected = state.isin(keys).to_numpy() & in_cycle
+        written = n * values[selected & has_value]
+        new_values[selected & has_value] = written
+        integer_columns[temp_col_name] &= _all_integers(written)
+        if propagate and selected.any():
+            last = (
+                raw.loc[selected, [cycle_index_hdr, data_point, base_col_name]]
+                .drop_duplicates(subset=cycle_index_hdr, keep="last")
+                .set_index(cycle_index_hdr)
+            )
+            last_data_point = cycles.map(last[data_point]).to_numpy(dtype=np.float64)
+            last_value = cycles.map(last[base_col_name]).to_numpy(dtype=np.float64)
+            with np.errstate(invalid="ignore"):
+                after_last = data_points > last_data_point
+            new_values[after_last] = last_value[after_last]
+            # (the last values are written even if no rows come after them)
+            integer_columns[temp_col_name] &= _all_integers(
+                last[base_col_name].to_numpy(dtype=np.float64)
+            )
+
+    for temp_col_name, new_values in new_columns.items():
+        if integer_columns[temp_col_name]:
+            new_columns[temp_col_name] = new_values.astype(np.int64)
+    return new_columns
+
+
+def _all_integers(values: np.ndarray) -> bool:
+    return bool(np.isfinite(values).all() and (values == np.round(values)).all())
+
+
+def _split_states_per_cycle(raw, base_col_name, states, splits, propagate) -> dict:
+    cycle_index_hdr = headers_normal.cycle_index_txt
+    data_point = headers_normal.data_point_txt
+    state_column = states["column_name"]
+
+    new_columns = {
+        temp_col_name: pd.Series(0, index=raw.index) for _, _, temp_col_name in splits
+    }
     cycle_numbers = raw[cycle_index_hdr].unique()
-    good_cycles = []
     bad_cycles = []
 
     for i in cycle_numbers:
         try:
-            charge = raw.loc[
-                (raw[state_column].isin(charge_keys)) & (raw[cycle_index_hdr] == i),
-                [data_point, base_col_name],
-            ]
-
-            discharge = raw.loc[
-                (raw[state_column].isin(discharge_keys)) & (raw[cycle_index_hdr] == i),
-                [data_point, base_col_name],
-            ]
-
-            if not charge.empty:
-                raw[temp_col_name_charge].update(n_charge * charge[base_col_name])
-                if propagate:
-                    charge_last_index, charge_last_val = charge.iloc[-1]
-                    raw.loc[
-                        (raw[data_point] > charge_last_index)
-                        & (raw[cycle_index_hdr] == i),
-                        temp_col_name_charge,
-                    ] = charge_last_val
-
-            if not discharge.empty:
-                raw[temp_col_name_discharge].update(
-                    n_discharge * discharge[base_col_name]
-                )
-                if propagate:
-                    (discharge_last_index, discharge_last_val) = discharge.iloc[-1]
-                    raw.loc[
-                        (raw[data_point] > discharge_last_index)
-                        & (raw[cycle_index_hdr] == i),
-                        temp_col_name_discharge,
-                    ] = discharge_last_val
-            good_cycles.append(i)
+            for keys, n, temp_col_name in splits:
+                new_values = new_columns[temp_col_name]
+                selected = raw.loc[
+                    (raw[state_column].isin(keys)) & (raw[cycle_index_hdr] == i),
+                    [data_point, base_col_name],
+                ]
+                if not selected.empty:
+                    new_values.update(n * selected[base_col_name])
+                    if propagate:
+                        last_index, last_val = selected.iloc[-1]
+                        new_values.loc[
+                            (raw[data_point] > last_index) & (raw[cycle_index_hdr] == i)
+                        ] = last_val
 
         except Exception:
             bad_cycles.append(i)
     if bad_cycles:
         logging.critical(f"The data contains bad cycles: {bad_cycles}")
-
-    raw[new_col_name_charge] = raw[temp_col_name_charge]
-    raw = raw.drop([temp_col_name_charge], axis=1)
-    if temp_col_name_charge != temp_col_name_discharge:
-        raw[new_col_name_discharge] = raw[temp_col_name_discharge]
-        raw = raw.drop([temp_col_name_discharge], axis=1)
-    return raw
+    return new_columns
 
 
 def split_current(data: Cell, config_params: ModelParameters) -> Cell:
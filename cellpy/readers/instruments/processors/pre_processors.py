@@ -5,13 +5,284 @@ All methods must implement the following parameters/arguments:
 
 All methods should return None (i.e. nothing).
 
+Pre-processors that also have a line filter (registered in ``LINE_FILTERS``) can be
+run as a single streaming pass over the file (see ``open_filtered``) instead of
+writing a new file for each step. Line filters take an iterable of lines
+and yield the lines to keep.
+
+Compressed files (``COMPRESSIONS``) are decompressed while they are read (see
+``open_decompressed``), the decompression runs in a separate thread so that it
+overlaps with the parsing.
+
 """
 
+import contextlib
+import gzip
+import io
 import logging
 import pathlib
+import queue
+import shutil
 import tempfile
+import threading
 import uuid
-from typing import Union
+import zipfile
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+# file extensions of the supported compressed files (and the compression):
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd", ".zip": "zip"}
+DECOMPRESSION_BLOCK_SIZE = 1024 * 1024
+# max number of decompressed blocks waiting to be read:
+DECOMPRESSION_QUEUE_SIZE = 16
+
+
+def filter_empty_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Line filter version of ``remove_empty_lines``."""
+    for line in lines:
+        if line.strip():
+            yield f"{line.strip()}\n"
+
+
+LINE_FILTERS = {
+    "remove_empty_lines": filter_empty_lines,
+}
+
+
+class FilteredLines(io.TextIOBase):
+    """Read-only text stream of lines (e.g. from a chain of line filters)."""
+
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._buffer = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: int = -1) -> str:
+        if self._buffer:
+            end = self._buffer.find("\n") + 1 or len(self._buffer)
+            line, self._buffer = self._buffer[:end], self._buffer[end:]
+            return line
+        return next(self._lines, "")
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            text = self._buffer + "".join(self._lines)
+            self._buffer = ""
+            return text
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while length < size:
+            line = next(self._lines, "")
+            if not line:
+                break
+            parts.append(line)
+            length += len(line)
+        text = "".join(parts)
+        self._buffer = text[size:]
+        return text[:size]
+
+
+class HeadOfFile(io.RawIOBase):
+    """Read-only binary stream of the first bytes of a file (e.g. a growing file)."""
+
+    def __init__(self, file, size: int):
+        self._file = file
+        self._remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[: len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def compression_of(filename: Union[str, pathlib.Path]) -> Optional[str]:
+    """The compression of the file (from the file extension) or None."""
+    return COMPRESSIONS.get(pathlib.Path(filename).suffix.lower())
+
+
+def decompressed_name(filename: Union[str, pathlib.Path]) -> pathlib.Path:
+    """The file name without the compression extension (data.csv.gz -> data.csv)."""
+    filename = pathlib.Path(filename)
+    if compression_of(filename) is None:
+        return filename
+    return filename.with_suffix("")
+
+
+def _open_compressed(filename, compression, stack):
+    if compression == "gzip":
+        return stack.enter_context(gzip.open(filename, "rb"))
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                f"zstandard is needed for reading {filename} (pip install zstandard)"
+            )
+        file = stack.enter_context(open(filename, "rb"))
+        decompressor = zstandard.ZstdDecompressor()
+        return stack.enter_context(decompressor.stream_reader(file))
+    if compression == "zip":
+        archive = stack.enter_context(zipfile.ZipFile(filename))
+        members = [member for member in archive.infolist() if not member.is_dir()]
+        if len(members) != 1:
+            raise IOError(
+                f"{filename} contains {len(members)} files (expected exactly one)"
+            )
+        return stack.enter_context(archive.open(members[0]))
+    raise ValueError(f"compression {compression} is not supported")
+
+
+class ThreadedReader(io.RawIOBase):
+    """Read-only binary stream reading a file in a separate thread.
+
+    The blocks are read (i.e. decompressed) ahead of the consumer, so that
+    reading the file (decompression releases the GIL) runs in parallel with
+    parsing it.
+    """
+
+    def __init__(self, file, block_size: int = DECOMPRESSION_BLOCK_SIZE):
+        self._file = file
+        self._block_size = block_size
+        self._blocks = queue.Queue(maxsize=DECOMPRESSION_QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(target=self._read_blocks, daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read_blocks(self):
+        try:
+            while True:
+                block = self._file.read(self._block_size)
+                if not block or not self._put(block):
+                    break
+        except Exception as e:
+            self._put(e)
+        self._put(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._buffer:
+            if self._eof:
+                return 0
+            block = self._blocks.get()
+            if isinstance(block, Exception):
+                self._eof = True
+                raise block
+            if not block:
+                self._eof = True
+                return 0
+            self._buffer = memoryview(block)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+
+@contextlib.contextmanager
+def open_decompressed(
+    filename: Union[str, pathlib.Path], threaded: bool = True
+) -> Iterator[io.IOBase]:
+    """Open a compressed file as a (decompressed) binary stream.
+
+    Args:
+        filename: path to the file (.gz, .zst or a .zip with one file).
+        threaded: decompress in a separate thread (ahead of the reading).
+
+    Yields:
+        binary stream that can be given directly to e.g. pandas.read_csv.
+    """
+    compression = compression_of(filename)
+    logging.debug(f"decompressing {filename} ({compression})")
+    with contextlib.ExitStack() as stack:
+        file = _open_compressed(filename, compression, stack)
+        if threaded:
+            file = stack.enter_context(io.BufferedReader(ThreadedReader(file)))
+        yield file
+
+
+@contextlib.contextmanager
+def open_text(
+    filename: Union[str, pathlib.Path], encoding: str = None
+) -> Iterator[io.TextIOBase]:
+    """Open a (possibly compressed) file as a text stream."""
+    if compression_of(filename) is None:
+        with open(filename, "r", encoding=encoding, newline="") as file:
+            yield file
+    else:
+        with open_decompressed(filename) as file:
+            yield io.TextIOWrapper(file, encoding=encoding, newline="")
+
+
+def decompress(
+    filename: Union[str, pathlib.Path], out_file_name: Union[str, pathlib.Path]
+) -> pathlib.Path:
+    """Write the decompressed content of the file to out_file_name."""
+    with open_decompressed(filename) as file, open(out_file_name, "wb") as out_file:
+        shutil.copyfileobj(file, out_file, DECOMPRESSION_BLOCK_SIZE)
+    return pathlib.Path(out_file_name)
+
+
+@contextlib.contextmanager
+def open_head(filename: Union[str, pathlib.Path], size: int) -> Iterator[io.IOBase]:
+    """Open the first size bytes of a file as a binary stream."""
+    with open(filename, "rb") as file:
+        yield io.BufferedReader(HeadOfFile(file, size))
+
+
+@contextlib.contextmanager
+def open_filtered(
+    filename: Union[str, pathlib.Path],
+    line_filters: List[Callable[[Iterable[str]], Iterator[str]]],
+    encoding: str = None,
+    size: int = None,
+) -> Iterator[FilteredLines]:
+    """Open a file as a text stream with the line filters applied (in one pass).
+
+    Args:
+        filename: path to the file (decompressed while reading if compressed).
+        line_filters: the line filters to chain (in order).
+        encoding: encoding of the file.
+        size: only read the first size bytes of the file.
+
+    Yields:
+        FilteredLines stream that can be given directly to e.g. pandas.read_csv.
+    """
+    with contextlib.ExitStack() as stack:
+        if size is None:
+            file = stack.enter_context(open_text(filename, encoding=encoding))
+        else:
+            head = stack.enter_context(open_head(filename, size))
+            file = io.TextIOWrapper(head, encoding=encoding, newline="")
+        lines = file
+        for line_filter in line_filters:
+            lines = line_filter(lines)
+        yield FilteredLines(lines)
 
 
 def remove_empty_lines(
@@ -19,8 +290,8 @@ def remove_empty_lines(
 ) -> pathlib.Path:
     """Remove all the empty lines in the file.
 
-    The method saves to the same name as the original file, so it is recommended to work on a temporary
-    copy of the file instead of the original file.
+    The method saves to a new file in the same directory as the original file, so it is recommended
+    to work on a temporary copy of the file instead of the original file.
 
     Args:
         filename: path to the file.
@@ -40,11 +311,8 @@ def remove_empty_lines(
         raise IOError(f"Could not find the file ({filename})")
     out_file_name = filename.parent / (str(uuid.uuid4()) + ".txt")
 
-    with open(filename, "r+") as file:
+    with open(filename, "r") as file:
         with open(out_file_name, "w") as out_file:
-            for line in file.readlines():
-
-                if line.strip():
-                    out_file.write(f"{line.strip()}\n")
+            out_file.writelines(filter_empty_lines(file))
 
     return out_file_name
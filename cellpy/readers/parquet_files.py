@@ -0,0 +1,197 @@
+"""Reading and writing cellpy-files using Apache Parquet (through pyarrow).
+
+A parquet cellpy-file is a directory containing one parquet file for each of
+the tables (raw, steps, summary, meta and fid). The raw data is written with
+row groups that are split between cycles so that selecting cycles only needs
+to decode the row groups containing them. The files can be read by any tool
+supporting parquet (e.g. ``pandas.read_parquet("cell.cpq/raw.parquet")``).
+
+pyarrow is an optional dependency (``pip install pyarrow``).
+"""
+
+import logging
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from cellpy.parameters import prms
+from cellpy.parameters.internal_settings import (
+    get_headers_normal,
+    get_headers_step_table,
+    get_headers_summary,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pyarrow_available = True
+except ImportError:
+    pyarrow_available = False
+
+hdr_normal = get_headers_normal()
+hdr_steps = get_headers_step_table()
+hdr_summary = get_headers_summary()
+
+
+def _check_pyarrow():
+    if not pyarrow_available:
+        raise ImportError(
+            "pyarrow is needed for reading and writing parquet cellpy-files "
+            "(pip install pyarrow)"
+        )
+
+
+def is_parquet_cellpy_file(filename):
+    """Check if the file name points to (or should be) a parquet cellpy-file."""
+    filename = pathlib.Path(filename)
+    if filename.suffix == f".{prms._cellpyfile_parquet_extension}":
+        return True
+    return filename.is_dir() and (filename / "meta.parquet").is_file()
+
+
+def _table_file(filename, table):
+    return pathlib.Path(filename) / f"{table}.parquet"
+
+
+def _to_arrow_table(df, preserve_index=True):
+    try:
+        return pa.Table.from_pandas(df, preserve_index=preserve_index)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        # columns with mixed types (e.g. str and float) are stored as str
+        df = df.copy()
+        for col in df.select_dtypes(include="object").columns:
+            df[col] = df[col].map(lambda x: x if x is None else str(x))
+        return pa.Table.from_pandas(df, preserve_index=preserve_index)
+
+
+def _row_group_boundaries(cycles, row_group_size):
+    # positions where new row groups start (only at the start of a new cycle)
+    cycle_starts = np.flatnonzero(np.diff(cycles)) + 1
+    boundaries = [0]
+    for start in cycle_starts:
+        if start - boundaries[-1] >= row_group_size:
+            boundaries.append(int(start))
+    boundaries.append(len(cycles))
+    return boundaries
+
+
+def _write_raw(filename, raw, row_group_size, compression):
+    table = _to_arrow_table(raw, preserve_index=False)
+    cycle_header = hdr_normal.cycle_index_txt
+    if raw.empty or cycle_header not in raw.columns:
+        pq.write_table(table, filename, compression=compression)
+        return
+
+    boundaries = _row_group_boundaries(raw[cycle_header].values, row_group_size)
+    logging.debug(f"writing raw data in {len(boundaries) - 1} row groups")
+    with pq.ParquetWriter(filename, table.schema, compression=compression) as writer:
+        for start, stop in zip(boundaries[:-1], boundaries[1:]):
+            writer.write_table(
+                table.slice(start, stop - start), row_group_size=stop - start
+            )
+
+
+def write_cellpy_parquet(
+    filename, raw, steps, summary, meta, fid, row_group_size=None, compression=None
+):
+    """Write the tables of a cell to a parquet cellpy-file.
+
+    Args:
+        filename (str or pathlib.Path): name of the cellpy-file (directory).
+        raw (pandas.DataFrame): the raw data.
+        steps (pandas.DataFrame): the step table.
+        summary (pandas.DataFrame): the summary.
+        meta (pandas.DataFrame): the meta data (infotable).
+        fid (pandas.DataFrame): the file id table.
+        row_group_size (int): the minimum number of rows in each row group
+            of the raw data (defaults to prms._cellpyfile_parquet_row_group_size).
+        compression (str): compression used (defaults to
+            prms._cellpyfile_parquet_compression).
+    """
+    _check_pyarrow()
+    if row_group_size is None:
+        row_group_size = prms._cellpyfile_parquet_row_group_size
+    if compression is None:
+        compression = prms._cellpyfile_parquet_compression
+
+    directory = pathlib.Path(filename)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    _write_raw(_table_file(directory, "raw"), raw, row_group_size, compression)
+    if fid is not None and "raw_data_fid" in fid.columns:
+        # the FileID objects are re-created from the other columns when loading
+        fid = fid.drop(columns="raw_data_fid")
+    for table, df in zip(
+        ["steps", "summary", "meta", "fid"], [steps, summary, meta, fid]
+    ):
+        if df is None:
+            df = pd.DataFrame()
+        pq.write_table(
+            _to_arrow_table(df), _table_file(directory, table), compression=compression
+        )
+
+
+def _cycle_filters(column, selector):
+    if selector is None:
+        return None
+    conditions = []
+    if selector["min_cycle"] is not None:
+        conditions.append((column, ">=", int(selector["min_cycle"])))
+    if selector["max_cycle"] is not None:
+        conditions.append((column, "<=", int(selector["max_cycle"])))
+    if selector["cycles"] is not None:
+        conditions.append((column, "in", [int(c) for c in selector["cycles"]]))
+    return conditions or None
+
+
+def _read_table(filename, columns=None, filters=None):
+    return pq.read_table(
+        filename,
+        columns=columns,
+        filters=filters,
+        use_threads=True,
+        memory_map=True,
+    ).to_pandas()
+
+
+def read_cellpy_parquet(filename, selector=None):
+    """Read the tables from a parquet cellpy-file.
+
+    Args:
+        filename (str or pathlib.Path): name of the cellpy-file (directory).
+        selector (dict): unpacked selector (see CellpyData._unpack_selector),
+            the cycle selection and the raw columns are pushed down to the
+            parquet reader (only the needed row groups and columns are read).
+
+    Returns:
+        dictionary with the tables (raw, steps, summary, meta and fid).
+    """
+    _check_pyarrow()
+    filename = pathlib.Path(filename)
+    raw_columns = None if selector is None else selector["columns"]
+    if raw_columns is not None:
+        schema_names = pq.read_schema(_table_file(filename, "raw")).names
+        raw_columns = [col for col in raw_columns if col in schema_names]
+
+    tables = dict()
+    raw = _read_table(
+        _table_file(filename, "raw"),
+        columns=raw_columns,
+        filters=_cycle_filters(hdr_normal.cycle_index_txt, selector),
+    )
+    if hdr_normal.data_point_txt in raw.columns:
+        raw = raw.set_index(hdr_normal.data_point_txt, drop=False)
+    tables["raw"] = raw
+    tables["steps"] = _read_table(
+        _table_file(filename, "steps"),
+        filters=_cycle_filters(hdr_steps.cycle, selector),
+    )
+    tables["summary"] = _read_table(
+        _table_file(filename, "summary"),
+        filters=_cycle_filters(hdr_summary.cycle_index, selector),
+    )
+    tables["meta"] = _read_table(_table_file(filename, "meta"))
+    tables["fid"] = _read_table(_table_file(filename, "fid"))
+    return tables
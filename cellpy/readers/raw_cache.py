@@ -0,0 +1,267 @@
+"""Local (opt-in) cache for the cells parsed from raw-files.
+
+The cache is content addressed: the key is made from a hash of the content of
+the raw-file together with the loader (instrument, model and configuration),
+the loader arguments and the ``prms.Reader`` settings. The content hash is
+only re-computed when the file stats (size and modification time, as stored in
+FileID) change. Each entry stores the data frames of the cells (raw, summary
+and steps) as parquet files and the rest of the cell objects pickled. Entries
+are removed (least recently used first) when the total size of the cache
+exceeds ``prms.Reader.raw_cache_max_size``.
+
+Turn it on by setting ``prms.Reader.raw_cache = True`` (the entries are stored
+in ``prms.Reader.raw_cache_dir``). pyarrow is needed (``pip install pyarrow``).
+"""
+
+import copy
+import dataclasses
+import hashlib
+import logging
+import os
+import pathlib
+import pickle
+import shutil
+import uuid
+
+import pandas as pd
+
+import cellpy._version
+from cellpy.parameters import prms
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pyarrow_available = True
+except ImportError:
+    pyarrow_available = False
+
+FRAMES = ["raw", "summary", "steps"]
+CELLS_FILE_NAME = "cells.pickle"
+FINGERPRINTS_DIR_NAME = "fingerprints"
+BLOCK_SIZE = 1024 * 1024
+# prms.Reader settings that do not influence the loaded data:
+_SETTINGS_NOT_IN_KEY = ["raw_cache", "raw_cache_dir", "raw_cache_max_size"]
+
+
+def cache_dir() -> pathlib.Path:
+    """The directory used for the cache."""
+    if prms.Reader.raw_cache_dir:
+        return pathlib.Path(prms.Reader.raw_cache_dir)
+    return pathlib.Path(prms.user_dir) / ".cellpy_raw_cache"
+
+
+def _hash(txt: str) -> str:
+    return hashlib.blake2b(txt.encode(), digest_size=16).hexdigest()
+
+
+def _write_atomic(file_name, data: bytes):
+    tmp_file_name = file_name.with_name(f"{file_name.name}.{uuid.uuid4().hex}.tmp")
+    tmp_file_name.write_bytes(data)
+    os.replace(tmp_file_name, file_name)
+
+
+def file_fingerprint(file_name, directory=None) -> str:
+    """Hash of the content of the file.
+
+    The hash is stored in the cache directory (using the file stats as key) so that
+    the file is only read again if it has been modified (or moved).
+
+    Args:
+        file_name (str or pathlib.Path): the raw-file.
+        directory (pathlib.Path): the cache directory (defaults to cache_dir()).
+
+    Returns:
+        hex-digest (str)
+    """
+    file_name = pathlib.Path(file_name).resolve()
+    directory = pathlib.Path(directory or cache_dir()) / FINGERPRINTS_DIR_NAME
+    fid_st = os.stat(file_name)
+    stat_key = _hash(f"{file_name}|{fid_st.st_size}|{fid_st.st_mtime_ns}")
+    fingerprint_file = directory / stat_key
+    if fingerprint_file.is_file():
+        return fingerprint_file.read_text()
+
+    logging.debug(f"calculating fingerprint for {file_name}")
+    content_hash = hashlib.blake2b(digest_size=16)
+    with open(file_name, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            content_hash.update(block)
+    fingerprint = content_hash.hexdigest()
+    directory.mkdir(parents=True, exist_ok=True)
+    _write_atomic(fingerprint_file, fingerprint.encode())
+    return fingerprint
+
+
+def cache_key(file_name, loader_info=None, directory=None, **kwargs) -> str:
+    """Create the key for the entry in the cache.
+
+    Args:
+        file_name (str or pathlib.Path): the raw-file.
+        loader_info: anything describing the loader (must have a stable repr).
+        directory (pathlib.Path): the cache directory (defaults to cache_dir()).
+        **kwargs: the arguments sent to the loader.
+
+    Returns:
+        key (str)
+    """
+    settings = {
+        key: value
+        for key, value in dataclasses.asdict(prms.Reader).items()
+        if key not in _SETTINGS_NOT_IN_KEY
+    }
+    key_material = [
+        file_fingerprint(file_name, directory),
+        cellpy._version.__version__,
+        repr(loader_info),
+        repr(sorted((key, repr(value)) for key, value in kwargs.items())),
+        repr(sorted(settings.items())),
+    ]
+    return _hash("|".join(key_material))
+
+
+def _use_cache(file_name, kwargs) -> bool:
+    if not prms.Reader.raw_cache:
+        return False
+    if not pyarrow_available:
+        logging.debug("pyarrow is needed for the raw cache")
+        return False
+    if kwargs.get("pre_processor_hook") is not None:
+        logging.debug("not using the raw cache (got a pre_processor_hook)")
+        return False
+    return os.path.isfile(file_name)
+
+
+def _entry_size(entry) -> int:
+    return sum(f.stat().st_size for f in entry.iterdir())
+
+
+def _store(entry, cells):
+    tmp_entry = entry.with_name(f"{entry.name}.{uuid.uuid4().hex}.tmp")
+    tmp_entry.mkdir(parents=True)
+    try:
+        stripped_cells = []
+        for number, cell in enumerate(cells):
+            stripped_cell = copy.copy(cell)
+            for frame in FRAMES:
+                df = getattr(cell, frame, None)
+                if isinstance(df, pd.DataFrame) and not df.empty:
+                    table = pa.Table.from_pandas(df, preserve_index=True)
+                    pq.write_table(table, tmp_entry / f"{frame}_{number}.parquet")
+                    setattr(stripped_cell, frame, pd.DataFrame())
+            stripped_cells.append(stripped_cell)
+        _write_atomic(tmp_entry / CELLS_FILE_NAME, pickle.dumps(stripped_cells))
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # another process stored the same entry first
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        raise
+
+
+def _retrieve(entry):
+    cells = pickle.loads((entry / CELLS_FILE_NAME).read_bytes())
+    for number, cell in enumerate(cells):
+        for frame in FRAMES:
+            frame_file = entry / f"{frame}_{number}.parquet"
+            if frame_file.is_file():
+                setattr(cell, frame, pq.read_table(frame_file).to_pandas())
+    # marking the entry as recently used:
+    os.utime(entry)
+    return cells
+
+
+def evict(directory=None, max_size=None) -> int:
+    """Remove the least recently used entries until the cache is small enough.
+
+    Args:
+        directory (pathlib.Path): the cache directory (defaults to cache_dir()).
+        max_size (int): max total size in bytes (defaults to
+            prms.Reader.raw_cache_max_size).
+
+    Returns:
+        number of entries removed.
+    """
+    directory = pathlib.Path(directory or cache_dir())
+    if max_size is None:
+        max_size = prms.Reader.raw_cache_max_size
+    if max_size is None or not directory.is_dir():
+        return 0
+
+    entries = [
+        entry
+        for entry in directory.iterdir()
+        if entry.is_dir()
+        and entry.name != FINGERPRINTS_DIR_NAME
+        and not entry.name.endswith(".tmp")
+    ]
+    entries = sorted(
+        ((entry.stat().st_mtime, entry, _entry_size(entry)) for entry in entries),
+        key=lambda x: x[0],
+    )
+    total_size = sum(size for _, _, size in entries)
+    removed = 0
+    for _, entry, size in entries:
+        if total_size <= max_size:
+            break
+        logging.debug(f"removing {entry.name} from the raw cache")
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
+        removed += 1
+    return removed
+
+
+def clear(directory=None):
+    """Remove all the entries (and fingerprints) from the cache."""
+    directory = pathlib.Path(directory or cache_dir())
+    if directory.is_dir():
+        shutil.rmtree(directory)
+
+
+def load(loader, file_name, loader_info=None, **kwargs) -> list:
+    """Load the raw-file using the loader (or get the cells from the cache).
+
+    The cache is only used if prms.Reader.raw_cache is True (and the raw-file
+    is a file and no pre_processor_hook is given).
+
+    Args:
+        loader (callable): the loader (returns a list of cells when called with the
+            file name and the kwargs).
+        file_name (str or pathlib.Path): the raw-file.
+        loader_info: anything describing the loader (used in the cache key,
+            must have a stable repr).
+        **kwargs: sent to the loader.
+
+    Returns:
+        list of cells
+    """
+    if not _use_cache(file_name, kwargs):
+        return loader(file_name, **kwargs)
+
+    directory = cache_dir()
+    entry = directory / cache_key(file_name, loader_info, directory=directory, **kwargs)
+    if entry.is_dir():
+        try:
+            cells = _retrieve(entry)
+        except Exception as e:
+            logging.debug(f"could not read {entry.name} from the raw cache: {e}")
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            logging.debug(f"got {file_name} from the raw cache ({entry.name})")
+            for cell in cells:
+                # the same content could have been loaded from another file:
+                cell.loaded_from = file_name
+                if len(cell.raw_data_files) == 1:
+                    cell.raw_data_files[0].populate(file_name)
+            return cells
+
+    cells = loader(file_name, **kwargs)
+    try:
+        _store(entry, cells)
+    except Exception as e:
+        logging.debug(f"could not store {file_name} in the raw cache: {e}")
+    else:
+        evict(directory)
+    return cells
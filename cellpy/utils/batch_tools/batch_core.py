@@ -216,7 +216,7 @@ class Data(collections.UserDict):
 
     def __look_up__(self, cell_id):
         try:
-            if not self.experiment.cell_data_frames[cell_id].cell.raw.empty:
+            if self.experiment.cell_data_frames[cell_id].cell.has_data:
                 return self.experiment.cell_data_frames[cell_id]
             else:
                 raise AttributeError
@@ -227,18 +227,14 @@ class Data(collections.UserDict):
             pages = self.experiment.journal.pages
             info = pages.loc[cell_id, :]
             cellpy_file = info[hdr_journal.cellpy_file_name]
-            # linking (query_mode) not implemented yet - loading whole file in mem instead
-            if not self.query_mode:
-                # TODO: modify _load_cellpy_file so that it can select parts of the data (max_cycle etc)
-                cell = self.experiment._load_cellpy_file(cellpy_file)
-                self.experiment.cell_data_frames[cell_id] = cell
-                # trick for making tab-completion work:
-                self.accessors[
-                    self._create_accessor_label(cell_id)
-                ] = self.experiment.cell_data_frames[cell_id]
-                return cell
-            else:
-                raise NotImplementedError
+            # in query_mode, the raw data is left in the file (lazy loading)
+            cell = self.experiment._load_cellpy_file(cellpy_file, lazy=self.query_mode)
+            self.experiment.cell_data_frames[cell_id] = cell
+            # trick for making tab-completion work:
+            self.accessors[
+                self._create_accessor_label(cell_id)
+            ] = self.experiment.cell_data_frames[cell_id]
+            return cell
 
 
 class BaseExperiment(metaclass=abc.ABCMeta):
@@ -320,14 +316,14 @@ class BaseExperiment(metaclass=abc.ABCMeta):
         self._data = None
         self.cell_data_frames[cell_label] = cellpy_object
 
-    def _load_cellpy_file(self, file_name):
+    def _load_cellpy_file(self, file_name, lazy=False):
         # TODO: modify this so that it can select parts of the data (max_cycle etc)
         selector = dict()
         cellpy_data = cellreader.CellpyData()
         if self.max_cycle:
             cellpy_data.overwrite_able = False
             selector["max_cycle"] = self.max_cycle
-        cellpy_data.load(file_name, self.parent_level, selector=selector)
+        cellpy_data.load(file_name, self.parent_level, selector=selector, lazy=lazy)
         logging.info(f" <- grabbing ( {file_name} )")
         return cellpy_data
 
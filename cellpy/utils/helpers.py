@@ -1084,3 +1084,39 @@ def load_and_save_resfile(filename, outfile=None, outdir=None, mass=1.00):
     d.save(filename=outfile)
     d.to_csv(datadir=outdir, cycles=True, raw=True, summary=True)
     return outfile
+
+
+def convert_cellpy_file(
+    filename, new_filename=None, backend="parquet", overwrite=False
+):
+    """Convert a cellpy-file to another storage backend.
+
+    Args:
+        filename (str or pathlib.Path): name of the cellpy-file to convert.
+        new_filename (str or pathlib.Path): optional, name of the new cellpy-file
+            (defaults to filename with the extension for the backend). The
+            extension of new_filename decides the backend.
+        backend (str): "parquet" or "hdf5".
+        overwrite (bool): overwrite new_filename if it exists.
+
+    Returns:
+        new_filename (pathlib.Path): name of the new cellpy-file.
+    """
+    if backend == "parquet":
+        extension = prms._cellpyfile_parquet_extension
+    elif backend == "hdf5":
+        extension = "h5"
+    else:
+        raise ValueError(f"unknown backend: {backend} (use 'parquet' or 'hdf5')")
+
+    filename = pathlib.Path(filename)
+    if new_filename is None:
+        new_filename = filename.with_suffix(f".{extension}")
+    new_filename = pathlib.Path(new_filename)
+    if new_filename.resolve() == filename.resolve():
+        raise ValueError("the new file name must differ from the old file name")
+
+    c = CellpyData()
+    c.load(filename)
+    c.save(new_filename, overwrite=overwrite)
+    return new_filename
@@ -338,6 +338,21 @@ def test(c):
     c.run("pytest --cov=cellpy tests/")
 
 
+@task
+def benchmark(c, rows="10000", formats=None, compare=False):
+    """Run the loader benchmarks (using synthetic raw-files)
+
+    The results are saved (in .benchmarks) and can be compared with the
+    previous run (e.g. for another version of cellpy) using --compare.
+    """
+    command = f"pytest benchmarks --synthetic-rows={rows} --benchmark-autosave"
+    if formats:
+        command += f" --synthetic-formats={formats}"
+    if compare:
+        command += " --benchmark-compare"
+    c.run(command)
+
+
 def _get_bump_tag(bump):
     bump_tags = {
         "nano": "tag-num",
@@ -0,0 +1,187 @@
+import importlib
+import logging
+import os
+import sqlite3
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellpy import log, prms
+from cellpy.readers.instruments import arbin_res
+
+log.setup_logging(default_level=logging.DEBUG, testing=True)
+
+benchmark_available = importlib.util.find_spec("pytest_benchmark") is not None
+needs_posix = pytest.mark.skipif(os.name != "posix", reason="needs sh and cat")
+
+
+def _normal_table(number_of_points=50_000):
+    rng = np.random.default_rng(42)
+    data_point = np.arange(1, number_of_points + 1)
+    return pd.DataFrame(
+        {
+            "Test_ID": 1,
+            "Data_Point": data_point,
+            "Test_Time": data_point * 10.0,
+            "Step_Time": (data_point % 100) * 10.0,
+            "DateTime": 43000.0 + data_point / 8640.0,
+            "Step_Index": (data_point // 100) % 8 + 1,
+            "Cycle_Index": data_point // 800 + 1,
+            "Current": rng.normal(size=number_of_points),
+            "Voltage": rng.normal(size=number_of_points),
+            "Charge_Capacity": rng.random(number_of_points),
+            "Discharge_Capacity": rng.random(number_of_points),
+            "Internal_Resistance": rng.random(number_of_points),
+        }
+    )
+
+
+@pytest.fixture(scope="module")
+def normal_table_connection():
+    """In-memory SQLite stand-in for the normal table in a res-file."""
+    normal_df = _normal_table()
+    conn = sqlite3.connect(":memory:")
+    normal_df.to_sql(arbin_res.TABLE_NAMES["normal"], conn, index=False)
+    yield conn
+    conn.close()
+
+
+def _load_normal_table(conn, chunk_size):
+    loader = arbin_res.DataLoader()
+    prms.Instruments.Arbin.chunk_size = chunk_size
+    try:
+        return loader._load_res_normal_table(conn, 1, None, None)
+    finally:
+        prms.Instruments.Arbin.chunk_size = None
+
+
+def _peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("chunk_size", [2_000, 20_000])
+def test_load_normal_table_in_chunks(normal_table_connection, chunk_size):
+    length, normal_df = _load_normal_table(normal_table_connection, None)
+    chunked_length, chunked_df = _load_normal_table(normal_table_connection, chunk_size)
+    assert chunked_length == length == 50_000
+    pd.testing.assert_frame_equal(chunked_df, normal_df)
+
+
+def test_load_normal_table_in_chunks_max_chunks(normal_table_connection):
+    prms.Instruments.Arbin.max_chunks = 3
+    try:
+        length, normal_df = _load_normal_table(normal_table_connection, 10_000)
+    finally:
+        prms.Instruments.Arbin.max_chunks = None
+    assert length == 30_000
+    assert normal_df["Data_Point"].iloc[-1] == 30_000
+
+
+def test_load_normal_table_in_chunks_compact(normal_table_connection):
+    prms.Reader.compact_dtypes = True
+    try:
+        length, normal_df = _load_normal_table(normal_table_connection, 10_000)
+    finally:
+        prms.Reader.compact_dtypes = False
+    assert length == 50_000
+    assert normal_df["Cycle_Index"].dtype == np.int16
+    assert normal_df["Data_Point"].dtype == np.int32
+
+
+def test_load_normal_table_in_chunks_peak_memory(monkeypatch, normal_table_connection):
+    monkeypatch.setattr(prms.Reader, "compact_dtypes", True)
+    peak = _peak_memory(_load_normal_table, normal_table_connection, None)
+    chunked_peak = _peak_memory(_load_normal_table, normal_table_connection, 10_000)
+    assert chunked_peak < peak
+
+
+@pytest.mark.skipif(not benchmark_available, reason="needs pytest-benchmark")
+@pytest.mark.benchmark(group="arbin-res-normal-table", timer=time.time, warmup=False)
+@pytest.mark.parametrize("chunk_size", [None, 2_000, 20_000])
+def test_benchmark_load_normal_table(normal_table_connection, benchmark, chunk_size):
+    length, _ = benchmark(_load_normal_table, normal_table_connection, chunk_size)
+    assert length == 50_000
+    benchmark.extra_info["peak_memory"] = _peak_memory(
+        _load_normal_table, normal_table_connection, chunk_size
+    )
+
+
+@pytest.fixture(scope="module")
+def mdb_export_file(tmp_path_factory):
+    """Csv-file standing in for the output of mdb-export (two tests, extra column)."""
+    test_1 = _normal_table(20_000)
+    test_2 = _normal_table(5_000).assign(Test_ID=2)
+    normal_df = pd.concat([test_1, test_2], ignore_index=True)
+    normal_df["dV/dt"] = 0.0
+    file_name = tmp_path_factory.mktemp("mdb_export") / "normal_table.csv"
+    normal_df.to_csv(file_name, index=False)
+    return file_name, normal_df
+
+
+class _MdbExport:
+    """Replacement for DataLoader._start_mdb_export streaming a csv-file."""
+
+    def __init__(self, file_name, delay=None):
+        self.command = f"cat '{file_name}'"
+        if delay is not None:
+            self.command += f"; sleep {delay}"
+        self.processes = []
+
+    def __call__(self, temp_filename, table_name):
+        process = subprocess.Popen(["sh", "-c", self.command], stdout=subprocess.PIPE)
+        self.processes.append(process)
+        return process
+
+
+@needs_posix
+@pytest.mark.parametrize("select_minimal", [False, True])
+def test_load_posix_res_normal_table(monkeypatch, mdb_export_file, select_minimal):
+    file_name, normal_df = mdb_export_file
+    loader = arbin_res.DataLoader()
+    mdb_export = _MdbExport(file_name)
+    monkeypatch.setattr(loader, "_start_mdb_export", mdb_export)
+    monkeypatch.setattr(prms.Instruments.Arbin, "chunk_size", 3_000)
+    monkeypatch.setattr(prms.Reader, "select_minimal", select_minimal)
+
+    length, loaded_df = loader._load_posix_res_normal_table(
+        "file.res", 1, bad_steps=[(1, 2)], data_points=(100, 15_000)
+    )
+
+    expected = normal_df[
+        (normal_df["Test_ID"] == 1)
+        & ~((normal_df["Cycle_Index"] == 1) & (normal_df["Step_Index"] == 2))
+        & (normal_df["Data_Point"] >= 100)
+        & (normal_df["Data_Point"] <= 15_000)
+    ]
+    if select_minimal:
+        expected = expected.drop(columns="dV/dt")
+    assert length == len(expected) == 14_801
+    pd.testing.assert_frame_equal(loaded_df, expected)
+    assert mdb_export.processes[0].returncode == 0
+
+
+@needs_posix
+def test_iter_mdb_table_stops_mdb_export(monkeypatch, mdb_export_file):
+    file_name, _ = mdb_export_file
+    loader = arbin_res.DataLoader()
+    mdb_export = _MdbExport(file_name, delay=60)
+    monkeypatch.setattr(loader, "_start_mdb_export", mdb_export)
+
+    start = time.time()
+    chunks = loader._iter_mdb_table("file.res", "table", 1_000)
+    assert len(next(chunks)) == 1_000
+    chunks.close()
+    # mdb-export is killed when stopping reading before it has finished:
+    process = mdb_export.processes[0]
+    assert process.returncode == -9
+    assert process.stdout.closed
+    assert time.time() - start < 30
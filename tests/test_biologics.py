@@ -23,3 +23,27 @@ def test_set_instrument(cellpy_data_instance, parameters):
     # temp_dir = tempfile.mkdtemp()
     # cellpy_data_instance.to_csv(datadir=temp_dir)
     # shutil.rmtree(temp_dir)
+
+
+def test_read_module_headers(parameters):
+    import mmap
+
+    from cellpy.readers.instruments import biologics_mpr
+
+    with open(parameters.mpr_file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buffer:
+        modules = biologics_mpr._read_module_headers(buffer)
+        assert modules[-1]["end"] == len(buffer)
+    names = [m["shortname"].strip().decode() for m in modules]
+    assert names[:3] == ["VMP Set", "VMP data", "VMP LOG"]
+
+
+def test_loader(parameters):
+    from cellpy.readers.instruments import biologics_mpr
+
+    loader = biologics_mpr.DataLoader()
+    data = loader.loader(parameters.mpr_file_path)[0]
+    assert data.raw.shape == (23561, 40)
+    assert data.raw["test_time"].is_monotonic_increasing
+    assert all(data.raw[col].values.flags["C_CONTIGUOUS"] for col in data.raw.columns)
@@ -5,6 +5,8 @@ import pathlib
 import shutil
 import tempfile
 
+import numpy as np
+import pandas as pd
 import pytest
 
 import cellpy.readers.core
@@ -280,6 +282,98 @@ def test_sget_timestamp(dataset):
     assert x.iloc[0] == pytest.approx(287559.945, 0.01)
 
 
+def test_segment_index_select(dataset):
+    raw = dataset.cell.raw
+    c_txt = dataset.headers_normal.cycle_index_txt
+    s_txt = dataset.headers_normal.step_index_txt
+    segment_index = dataset.cell.segment_index
+    for cycle, step in [(1, 1), (3, 5), (4, [5, 6]), (18, 2)]:
+        steps = step if isinstance(step, list) else [step]
+        expected = raw[(raw[c_txt] == cycle) & (raw[s_txt].isin(steps))]
+        selected = segment_index.select(raw, cycle, step)
+        pd.testing.assert_frame_equal(selected, expected)
+    assert segment_index.select(raw, 10_000, 1).empty
+
+
+def test_segment_index_unsorted(dataset):
+    raw = dataset.cell.raw
+    dataset.cell.raw = pd.concat([raw.iloc[500:], raw.iloc[:500]])
+    raw = dataset.cell.raw
+    c_txt = dataset.headers_normal.cycle_index_txt
+    expected = raw[raw[c_txt] == 1]
+    selected = dataset.cell.segment_index.select(raw, 1)
+    pd.testing.assert_frame_equal(selected, expected)
+
+
+def test_segment_index_reset_when_raw_replaced(dataset):
+    segment_index = dataset.cell.segment_index
+    assert dataset.cell.segment_index is segment_index
+    dataset.cell.raw = dataset.cell.raw.iloc[:1000]
+    assert dataset.cell.segment_index is not segment_index
+    assert dataset.cell.segment_index.number_of_rows == 1000
+
+
+def test_segment_index_reset_when_raw_modified_in_place(dataset):
+    raw = dataset.cell.raw
+    c_txt = dataset.headers_normal.cycle_index_txt
+    s_txt = dataset.headers_normal.step_index_txt
+    step = dataset.get_step_numbers(steptype="charge", cycle_number=3)[3][0]
+    segment_index = dataset.cell.segment_index
+    dataset.sget_voltage(3, step)
+
+    raw[c_txt] += 1
+    assert dataset.cell.segment_index is not segment_index
+    expected = raw[(raw[c_txt] == 3) & (raw[s_txt] == step)]
+    assert len(dataset.sget_voltage(3, step)) == len(expected)
+
+
+def test_segment_index_boundaries(dataset):
+    raw = dataset.cell.raw
+    c_txt = dataset.headers_normal.cycle_index_txt
+    s_txt = dataset.headers_normal.step_index_txt
+    cycles, steps = [1, 3, 18, 10_000], [1, 5, 10, 1]
+    first, last = dataset.cell.segment_index.boundaries(cycles, steps)
+    for cycle, step, f, l in zip(cycles[:-1], steps[:-1], first, last):
+        rows = np.flatnonzero((raw[c_txt] == cycle) & (raw[s_txt] == step))
+        assert (f, l) == (rows[0], rows[-1])
+    assert (first[-1], last[-1]) == (-1, -1)
+
+
+def test_select_last_with_missing_cycle(dataset, caplog):
+    raw = dataset.cell.raw
+    c_txt = dataset.headers_normal.cycle_index_txt
+    d_txt = dataset.headers_normal.data_point_txt
+    raw = raw.loc[raw[c_txt] != 3]
+    last_items = dataset._select_last(raw)
+    expected = raw.groupby(c_txt)[d_txt].max()
+    assert sorted(raw.loc[last_items, d_txt]) == sorted(expected)
+    assert "1 cycle(s) missing: [3]" in caplog.text
+
+
+def test_make_summary_ir_and_end_voltage(dataset):
+    dataset.make_summary(find_ir=True, find_end_voltage=True)
+    summary = dataset.cell.summary
+    raw = dataset.cell.raw
+    hdr = dataset.headers_normal
+    discharge_steps = dataset.get_step_numbers(steptype="discharge")
+    for i in [0, 4, len(summary) - 1]:
+        cycle = summary.index[i]
+        step = discharge_steps[cycle][-1]
+        selected = raw[
+            (raw[hdr.cycle_index_txt] == cycle) & (raw[hdr.step_index_txt] == step)
+        ]
+        assert summary[dataset.headers_summary.end_voltage_discharge].iloc[
+            i
+        ] == pytest.approx(selected[hdr.voltage_txt].iloc[-1])
+        step = discharge_steps[cycle][0]
+        selected = raw[
+            (raw[hdr.cycle_index_txt] == cycle) & (raw[hdr.step_index_txt] == step)
+        ]
+        assert summary[dataset.headers_summary.ir_discharge].iloc[i] == pytest.approx(
+            selected[hdr.internal_resistance_txt].iloc[0]
+        )
+
+
 @pytest.mark.parametrize(
     "cycle, in_minutes, full, expected",
     [
@@ -520,6 +614,61 @@ def test_make_step_table_skip_steps(cellpy_data_instance, parameters):
     assert len(cellpy_data_instance.cell.steps) == 87
 
 
+@pytest.mark.parametrize(
+    "file_name, instrument, model, kwargs",
+    [
+        ("cellpy_file_path", None, None, {}),
+        ("nw_file_path", "neware_txt", "UIO", {}),
+        ("mcc_file_path", "maccor_txt", "one", {"sep": "\t"}),
+        ("pec_file_path", "pec_csv", None, {}),
+    ],
+)
+@pytest.mark.parametrize(
+    "step_kwargs", [{}, {"all_steps": True}, {"skip_steps": [1, 10]}]
+)
+def test_make_step_table_engine_parity(
+    cellpy_data_instance,
+    parameters,
+    file_name,
+    instrument,
+    model,
+    kwargs,
+    step_kwargs,
+):
+    file_name = getattr(parameters, file_name)
+    if instrument is None:
+        cellpy_data_instance.load(file_name)
+    else:
+        cellpy_data_instance.set_instrument(instrument=instrument, model=model)
+        cellpy_data_instance.from_raw(file_name, **kwargs)
+    cellpy_data_instance.set_mass(1.0)
+
+    cellpy_data_instance.make_step_table(engine="pandas", **step_kwargs)
+    steps_pandas = cellpy_data_instance.cell.steps
+    cellpy_data_instance.make_step_table(engine="numpy", **step_kwargs)
+    steps_numpy = cellpy_data_instance.cell.steps
+
+    pd.testing.assert_frame_equal(steps_pandas, steps_numpy)
+
+
+def test_make_step_table_engine_parity_unsorted(dataset):
+    # repeating a step within a cycle (e.g. GITT) makes non-contiguous groups
+    raw = dataset.cell.raw
+    dataset.cell.raw = pd.concat([raw.iloc[1000:], raw.iloc[:1000]])
+
+    dataset.make_step_table(engine="pandas")
+    steps_pandas = dataset.cell.steps
+    dataset.make_step_table(engine="numpy")
+    steps_numpy = dataset.cell.steps
+
+    pd.testing.assert_frame_equal(steps_pandas, steps_numpy)
+
+
+def test_make_step_table_unknown_engine(dataset):
+    with pytest.raises(ValueError):
+        dataset.make_step_table(engine="not-an-engine")
+
+
 def test_make_summary(cellpy_data_instance, parameters):
     cellpy_data_instance.from_raw(parameters.res_file_path)
     cellpy_data_instance.set_mass(1.0)
@@ -610,6 +759,41 @@ def test_get_capacity(dataset):
     assert len(df) == 438
 
 
+@pytest.mark.parametrize("cap_type", ["charge", "discharge"])
+def test_get_capacities(dataset, cap_type):
+    cycles = dataset.get_cycle_numbers()
+    curves = dataset.get_capacities(cycles, cap_type=cap_type)
+    assert set(curves.keys()).issubset(cycles)
+    assert len(curves) >= len(cycles) - 1  # last cycle has no charge step
+    get_single = dataset.get_ccap if cap_type == "charge" else dataset.get_dcap
+    for cycle in [1, 5, 17]:
+        c, v = get_single(cycle)
+        pd.testing.assert_series_equal(curves[cycle][0], c)
+        pd.testing.assert_series_equal(curves[cycle][1], v)
+
+
+def test_get_cap_all_cycles(dataset):
+    df = dataset.get_cap(label_cycle_number=True, inter_cycle_shift=False)
+    df_5 = dataset.get_cap(cycle=5, label_cycle_number=True, inter_cycle_shift=False)
+    assert set(df.cycle.unique()).issubset(dataset.get_cycle_numbers())
+    pd.testing.assert_frame_equal(
+        df.loc[df.cycle == 5].reset_index(drop=True), df_5.reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize("method", ["back-and-forth", "forth"])
+def test_get_cap_inter_cycle_shift(dataset, method):
+    cycles = [2, 3, 4]
+    df = dataset.get_cap(cycles, method=method, shift=1.0, label_cycle_number=True)
+    # each cycle continues from where the previous cycle ended:
+    previous_end = 1.0
+    for cycle in cycles:
+        unshifted = dataset.get_cap(cycle, method=method, shift=0.0)
+        shifted = df.loc[df.cycle == cycle, "capacity"].values
+        np.testing.assert_allclose(shifted, unshifted.capacity.values + previous_end)
+        previous_end = shifted[-1]
+
+
 def test_save_cellpyfile_with_extension(cellpy_data_instance, parameters):
     cellpy_data_instance.loadcell(parameters.res_file_path)
     cellpy_data_instance.make_summary(find_ir=True)
@@ -688,6 +872,195 @@ def test_cellpyfile_roundtrip(tmp_path, parameters):
     cdi.make_summary(find_ocv=False, find_ir=True, find_end_voltage=True)
 
 
+def test_load_lazy(tmp_path, dataset):
+    from cellpy import cellreader
+
+    cellpy_file_name = pathlib.Path(tmp_path) / "lazy.h5"
+    dataset.save(cellpy_file_name)
+    eager = cellreader.CellpyData().load(cellpy_file_name)
+    lazy = cellreader.CellpyData().load(cellpy_file_name, lazy=True)
+    assert lazy.cell.is_lazy
+    assert lazy.cell.has_data
+    pd.testing.assert_frame_equal(lazy.cell.summary, eager.cell.summary)
+
+    pd.testing.assert_frame_equal(
+        lazy.get_cap(cycle=[5, 10], label_cycle_number=True),
+        eager.get_cap(cycle=[5, 10], label_cycle_number=True),
+    )
+    pd.testing.assert_series_equal(lazy.sget_voltage(3, 5), eager.sget_voltage(3, 5))
+    pd.testing.assert_frame_equal(
+        lazy.get_ocv(cycles=[2, 3]), eager.get_ocv(cycles=[2, 3])
+    )
+    assert lazy.cell.is_lazy
+
+    pd.testing.assert_frame_equal(lazy.cell.raw, eager.cell.raw)
+    assert not lazy.cell.is_lazy
+
+
+def test_save_creates_table_indexes(tmp_path, dataset):
+    import tables
+
+    cellpy_file_name = pathlib.Path(tmp_path) / "indexed.h5"
+    dataset.save(cellpy_file_name)
+    with tables.open_file(cellpy_file_name) as h5:
+        raw = h5.get_node("/CellpyData/raw/table")
+        steps = h5.get_node("/CellpyData/steps/table")
+        assert set(raw.colindexes) == {"index", "cycle_index"}
+        assert raw.colindexes["cycle_index"].kind == "full"
+        assert set(steps.colindexes) == {"index", "cycle"}
+
+
+@pytest.mark.parametrize(
+    "selector,expected_cycles",
+    [
+        (dict(max_cycle=5), [1, 2, 3, 4, 5]),
+        (dict(cycles=(3, 6)), [3, 4, 5, 6]),
+        (dict(cycles=[2, 7, 8, 17]), [2, 7, 8, 17]),
+        (dict(min_cycle=15), [15, 16, 17, 18]),
+        (dict(cycles=(3, 6), columns=["voltage"]), [3, 4, 5, 6]),
+    ],
+)
+def test_load_with_selector(tmp_path, dataset, selector, expected_cycles):
+    from cellpy import cellreader
+
+    cellpy_file_name = pathlib.Path(tmp_path) / "selector.h5"
+    dataset.save(cellpy_file_name)
+    full = cellreader.CellpyData().load(cellpy_file_name).cell
+    c = cellreader.CellpyData().load(cellpy_file_name, selector=selector).cell
+
+    assert sorted(c.raw.cycle_index.unique()) == expected_cycles
+    assert sorted(c.steps.cycle.unique()) == expected_cycles
+    assert sorted(c.summary.index) == expected_cycles
+
+    expected_raw = full.raw.loc[full.raw.cycle_index.isin(expected_cycles)]
+    if "columns" in selector:
+        assert list(c.raw.columns) == [
+            "data_point",
+            "cycle_index",
+            "step_index",
+            "voltage",
+        ]
+        expected_raw = expected_raw[c.raw.columns]
+    pd.testing.assert_frame_equal(c.raw, expected_raw)
+
+
+def _neware_cell(file_name):
+    from cellpy import cellreader
+
+    c = cellreader.CellpyData()
+    c.set_instrument("neware_txt", model="UIO")
+    c.from_raw(file_name)
+    c.make_step_table()
+    c.make_summary(find_ir=True, find_end_voltage=True)
+    return c
+
+
+@pytest.mark.parametrize("number_of_lines", [2000, 5000])
+def test_dev_update(tmp_path, parameters, number_of_lines):
+    raw_file_name = pathlib.Path(tmp_path) / parameters.nw_file_name
+    with open(parameters.nw_file_path) as f:
+        lines = f.readlines()
+    with open(raw_file_name, "w") as f:
+        f.writelines(lines[:number_of_lines])
+
+    c = _neware_cell(raw_file_name)
+    shutil.copy(parameters.nw_file_path, raw_file_name)
+    c.dev_update(find_ir=True, find_end_voltage=True)
+
+    expected = _neware_cell(parameters.nw_file_path)
+    assert len(c.cells) == 1
+    assert c.cell.raw_data_files[0].last_data_point == len(lines) - 1
+    pd.testing.assert_frame_equal(c.cell.raw, expected.cell.raw)
+    pd.testing.assert_frame_equal(c.cell.steps, expected.cell.steps)
+    pd.testing.assert_frame_equal(c.cell.summary, expected.cell.summary)
+
+
+@pytest.mark.parametrize("number_of_lines", [2000, 5000])
+def test_dev_update_resumes_reading(tmp_path, parameters, number_of_lines, monkeypatch):
+    from cellpy.readers.instruments.base import AutoLoader
+
+    raw_file_name = pathlib.Path(tmp_path) / parameters.nw_file_name
+    with open(parameters.nw_file_path, "rb") as f:
+        content = f.read()
+    lines = content.splitlines(keepends=True)
+    partial_line = lines[number_of_lines][:20]
+    with open(raw_file_name, "wb") as f:
+        f.writelines(lines[:number_of_lines] + [partial_line])
+
+    c = _neware_cell(raw_file_name)
+    fid = c.cell.raw_data_files[0]
+    assert fid.read_context["offset"] == len(b"".join(lines[:number_of_lines]))
+
+    # only the appended bytes should be parsed:
+    def query_file(self, name):
+        raise AssertionError("parsing the whole file")
+
+    monkeypatch.setattr(AutoLoader, "query_file", query_file)
+    with open(raw_file_name, "ab") as f:
+        f.write(content[len(b"".join(lines[:number_of_lines])) + 20 :])
+    c.dev_update(find_ir=True, find_end_voltage=True)
+    monkeypatch.undo()
+
+    expected = _neware_cell(parameters.nw_file_path)
+    assert c.cell.raw_data_files[0].read_context["offset"] == content.rfind(b"\n") + 1
+    pd.testing.assert_frame_equal(c.cell.raw, expected.cell.raw)
+    pd.testing.assert_frame_equal(c.cell.steps, expected.cell.steps)
+    pd.testing.assert_frame_equal(c.cell.summary, expected.cell.summary)
+
+
+def test_compact_dtypes():
+    raw = pd.DataFrame(
+        {
+            "data_point": np.arange(1, 40001, dtype=np.int64),
+            "cycle_index": np.repeat(np.arange(1, 5, dtype=np.int64), 10000),
+            "step_index": np.ones(40000),
+            "voltage": np.linspace(0.05, 1.0, 40000),
+            "test_time": np.linspace(0.0, 4e5, 40000) + 1e-4,
+        }
+    )
+    cellpy.readers.core.compact_dtypes(raw)
+    assert raw.data_point.dtype == np.int32
+    assert raw.cycle_index.dtype == np.int16
+    assert raw.step_index.dtype == np.int16
+    assert raw.voltage.dtype == np.float64
+
+    cellpy.readers.core.compact_dtypes(raw, float_tolerance=1e-12)
+    assert raw.voltage.dtype == np.float64
+    cellpy.readers.core.compact_dtypes(raw, float_tolerance=1e-6)
+    assert raw.voltage.dtype == np.float32
+    report = cellpy.readers.core.memory_report(raw, "raw")
+    assert "float32" in report and report.splitlines()[-1].startswith("total:")
+
+
+def test_load_with_compact_dtypes(cellpy_data_instance, parameters, monkeypatch):
+    monkeypatch.setattr(prms.Reader, "compact_dtypes", True)
+    monkeypatch.setattr(prms.Reader, "compact_float_tolerance", 1e-6)
+    c = cellpy_data_instance.load(parameters.cellpy_file_path)
+    c.make_step_table()
+    c.make_summary(find_ir=True, find_end_voltage=True)
+    assert c.cell.raw.cycle_index.dtype == np.int16
+    assert c.cell.raw.voltage.dtype == np.float32
+    assert "memory usage for raw" in c.memory_report()
+
+    monkeypatch.setattr(prms.Reader, "compact_dtypes", False)
+    from cellpy import cellreader
+
+    expected = cellreader.CellpyData().load(parameters.cellpy_file_path)
+    expected.make_step_table()
+    expected.make_summary(find_ir=True, find_end_voltage=True)
+    assert c.cell.raw.memory_usage().sum() < expected.cell.raw.memory_usage().sum()
+    pd.testing.assert_frame_equal(
+        c.cell.steps, expected.cell.steps, check_dtype=False, rtol=1e-4, atol=1e-2
+    )
+    pd.testing.assert_frame_equal(
+        c.cell.summary,
+        expected.cell.summary,
+        check_dtype=False,
+        rtol=1e-4,
+        atol=1e-2,
+    )
+
+
 def test_load_custom_default(cellpy_data_instance, parameters):
     from cellpy import prms
 
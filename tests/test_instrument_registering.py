@@ -131,3 +131,87 @@ def test_query_instrument(parameter, loader, expected):
         instrument_factory.register_builder(instrument_id, instrument)
 
     assert instrument_factory.query(loader, parameter) == expected
+
+
+COUNTING_LOADER_MODULE = """
+import pathlib
+
+with open(pathlib.Path(__file__).with_suffix(".log"), "a") as f:
+    f.write("executed\\n")
+
+
+class DataLoader:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+"""
+
+
+@pytest.fixture
+def counting_loader(tmp_path):
+    module_path = tmp_path / "counting_loader.py"
+    module_path.write_text(COUNTING_LOADER_MODULE)
+
+    def number_of_executions():
+        return len(module_path.with_suffix(".log").read_text().splitlines())
+
+    yield ("cellpy_test_counting_loader", module_path), number_of_executions
+    core.InstrumentFactory.clear_cache()
+    prms._reload_instrument_modules = False
+
+
+def test_loader_module_imported_once(counting_loader):
+    builder, number_of_executions = counting_loader
+    for _ in range(3):
+        instrument_factory = core.InstrumentFactory()
+        instrument_factory.register_builder("counting", builder)
+        loaders = [instrument_factory.create("counting", n=n) for n in range(100)]
+    assert number_of_executions() == 1
+    assert loaders[-1].kwargs == {"n": 99}
+
+
+def test_loader_module_fresh_import(counting_loader):
+    builder, number_of_executions = counting_loader
+    instrument_factory = core.InstrumentFactory()
+    instrument_factory.register_builder("counting", builder)
+    instrument_factory.create("counting")
+    prms._reload_instrument_modules = True
+    instrument_factory.create("counting")
+    instrument_factory.create("counting")
+    assert number_of_executions() == 3
+    prms._reload_instrument_modules = False
+    core.InstrumentFactory.clear_cache()
+    instrument_factory.create("counting")
+    instrument_factory.create("counting")
+    assert number_of_executions() == 4
+
+
+def test_loader_module_import_follows_prms(counting_loader, monkeypatch):
+    builder, number_of_executions = counting_loader
+    instrument_factory = core.generate_default_factory()
+    instrument_factory.register_builder("counting", builder)
+    instrument_factory.create("counting")
+    loader = instrument_factory.create("arbin_sql")
+    assert loader.server == prms.Instruments.Arbin["SQL_server"]
+
+    monkeypatch.setitem(prms.Instruments.Arbin, "SQL_server", "another_server")
+    loader = instrument_factory.create("arbin_sql")
+    assert loader.server == "another_server"
+    instrument_factory.create("counting")
+    instrument_factory.create("counting")
+    assert number_of_executions() == 2
+
+
+def test_find_all_instruments_cached():
+    instruments = core.find_all_instruments()
+    instruments.pop("arbin_res")
+    assert "arbin_res" in core.find_all_instruments()
+
+
+def test_configuration_cached():
+    config_params = register_configuration_from_module("one", "maccor_txt_one")
+    config_params.pre_processors["a_pre_processor"] = True
+    other_config_params = register_configuration_from_module("one", "maccor_txt_one")
+    assert "a_pre_processor" not in other_config_params.pre_processors
+    assert other_config_params == register_configuration_from_module(
+        "one", "maccor_txt_one"
+    )
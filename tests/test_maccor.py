@@ -30,6 +30,177 @@ def test_set_instrument(cellpy_data_instance, parameters):
     shutil.rmtree(temp_dir)
 
 
+def test_from_raw_parallel(parameters):
+    from pandas.testing import assert_frame_equal
+
+    from cellpy import cellreader
+
+    file_names = [parameters.mcc_file_path, parameters.mcc_file_path]
+    cells = []
+    for parallel in [False, True]:
+        c = cellreader.CellpyData()
+        c.set_instrument(instrument="maccor_txt")
+        c.from_raw(file_names, model="one", sep="\t", parallel=parallel)
+        cells.append(c.cell)
+
+    sequential, parallel = cells
+    assert len(parallel.raw) == 2 * 6704
+    assert parallel.merged
+    assert len(parallel.raw_data_files) == 2
+    assert parallel.raw["data_point"].is_monotonic_increasing
+    assert_frame_equal(sequential.raw, parallel.raw)
+
+
+def test_from_raw_parallel_needs_instrument(parameters):
+    from cellpy import cellreader
+    from cellpy.exceptions import UnderDefined
+    from cellpy.readers.instruments import maccor_txt
+
+    c = cellreader.CellpyData()
+    c.loader = maccor_txt.DataLoader(model="one").loader  # not using set_instrument
+    file_names = [parameters.mcc_file_path, parameters.mcc_file_path]
+    with pytest.raises(UnderDefined):
+        c.from_raw(file_names, sep="\t", parallel=True)
+    c.from_raw(file_names, sep="\t")
+    assert len(c.cell.raw) == 2 * 6704
+
+
+def _load_maccor_raw(file_name, **kwargs):
+    from cellpy.readers.instruments import maccor_txt
+
+    loader = maccor_txt.DataLoader(model="one", **kwargs)
+    return loader.loader(file_name, sep="\t")[0].raw
+
+
+def test_loader_column_push_down(parameters):
+    from pandas.testing import assert_frame_equal
+
+    all_columns = _load_maccor_raw(parameters.mcc_file_path, keep_all_columns=True)
+    raw = _load_maccor_raw(parameters.mcc_file_path)
+    assert len(raw) == 6704
+    assert len(raw.columns) < len(all_columns.columns)
+    assert "Aux #1" not in raw.columns
+    assert_frame_equal(all_columns[raw.columns], raw)
+
+
+@pytest.mark.parametrize("keep_all_columns", [False, True])
+def test_loader_pyarrow_engine(parameters, keep_all_columns):
+    from pandas.testing import assert_frame_equal
+
+    pytest.importorskip("pyarrow")
+    raw = _load_maccor_raw(parameters.mcc_file_path, keep_all_columns=keep_all_columns)
+    pyarrow_raw = _load_maccor_raw(
+        parameters.mcc_file_path, keep_all_columns=keep_all_columns, engine="pyarrow"
+    )
+    assert_frame_equal(raw, pyarrow_raw)
+
+
+def test_loader_in_chunks(parameters):
+    from pandas.testing import assert_frame_equal
+
+    raw = _load_maccor_raw(parameters.mcc_file_path)
+    chunked_raw = _load_maccor_raw(parameters.mcc_file_path, chunk_size=1000)
+    assert_frame_equal(raw, chunked_raw)
+
+
+def test_loader_streaming_pre_processors(parameters):
+    import io
+    import pathlib
+
+    import pandas as pd
+    from pandas.testing import assert_frame_equal
+
+    from cellpy.readers.instruments import maccor_txt
+
+    loader = maccor_txt.DataLoader(model="two")
+    raw = loader.loader(parameters.mcc_file_path2)[0].raw
+    # no temporary copy of the file is made:
+    assert loader._file_path == pathlib.Path(parameters.mcc_file_path2)
+    assert len(loader._line_filters) == 1
+
+    with open(parameters.mcc_file_path2, encoding="ISO-8859-1") as f:
+        text = "".join(f"{line.strip()}\n" for line in f if line.strip())
+    expected = pd.read_csv(
+        io.StringIO(text), sep="\t", skiprows=12, header=0, decimal=","
+    )
+    assert len(raw) == len(expected)
+    assert (raw["voltage"].values == expected["Voltage [V]"].astype(float).values).all()
+
+
+def _compress(file_name, directory, compression):
+    import gzip
+    import pathlib
+    import zipfile
+
+    file_name = pathlib.Path(file_name)
+    if compression == "gzip":
+        compressed = directory / f"{file_name.name}.gz"
+        with open(file_name, "rb") as f, gzip.open(compressed, "wb") as out:
+            shutil.copyfileobj(f, out)
+    elif compression == "zstd":
+        import zstandard
+
+        compressed = directory / f"{file_name.name}.zst"
+        with open(file_name, "rb") as f, open(compressed, "wb") as out:
+            zstandard.ZstdCompressor().copy_stream(f, out)
+    else:
+        compressed = directory / f"{file_name.name}.zip"
+        with zipfile.ZipFile(compressed, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(file_name, file_name.name)
+    return compressed
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd", "zip"])
+def test_from_raw_compressed_file(parameters, tmp_path, compression):
+    from pandas.testing import assert_frame_equal
+
+    from cellpy import cellreader
+
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    compressed = _compress(parameters.mcc_file_path, tmp_path, compression)
+    cells = []
+    for file_name in [parameters.mcc_file_path, compressed]:
+        c = cellreader.CellpyData()
+        c.set_instrument(instrument="maccor_txt")
+        c.from_raw(file_name, model="one", sep="\t")
+        cells.append(c.cell)
+
+    raw, compressed_raw = cells
+    assert_frame_equal(raw.raw, compressed_raw.raw)
+    # the compressed file is tracked (for checking if it has changed):
+    fid = compressed_raw.raw_data_files[0]
+    assert fid.name == str(compressed.resolve())
+    assert fid.size == compressed.stat().st_size
+
+
+def test_loader_compressed_file_with_pre_processors(parameters, tmp_path):
+    from pandas.testing import assert_frame_equal
+
+    from cellpy.readers.instruments import maccor_txt
+
+    compressed = _compress(parameters.mcc_file_path2, tmp_path, "gzip")
+    raw = maccor_txt.DataLoader(model="two").loader(parameters.mcc_file_path2)[0].raw
+    loader = maccor_txt.DataLoader(model="two")
+    compressed_raw = loader.loader(compressed)[0].raw
+    assert loader._file_path == compressed
+    assert_frame_equal(raw, compressed_raw)
+
+
+@pytest.mark.parametrize("size", [-1, 1, 7, 4096])
+def test_filtered_lines_read(size):
+    from cellpy.readers.instruments.processors import pre_processors
+
+    lines = ["a;b\n", "\n", "1;2\n", "  \n", "3;4"]
+    stream = pre_processors.FilteredLines(pre_processors.filter_empty_lines(lines))
+    parts = []
+    while part := stream.read(size):
+        parts.append(part)
+        if size < 0:
+            break
+    assert "".join(parts) == "a;b\n1;2\n3;4\n"
+
+
 def test_cellpy_get_model_one(parameters):
     instrument = "maccor_txt"
     c = get(
@@ -0,0 +1,131 @@
+import importlib
+import logging
+import pathlib
+import time
+
+import pandas as pd
+import pytest
+
+from cellpy import log, prms
+
+pytest.importorskip("pyarrow")
+
+log.setup_logging(default_level=logging.DEBUG, testing=True)
+
+benchmark_available = importlib.util.find_spec("pytest_benchmark") is not None
+
+
+def _file_size(filename):
+    filename = pathlib.Path(filename)
+    if filename.is_dir():
+        return sum(f.stat().st_size for f in filename.rglob("*") if f.is_file())
+    return filename.stat().st_size
+
+
+def test_save_and_load_parquet(tmp_path, dataset):
+    from cellpy import cellreader
+
+    cellpy_file_name = pathlib.Path(tmp_path) / "cell.cpq"
+    dataset.save(cellpy_file_name)
+    assert (cellpy_file_name / "raw.parquet").is_file()
+
+    c = cellreader.CellpyData().load(cellpy_file_name)
+    pd.testing.assert_frame_equal(c.cell.raw, dataset.cell.raw)
+    pd.testing.assert_frame_equal(c.cell.steps, dataset.cell.steps)
+    pd.testing.assert_frame_equal(c.cell.summary, dataset.cell.summary)
+    assert c.cell.mass == dataset.cell.mass
+    assert [f.name for f in c.cell.raw_data_files] == [
+        f.name for f in dataset.cell.raw_data_files
+    ]
+
+
+def test_save_parquet_using_backend_setting(tmp_path, dataset, monkeypatch):
+    monkeypatch.setattr(prms, "_cellpyfile_backend", "parquet")
+    dataset.save(pathlib.Path(tmp_path) / "cell")
+    assert (pathlib.Path(tmp_path) / "cell.cpq" / "meta.parquet").is_file()
+
+
+def test_parquet_raw_row_groups_follow_cycles(tmp_path, dataset, monkeypatch):
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(prms, "_cellpyfile_parquet_row_group_size", 1000)
+    cellpy_file_name = pathlib.Path(tmp_path) / "cell.cpq"
+    dataset.save(cellpy_file_name)
+    meta_data = pq.ParquetFile(cellpy_file_name / "raw.parquet").metadata
+    assert meta_data.num_row_groups > 1
+    cycle_column = meta_data.schema.names.index("cycle_index")
+    last_cycle = None
+    for i in range(meta_data.num_row_groups):
+        statistics = meta_data.row_group(i).column(cycle_column).statistics
+        if last_cycle is not None:
+            assert statistics.min > last_cycle
+        last_cycle = statistics.max
+
+
+@pytest.mark.parametrize(
+    "selector,expected_cycles",
+    [
+        (dict(max_cycle=5), [1, 2, 3, 4, 5]),
+        (dict(cycles=(3, 6), columns=["voltage"]), [3, 4, 5, 6]),
+        (dict(cycles=[2, 7, 8, 17]), [2, 7, 8, 17]),
+    ],
+)
+def test_load_parquet_with_selector(tmp_path, dataset, selector, expected_cycles):
+    from cellpy import cellreader
+
+    cellpy_file_name = pathlib.Path(tmp_path) / "cell.cpq"
+    dataset.save(cellpy_file_name)
+    c = cellreader.CellpyData().load(cellpy_file_name, selector=selector).cell
+    assert sorted(c.raw.cycle_index.unique()) == expected_cycles
+    assert sorted(c.steps.cycle.unique()) == expected_cycles
+    assert sorted(c.summary.index) == expected_cycles
+    if "columns" in selector:
+        assert list(c.raw.columns) == [
+            "data_point",
+            "cycle_index",
+            "step_index",
+            "voltage",
+        ]
+
+
+def test_convert_cellpy_file(tmp_path, parameters):
+    from cellpy import cellreader
+    from cellpy.utils import helpers
+
+    new_file = helpers.convert_cellpy_file(
+        parameters.cellpy_file_path, pathlib.Path(tmp_path) / "converted.cpq"
+    )
+    old = cellreader.CellpyData().load(parameters.cellpy_file_path)
+    new = cellreader.CellpyData().load(new_file)
+    pd.testing.assert_frame_equal(new.cell.summary, old.cell.summary)
+
+    back_file = helpers.convert_cellpy_file(
+        new_file, pathlib.Path(tmp_path) / "converted.h5", backend="hdf5"
+    )
+    back = cellreader.CellpyData().load(back_file)
+    pd.testing.assert_frame_equal(back.cell.raw, old.cell.raw)
+
+
+@pytest.mark.skipif(not benchmark_available, reason="needs pytest-benchmark")
+@pytest.mark.benchmark(group="cellpy-file-save", timer=time.time, warmup=False)
+@pytest.mark.parametrize("extension", ["h5", "cpq"])
+def test_benchmark_save_cellpy_file(tmp_path, dataset, benchmark, extension):
+    cellpy_file_name = pathlib.Path(tmp_path) / f"cell.{extension}"
+    benchmark(dataset.save, cellpy_file_name, overwrite=True)
+    benchmark.extra_info["file_size"] = _file_size(cellpy_file_name)
+
+
+@pytest.mark.skipif(not benchmark_available, reason="needs pytest-benchmark")
+@pytest.mark.benchmark(group="cellpy-file-load", timer=time.time, warmup=False)
+@pytest.mark.parametrize("extension", ["h5", "cpq"])
+@pytest.mark.parametrize("selector", [None, dict(cycles=(5, 8))])
+def test_benchmark_load_cellpy_file(tmp_path, dataset, benchmark, extension, selector):
+    from cellpy import cellreader
+
+    cellpy_file_name = pathlib.Path(tmp_path) / f"cell.{extension}"
+    dataset.save(cellpy_file_name)
+    benchmark.extra_info["file_size"] = _file_size(cellpy_file_name)
+    c = benchmark(
+        lambda: cellreader.CellpyData().load(cellpy_file_name, selector=selector)
+    )
+    assert c.cell.has_data
@@ -22,3 +22,62 @@ def test_set_instrument(cellpy_data_instance, parameters):
     temp_dir = tempfile.mkdtemp()
     cellpy_data_instance.to_csv(datadir=temp_dir)
     shutil.rmtree(temp_dir)
+
+
+def test_timestamps_to_seconds():
+    import pandas as pd
+
+    from cellpy.readers.instruments.pec_csv import DataLoader
+
+    timestamps = pd.Series(["00:00:01.500", "01:02:03.000", "127:00:00.250"])
+    seconds = DataLoader.timestamps_to_seconds(timestamps)
+    assert seconds.tolist() == [1.5, 3723.0, 127 * 3600 + 0.25]
+
+
+@pytest.mark.parametrize("timestamp", ["5", "00:00:01,5", "00:1:00.000", "n/a"])
+def test_timestamps_to_seconds_malformed(timestamp):
+    import pandas as pd
+
+    from cellpy.readers.instruments.pec_csv import DataLoader
+
+    timestamps = pd.Series(["00:00:01.500", timestamp])
+    with pytest.raises(ValueError, match="could not parse timestamp"):
+        DataLoader.timestamps_to_seconds(timestamps)
+
+
+def test_load_hh_mm_ss_times(parameters, tmp_path):
+    from pandas.testing import assert_series_equal
+
+    from cellpy import cellreader
+
+    def _to_hh_mm_ss(seconds):
+        hours, seconds = divmod(float(seconds), 3600)
+        minutes, seconds = divmod(seconds, 60)
+        return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+    with open(parameters.pec_file_path, encoding="ISO-8859-1") as f:
+        lines = f.read().splitlines(keepends=True)
+    data_header = max(i for i, line in enumerate(lines) if line.startswith("Test,"))
+    for i in range(data_header + 1, len(lines)):
+        if lines[i].strip():
+            values = lines[i].split(",")
+            values[8] = _to_hh_mm_ss(values[8])  # Total Time
+            values[10] = _to_hh_mm_ss(values[10])  # Step Time
+            lines[i] = ",".join(values)
+    lines[data_header] = (
+        lines[data_header]
+        .replace("Total Time (Seconds)", "Total Time (Hours in hh:mm:ss.xxx)")
+        .replace("Step Time (Seconds)", "Step Time (Hours in hh:mm:ss.xxx)")
+    )
+    hh_mm_ss_file = tmp_path / "pec_hh_mm_ss.csv"
+    hh_mm_ss_file.write_text("".join(lines), encoding="ISO-8859-1")
+
+    raws = []
+    for file_name in [parameters.pec_file_path, hh_mm_ss_file]:
+        c = cellreader.CellpyData()
+        c.set_instrument(instrument="pec_csv")
+        c.from_raw(file_name)
+        raws.append(c.cell.raw)
+    raw, hh_mm_ss_raw = raws
+    for hdr in ["test_time", "step_time"]:
+        assert_series_equal(raw[hdr].astype(float), hh_mm_ss_raw[hdr])
@@ -0,0 +1,157 @@
+import importlib
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cellpy import log
+from cellpy.readers.instruments.configurations import ModelParameters
+from cellpy.readers.instruments.processors import post_processors
+
+log.setup_logging(default_level=logging.DEBUG, testing=True)
+
+benchmark_available = importlib.util.find_spec("pytest_benchmark") is not None
+
+STATES = {
+    "column_name": "State",
+    "charge_keys": ["C"],
+    "discharge_keys": ["D"],
+    "rest_keys": ["R"],
+}
+
+
+def _raw_frame(number_of_cycles, points_per_cycle=10, seed=42):
+    rng = np.random.default_rng(seed)
+    number_of_points = number_of_cycles * points_per_cycle
+    return pd.DataFrame(
+        {
+            "data_point": np.arange(1, number_of_points + 1),
+            "cycle_index": np.repeat(
+                np.arange(1, number_of_cycles + 1), points_per_cycle
+            ),
+            "State": rng.choice(["C", "D", "R"], size=number_of_points),
+            "charge_capacity": rng.random(number_of_points),
+            "current": rng.normal(size=number_of_points),
+        }
+    )
+
+
+def _split(raw):
+    data = post_processors.Cell()
+    data.raw = raw
+    config_params = ModelParameters(name="test", states=STATES)
+    data = post_processors.split_capacity(data, config_params)
+    data = post_processors.split_current(data, config_params)
+    return data.raw
+
+
+def test_split_capacity_and_current():
+    raw = pd.DataFrame(
+        {
+            "data_point": [1, 2, 3, 4, 5, 6, 7, 8],
+            "cycle_index": [1, 1, 1, 1, 2, 2, 2, 2],
+            "State": ["C", "C", "R", "D", "D", "D", "R", "C"],
+            "charge_capacity": [0.5, 1.5, 1.5, 0.5, 0.25, np.nan, 1.0, 2.0],
+            "current": [1.0, 1.0, 0.0, 2.0, 2.0, 2.0, 0.0, 1.0],
+        }
+    )
+    raw = _split(raw)
+    assert raw["charge_capacity"].tolist() == [0.5, 1.5, 1.5, 1.5, 0, 0, 0, 2.0]
+    assert raw["discharge_capacity"].tolist()[:6] == [0, 0, 0, 0.5, 0.25, 0]
+    # the last (NaN) discharge value is propagated within the cycle:
+    assert np.isnan(raw["discharge_capacity"].iloc[6:]).all()
+    assert raw["current"].tolist() == [1.0, 1.0, 0, -2.0, -2.0, -2.0, 0, 1.0]
+
+
+@pytest.mark.parametrize(
+    "charge_capacity, dtype",
+    [
+        ([1.0, 2.0, 3.0, np.nan], np.float64),  # the only charge row has no value
+        ([1.0, 2.0, 3.0, 4.0], np.int64),
+        ([1.0, 2.0, 3.0, 4.5], np.float64),
+    ],
+)
+def test_split_capacity_dtype(charge_capacity, dtype):
+    raw = pd.DataFrame(
+        {
+            "data_point": [1, 2, 3, 4],
+            "cycle_index": [1, 1, 2, 2],
+            "State": ["D", "D", "D", "C"],
+            "charge_capacity": charge_capacity,
+            "current": [1, 1, 1, 1],
+        }
+    )
+    raw = _split(raw)
+    assert raw["charge_capacity"].dtype == dtype
+    assert raw["discharge_capacity"].tolist() == [1, 2, 3, 3]
+
+
+def test_split_capacity_bad_cycles():
+    raw = _raw_frame(5).drop(columns="State")
+    raw = _split(raw)
+    assert (raw["charge_capacity"] == 0).all()
+    assert (raw["discharge_capacity"] == 0).all()
+
+
+@pytest.mark.skipif(not benchmark_available, reason="needs pytest-benchmark")
+@pytest.mark.benchmark(group="state-splitter", timer=time.time, warmup=False)
+@pytest.mark.parametrize("number_of_cycles", [1_000, 10_000, 100_000])
+def test_benchmark_state_splitter(benchmark, number_of_cycles):
+    raw = _raw_frame(number_of_cycles)
+    raw = benchmark.pedantic(
+        _split, setup=lambda: ((raw.copy(),), {}), rounds=3, iterations=1
+    )
+    assert len(raw) == 10 * number_of_cycles
+    benchmark.extra_info["number_of_points"] = len(raw)
+
+
+def test_cumulate_capacity_within_cycle():
+    data = post_processors.Cell()
+    data.raw = pd.DataFrame(
+        {
+            "cycle_index": [1, 1, 1, 1, 1, 2, 2, 2],
+            "step_index": [1, 1, 2, 2, 3, 1, 2, 2],
+            "charge_capacity": [0.5, 1.0, 0.0, 0.5, 0.25, 1.0, 0.5, 1.0],
+            "discharge_capacity": [0.0, 0.0, 1.0, 2.0, 0.5, 0.0, 0.5, 1.0],
+        }
+    )
+    raw = post_processors.cumulate_capacity_within_cycle(data, None).raw
+    assert raw["charge_capacity"].tolist() == [0.5, 1.0, 1.0, 1.5, 1.75, 1.0, 1.5, 2.0]
+    assert raw["discharge_capacity"].tolist() == [0, 0, 1.0, 2.0, 2.5, 0, 0.5, 1.0]
+
+
+def test_cumulate_capacity_within_cycle_unordered_steps():
+    data = post_processors.Cell()
+    data.raw = pd.DataFrame(
+        {
+            "cycle_index": [1, 1, 1, 1],
+            "step_index": [2, 2, 1, 1],
+            "charge_capacity": [1.0, 2.0, 0.5, 1.0],
+            "discharge_capacity": [0.0, 0.0, 0.0, 0.0],
+        }
+    )
+    raw = post_processors.cumulate_capacity_within_cycle(data, None).raw
+    # rows are ordered by cycle and step (as when grouping by cycle and step):
+    assert raw.index.tolist() == [2, 3, 0, 1]
+    assert raw["charge_capacity"].tolist() == [0.5, 1.0, 2.0, 3.0]
+
+
+@pytest.mark.skipif(not benchmark_available, reason="needs pytest-benchmark")
+@pytest.mark.benchmark(group="cumulate-capacity", timer=time.time, warmup=False)
+@pytest.mark.parametrize("number_of_cycles", [1_000, 10_000, 100_000])
+def test_benchmark_cumulate_capacity_within_cycle(benchmark, number_of_cycles):
+    raw = _raw_frame(number_of_cycles)
+    raw["step_index"] = np.tile(np.repeat([1, 2, 3, 4, 5], 2), number_of_cycles)
+    raw["discharge_capacity"] = raw["charge_capacity"]
+
+    def _cumulate(raw):
+        data = post_processors.Cell()
+        data.raw = raw
+        return post_processors.cumulate_capacity_within_cycle(data, None).raw
+
+    raw = benchmark.pedantic(
+        _cumulate, setup=lambda: ((raw.copy(),), {}), rounds=3, iterations=1
+    )
+    assert len(raw) == 10 * number_of_cycles
@@ -0,0 +1,122 @@
+import logging
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from cellpy import log, prms
+from cellpy.readers import cellreader, raw_cache
+from cellpy.readers.core import Cell, FileID
+
+log.setup_logging(default_level=logging.DEBUG, testing=True)
+
+pytestmark = pytest.mark.skipif(not raw_cache.pyarrow_available, reason="needs pyarrow")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(prms.Reader, "raw_cache", True)
+    monkeypatch.setattr(prms.Reader, "raw_cache_dir", cache_dir)
+    return cache_dir
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_name, **kwargs):
+        self.calls += 1
+        cell = Cell()
+        cell.loaded_from = file_name
+        cell.raw_data_files.append(FileID(file_name))
+        cell.raw = pd.DataFrame(
+            {"data_point": [1, 2, 3], "voltage": [0.1, 0.2, 0.3], "state": list("CDR")}
+        ).set_index("data_point", drop=False)
+        return [cell]
+
+
+@pytest.fixture
+def raw_file(tmp_path):
+    file_name = tmp_path / "raw_file.txt"
+    file_name.write_text("some raw data")
+    return file_name
+
+
+def test_raw_cache_hit(cache, raw_file):
+    loader = CountingLoader()
+    cells = raw_cache.load(loader, raw_file, loader_info="counting", sep="\t")
+    cached_cells = raw_cache.load(loader, raw_file, loader_info="counting", sep="\t")
+    assert loader.calls == 1
+    pd.testing.assert_frame_equal(cached_cells[0].raw, cells[0].raw)
+    assert cached_cells[0].raw_data_files[0].size == raw_file.stat().st_size
+
+    raw_cache.load(loader, raw_file, loader_info="counting", sep=";")
+    raw_cache.load(loader, raw_file, loader_info="other", sep="\t")
+    assert loader.calls == 3
+
+
+def test_raw_cache_not_used(cache, raw_file, monkeypatch):
+    loader = CountingLoader()
+    raw_cache.load(loader, raw_file, pre_processor_hook=lambda x: x)
+    raw_cache.load(loader, raw_file, pre_processor_hook=lambda x: x)
+    assert loader.calls == 2
+    assert not cache.exists()
+
+    monkeypatch.setattr(prms.Reader, "raw_cache", False)
+    raw_cache.load(loader, raw_file)
+    raw_cache.load(loader, raw_file)
+    assert loader.calls == 4
+    assert not cache.exists()
+
+
+def test_raw_cache_content_addressed(cache, raw_file, tmp_path):
+    loader = CountingLoader()
+    raw_cache.load(loader, raw_file)
+    copied_file = tmp_path / "copied_raw_file.txt"
+    shutil.copy(raw_file, copied_file)
+    cells = raw_cache.load(loader, copied_file)
+    assert loader.calls == 1
+    assert cells[0].loaded_from == copied_file
+    assert cells[0].raw_data_files[0].full_name == copied_file
+
+    raw_file.write_text("some other raw data")
+    raw_cache.load(loader, raw_file)
+    assert loader.calls == 2
+
+
+def test_raw_cache_evict(cache, tmp_path):
+    loader = CountingLoader()
+    entries = []
+    for number in range(4):
+        file_name = tmp_path / f"raw_file_{number}.txt"
+        file_name.write_text(f"raw data {number}")
+        raw_cache.load(loader, file_name)
+        entries.append(cache / raw_cache.cache_key(file_name))
+        os.utime(entries[-1], (1_000_000 * (number + 1),) * 2)
+    assert all(entry.is_dir() for entry in entries)
+
+    entry_size = raw_cache._entry_size(entries[0])
+    assert raw_cache.evict(cache, max_size=2 * entry_size) == 2
+    raw_cache.load(loader, tmp_path / "raw_file_3.txt")
+    assert loader.calls == 4
+    raw_cache.load(loader, tmp_path / "raw_file_0.txt")
+    assert loader.calls == 5
+
+
+def test_from_raw_with_raw_cache(cache, parameters, monkeypatch):
+    cells = []
+    for _ in range(2):
+        c = cellreader.CellpyData()
+        c.set_instrument(instrument="maccor_txt")
+        c.from_raw(parameters.mcc_file_path, model="one", sep="\t")
+        cells.append(c.cell)
+    pd.testing.assert_frame_equal(cells[1].raw, cells[0].raw)
+    assert len(list(cache.iterdir())) == 2  # one entry (and the fingerprints)
+
+    monkeypatch.setattr(prms.Reader, "raw_cache", False)
+    c = cellreader.CellpyData()
+    c.set_instrument(instrument="maccor_txt")
+    c.from_raw(parameters.mcc_file_path, model="one", sep="\t")
+    pd.testing.assert_frame_equal(cells[1].raw, c.cell.raw)
@@ -1,7 +1,9 @@
+import sqlite3
+
 import pandas as pd
 import pytest
 
-from cellpy import log
+from cellpy import log, prms
 from cellpy.readers.instruments import arbin_sql
 from cellpy.readers.instruments import base
 from cellpy.readers.core import Cell
@@ -50,3 +52,101 @@ def test_post_process_rename_headers_from_file(raw_mock):
     data = Cell()
     data.raw = raw_mock
     loader._post_process(data, **keywords)
+
+
+TABLE_NAMES = {
+    "test_list": "main.TestList_Table",
+    "normal": "{database_name}.IV_Basic_Table",
+    "statistic": "{database_name}.StatisticData_Table",
+}
+
+
+@pytest.fixture
+def server(parameters):
+    """In-memory SQLite stand-in for the Arbin SQL server (two tests in one db)."""
+    raw = pd.read_excel(parameters.mock_file_path, sheet_name="arbin_sql")
+    other = raw.assign(Test_ID=23, Test_Name="test_002")
+    other["Cycle_ID"] = (other["Data_Point"] - other["Data_Point"].iloc[0]) // 10 + 1
+    normal_df = pd.concat([raw, other], ignore_index=True).drop(columns="Test_Name")
+    stat_df = normal_df.groupby(["Test_ID", "Cycle_ID"], as_index=False).last()
+    test_list = pd.DataFrame(
+        {
+            "Database_Name": "db1",
+            "Test_ID": [22, 23],
+            "Test_Name": ["test_001", "test_002"],
+        }
+    )
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ':memory:' AS db1")
+    test_list.to_sql("TestList_Table", conn, index=False)
+    for table_name, df in [
+        ("IV_Basic_Table", normal_df),
+        ("StatisticData_Table", stat_df),
+    ]:
+        df.to_sql(table_name, conn, index=False)
+        conn.execute(f"CREATE TABLE db1.{table_name} AS SELECT * FROM {table_name}")
+        conn.execute(f"DROP TABLE {table_name}")
+    connections = []
+
+    def connect():
+        connections.append(conn)
+        return conn
+
+    loader = arbin_sql.DataLoader(connect=connect, table_names=TABLE_NAMES)
+    yield loader, connections
+    arbin_sql.connection_pool.close_all()
+
+
+def test_from_arbin_to_datetimes(raw_mock):
+    expected = raw_mock.Date_Time.apply(arbin_sql.from_arbin_to_datetime)
+    converted = arbin_sql.from_arbin_to_datetimes(raw_mock.Date_Time)
+    assert converted.tolist() == expected.tolist()
+    empty = arbin_sql.from_arbin_to_datetimes(raw_mock.Date_Time.iloc[:0])
+    assert empty.empty
+    assert empty.index.equals(raw_mock.Date_Time.index[:0])
+
+
+def test_loader(server):
+    loader, connections = server
+    cells = loader.loader("test_001")
+    assert len(cells) == 1
+    assert cells[0].test_ID == 22
+    assert len(cells[0].raw) == 29
+    assert len(cells[0].summary) == 1
+
+
+def test_loader_many_tests_one_connection(server):
+    loader, connections = server
+    cells = loader.loader(["test_001", "test_002", "test_003"])
+    assert [cell.test_name for cell in cells] == ["test_001", "test_002"]
+    assert [len(cell.summary) for cell in cells] == [1, 3]
+    cells = loader.loader("test_002")
+    assert len(cells[0].raw) == 29
+    assert len(connections) == 1
+
+
+def test_loader_filtered(server):
+    loader, _ = server
+    raw = loader.loader("test_002")[0].raw
+    data_points = (raw.data_point.iloc[5], raw.data_point.iloc[14])
+    cells = loader.loader("test_002", data_points=data_points)
+    assert cells[0].raw.data_point.tolist() == raw.data_point.iloc[5:15].tolist()
+
+    prms.Reader.limit_loaded_cycles = [2]
+    prms.Reader.select_minimal = True
+    try:
+        cells = loader.loader("test_002")
+    finally:
+        prms.Reader.limit_loaded_cycles = None
+        prms.Reader.select_minimal = False
+    assert (cells[0].raw.cycle_index == 2).all()
+    assert len(cells[0].raw) == 10
+    assert "charge_energy" not in cells[0].raw.columns
+
+
+def test_loader_in_chunks(server):
+    loader, _ = server
+    raw = loader.loader("test_002")[0].raw
+    chunked_raw = loader.loader("test_002", chunk_size=4)[0].raw
+    pd.testing.assert_frame_equal(chunked_raw, raw)